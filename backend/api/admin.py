@@ -1,6 +1,9 @@
 # backend/api/admin.py
 from django.contrib import admin
-from .models import Author, Book, UserBook, ReadingGoal, ReadingList, Profile, ReadingSession
+from .models import (
+    Author, Book, UserBook, LibraryStats,
+    ReadingGoal, ReadingList, Profile, ReadingSession, DailyReadingStat
+)
 
 
 @admin.register(Author)
@@ -28,6 +31,13 @@ class UserBookAdmin(admin.ModelAdmin):
     progress.short_description = 'Progression'
 
 
+@admin.register(LibraryStats)
+class LibraryStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'total', 'lu', 'en_cours', 'non_lu', 'pages_read', 'updated_at']
+    search_fields = ['user__username']
+    readonly_fields = ['total', 'lu', 'en_cours', 'non_lu', 'pages_read', 'updated_at']
+
+
 @admin.register(ReadingGoal)
 class ReadingGoalAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'goal_type', 'period', 'target', 'start_date', 'end_date']
@@ -43,9 +53,15 @@ class ReadingListAdmin(admin.ModelAdmin):
 @admin.register(ReadingSession)
 class ReadingSessionAdmin(admin.ModelAdmin):
     list_display = ['user_book', 'date', 'pages_read', 'duration_minutes', 'created_at']
-    list_filter = ['date', 'user_book__user']
+    list_filter = ['date', 'user']
     search_fields = ['user_book__book__title', 'notes']
 
+
+@admin.register(DailyReadingStat)
+class DailyReadingStatAdmin(admin.ModelAdmin):
+    list_display = ['user', 'date', 'pages_read', 'manual_pages', 'minutes', 'sessions_count', 'books_finished']
+    list_filter = ['date', 'user']
+
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'favorite_genre', 'created_at']
@@ -0,0 +1,158 @@
+"""
+Statistiques de lecture calculées en base (GET /api/reading-sessions/analytics/)
+
+Tout part de l'agrégat quotidien DailyReadingStat (un jour actif = une
+ligne avec sessions_count > 0), en un nombre fixe de requêtes :
+
+1. séries de jours consécutifs (« îles ») : numéro du jour moins
+   ROW_NUMBER() OVER (ORDER BY date) est constant sur une série ; la plus
+   longue et la plus récente sont choisies par ROW_NUMBER()
+2. totaux de la période (pages, jours actifs)
+3. rythme en pages par minute, sur les sessions dont la durée est connue
+4. répartition par jour de la semaine
+5. calendrier (heatmap) : pages par jour, niveau 1 à 4 par NTILE(4)
+"""
+
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Count, F, Sum, Window
+from django.db.models.functions import Coalesce, ExtractIsoWeekDay, Ntile
+from django.utils import timezone
+
+from .models import DailyReadingStat, ReadingSession
+
+ANALYTICS_DEFAULT_DAYS = 365
+ANALYTICS_MAX_DAYS = 731
+
+WEEKDAYS = ['lundi', 'mardi', 'mercredi', 'jeudi', 'vendredi', 'samedi', 'dimanche']
+
+# Numéro du jour (entier croissant d'un par jour) selon la base
+DAY_NUMBER_SQL = {
+    'postgresql': "(date - DATE '1970-01-01')",
+    'sqlite': "CAST(julianday(date) AS INTEGER)",
+}
+
+STREAKS_SQL = """
+WITH islands AS (
+    SELECT date, {day_number} - ROW_NUMBER() OVER (ORDER BY date) AS island
+    FROM {table}
+    WHERE user_id = %s AND sessions_count > 0
+),
+streaks AS (
+    SELECT MIN(date) AS start_date, MAX(date) AS end_date, COUNT(*) AS length
+    FROM islands
+    GROUP BY island
+),
+ranked AS (
+    SELECT start_date, end_date, length,
+           ROW_NUMBER() OVER (ORDER BY length DESC, end_date DESC) AS by_length,
+           ROW_NUMBER() OVER (ORDER BY end_date DESC) AS by_recency
+    FROM streaks
+)
+SELECT start_date, end_date, length, by_length, by_recency
+FROM ranked
+WHERE by_length = 1 OR by_recency = 1
+"""
+
+
+def _streak(row):
+    start_date, end_date, length = row[:3]
+    field = DailyReadingStat._meta.get_field('date')
+    return {
+        'length': length,
+        'start': field.to_python(start_date),
+        'end': field.to_python(end_date),
+    }
+
+
+def reading_streaks(user, today):
+    """Série la plus longue et série en cours (lu aujourd'hui ou hier)"""
+    sql = STREAKS_SQL.format(
+        day_number=DAY_NUMBER_SQL[connection.vendor],
+        table=DailyReadingStat._meta.db_table,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user.pk])
+        rows = cursor.fetchall()
+
+    longest = next((_streak(row) for row in rows if row[3] == 1), None)
+    latest = next((_streak(row) for row in rows if row[4] == 1), None)
+    current = latest if latest and latest['end'] >= today - timedelta(days=1) else None
+
+    return {
+        'current_streak': current['length'] if current else 0,
+        'current_streak_start': current['start'] if current else None,
+        'longest_streak': longest['length'] if longest else 0,
+        'longest_streak_start': longest['start'] if longest else None,
+        'longest_streak_end': longest['end'] if longest else None,
+    }
+
+
+def reading_analytics(user, days=ANALYTICS_DEFAULT_DAYS):
+    """Statistiques des `days` derniers jours (séries : tout l'historique)"""
+    today = timezone.localdate()
+    start_date = today - timedelta(days=days - 1)
+    active_days = DailyReadingStat.objects.filter(
+        user=user, sessions_count__gt=0, date__gte=start_date, date__lte=today,
+    )
+
+    totals = active_days.aggregate(
+        pages=Coalesce(Sum('pages_read'), 0),
+        active_days=Count('id'),
+    )
+
+    pace = ReadingSession.objects.filter(
+        user=user, date__gte=start_date, date__lte=today,
+        duration_minutes__gt=0,
+    ).aggregate(
+        pages=Coalesce(Sum('pages_read'), 0),
+        minutes=Coalesce(Sum('duration_minutes'), 0),
+    )
+
+    weekdays = {
+        row['weekday']: row
+        for row in active_days
+        .annotate(weekday=ExtractIsoWeekDay('date'))
+        .values('weekday')
+        .annotate(pages=Sum('pages_read'), days=Count('id'))
+        .order_by()
+    }
+    by_weekday = [
+        {
+            'weekday': name,
+            'pages': weekdays.get(number, {}).get('pages', 0),
+            'days': weekdays.get(number, {}).get('days', 0),
+        }
+        for number, name in enumerate(WEEKDAYS, start=1)
+    ]
+    busiest = max(by_weekday, key=lambda row: row['pages'])
+
+    heatmap = list(
+        active_days
+        .annotate(
+            pages=F('pages_read'),
+            level=Window(Ntile(4), order_by=F('pages_read').asc()),
+        )
+        .values('date', 'pages', 'level')
+        .order_by('date')
+    )
+
+    return {
+        'from': start_date,
+        'to': today,
+        'days': days,
+        **reading_streaks(user, today),
+        'total_pages': totals['pages'],
+        'active_days': totals['active_days'],
+        'pages_per_day': round(totals['pages'] / days, 2),
+        'pages_per_active_day': (
+            round(totals['pages'] / totals['active_days'], 2) if totals['active_days'] else 0
+        ),
+        'pages_per_minute': (
+            round(pace['pages'] / pace['minutes'], 2) if pace['minutes'] else None
+        ),
+        'busiest_weekday': busiest['weekday'] if busiest['pages'] else None,
+        'by_weekday': by_weekday,
+        'heatmap': heatmap,
+    }
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        if getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            from .middleware import instrument_serializers
+
+            instrument_serializers()
@@ -0,0 +1,153 @@
+"""
+Authentification JWT avec cache des utilisateurs
+
+JWTAuthentication (simplejwt) relit la ligne auth_user à chaque appel.
+CachedJWTAuthentication vérifie le jeton de la même façon (signature,
+expiration, type) mais résout l'utilisateur depuis un cache LRU borné, à
+durée de vie courte, propre au processus :
+
+    (id utilisateur, génération, version du jeton) → valeurs de la ligne User
+
+- version du jeton : empreinte du mot de passe portée par le jeton
+  (SIMPLE_JWT['CHECK_REVOKE_TOKEN']) ; un changement de mot de passe
+  révoque les jetons émis avant
+- génération : compteur par utilisateur dans le cache Django, incrémenté à
+  chaque enregistrement ou suppression du User (signaux dans models.py) ;
+  tous les processus voient l'invalidation
+
+Le cache exige donc un cache Django partagé entre processus (CACHE_BACKEND) :
+sans lui, un utilisateur désactivé resterait authentifié par les autres
+processus jusqu'à JWT_USER_CACHE_TTL. Avec un cache propre au processus
+(api.shared_cache), l'utilisateur est relu à chaque requête, comme avec
+JWTAuthentication.
+
+Chaque requête reçoit sa propre instance de User (reconstruite à partir des
+valeurs en cache) : rien n'est partagé entre requêtes.
+
+Succès / échecs : champ auth_cache du log « api.requests » et entrée
+auth de l'en-tête Server-Timing ; totaux du processus : user_cache.stats().
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .middleware import get_current_metrics
+from .shared_cache import cache_is_shared
+
+
+class UserCache:
+    """Cache LRU borné avec durée de vie, partagé par les threads du processus"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+user_cache = UserCache(
+    max_size=getattr(settings, 'JWT_USER_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'JWT_USER_CACHE_TTL', 60),
+)
+
+
+def _generation_key(user_id):
+    return f'auth:user:{user_id}:generation'
+
+
+def invalidate_cached_user(user_id):
+    """
+    Oublie l'utilisateur (ce processus, et les autres via le cache Django).
+    Appelé après le commit : une lecture concurrente ne peut pas remettre
+    en cache l'ancienne ligne sous la nouvelle génération.
+    """
+    user_cache.discard_user(str(user_id))
+    try:
+        cache.incr(_generation_key(user_id))
+    except ValueError:
+        cache.set(_generation_key(user_id), 1, timeout=None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication dont l'utilisateur est lu dans user_cache (voir le module)"""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not cache_is_shared():
+            # Message d'erreur standard de simplejwt ; ou invalidation
+            # invisible des autres processus (voir le module)
+            return super().get_user(validated_token)
+
+        key = (
+            str(user_id),
+            cache.get(_generation_key(user_id), 0),
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM),
+        )
+        values = user_cache.get(key)
+        metrics = get_current_metrics()
+        if metrics is not None:
+            metrics.auth_cache = 'miss' if values is None else 'hit'
+        if values is not None:
+            return self.user_model.from_db(DEFAULT_DB_ALIAS, self._field_names(), values)
+
+        # Vérifications complètes (existence, is_active, mot de passe changé)
+        user = super().get_user(validated_token)
+        user_cache.set(key, tuple(getattr(user, name) for name in self._field_names()))
+        return user
+
+    def _field_names(self):
+        return [field.attname for field in self.user_model._meta.concrete_fields]
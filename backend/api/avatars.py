@@ -0,0 +1,286 @@
+"""
+Avatars : stockage par contenu et miniatures pré-calculées
+
+À l'envoi (PATCH /api/profile/), set_avatar :
+- calcule l'empreinte SHA-256 du fichier ; le fichier est stocké sous
+  avatars/<empreinte>.<format> : deux envois identiques partagent un fichier
+- planifie (après le commit) la génération des miniatures dans un pool de
+  threads : l'image est décodée une seule fois (réduite dès le décodage pour
+  les JPEG, draft), orientée selon l'EXIF, puis recadrée au carré dans
+  chaque taille d'AVATAR_SIZES
+
+Les miniatures (avatars/thumbs/<empreinte>-<taille>.jpg) sont servies par
+avatar_file avec un cache HTTP d'un an (immutable) : leur URL change avec
+le contenu. Tant qu'elles ne sont pas prêtes (Profile.avatar_ready),
+ProfileSerializer renvoie l'image d'origine pour chaque taille.
+
+Le pool de threads est propre au processus : une génération perdue
+(redémarrage, arrêt du processus) est replanifiée à la lecture suivante du
+profil (avatar_urls), une fois par processus en cas d'échec.
+
+Reprise des avatars existants, et suppression des fichiers qu'aucun profil
+n'utilise plus (avatar remplacé ou retiré) : python manage.py generate_avatars
+"""
+
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+from PIL import Image, ImageOps
+
+from .models import Profile
+
+logger = logging.getLogger(__name__)
+
+AVATAR_DIR = 'avatars'
+AVATAR_SIZES = {'small': 64, 'medium': 160, 'large': 400}
+AVATAR_JPEG_QUALITY = 85
+AVATAR_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Fichiers récents jamais supprimés : l'envoi en cours n'est peut-être pas
+# encore validé (le fichier est écrit avant le commit du profil)
+AVATAR_ORPHAN_GRACE = timedelta(hours=1)
+
+
+def thumbnail_name(digest, size):
+    return f'{AVATAR_DIR}/thumbs/{digest}-{size}.jpg'
+
+
+def file_digest(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+# =============================================================================
+# ENVOI
+# =============================================================================
+
+def set_avatar(profile, upload):
+    """
+    Remplace l'avatar du profil (upload : fichier validé par ImageField,
+    ou None pour le retirer). Les miniatures manquantes sont générées en
+    arrière-plan après le commit.
+    """
+    if upload is None:
+        profile.avatar = None
+        profile.avatar_hash = ''
+        profile.avatar_ready = False
+        profile.save(update_fields=['avatar', 'avatar_hash', 'avatar_ready', 'updated_at'])
+        return
+
+    digest = file_digest(upload)
+    # Format détecté par Pillow lors de la validation, pas l'extension envoyée
+    image_format = getattr(getattr(upload, 'image', None), 'format', None) or 'img'
+    name = f'{AVATAR_DIR}/{digest}.{image_format.lower()}'
+    if not default_storage.exists(name):
+        upload.seek(0)
+        name = default_storage.save(name, upload)
+
+    ready = all(
+        default_storage.exists(thumbnail_name(digest, size))
+        for size in AVATAR_SIZES.values()
+    )
+    profile.avatar.name = name
+    profile.avatar_hash = digest
+    profile.avatar_ready = ready
+    profile.save(update_fields=['avatar', 'avatar_hash', 'avatar_ready', 'updated_at'])
+
+    if not ready:
+        transaction.on_commit(lambda: schedule_thumbnails(digest))
+
+
+# =============================================================================
+# MINIATURES
+# =============================================================================
+
+def _flatten(image):
+    """RGB, transparence posée sur fond blanc (JPEG)"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_thumbnails(digest):
+    """
+    Crée les miniatures manquantes d'un avatar et marque prêts les profils
+    qui l'utilisent. Retourne le nombre de fichiers écrits.
+    """
+    source = (
+        Profile.objects.filter(avatar_hash=digest)
+        .exclude(avatar='')
+        .values_list('avatar', flat=True)
+        .first()
+    )
+    if source is None:
+        return 0
+
+    missing = {
+        size: thumbnail_name(digest, size)
+        for size in AVATAR_SIZES.values()
+        if not default_storage.exists(thumbnail_name(digest, size))
+    }
+    if missing:
+        with default_storage.open(source, 'rb') as file:
+            image = Image.open(file)
+            # JPEG : décodage directement à l'échelle réduite (1/2, 1/4, 1/8)
+            largest = max(missing)
+            image.draft('RGB', (largest, largest))
+            image = _flatten(ImageOps.exif_transpose(image))
+
+        for size, name in sorted(missing.items(), reverse=True):
+            thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            thumbnail.save(
+                buffer, 'JPEG', quality=AVATAR_JPEG_QUALITY, optimize=True, progressive=True,
+            )
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    Profile.objects.filter(avatar_hash=digest, avatar_ready=False).update(avatar_ready=True)
+    return len(missing)
+
+
+_executor = None
+_pending = set()
+# Échecs de ce processus : pas de nouvelle tentative à la lecture (voir
+# generate_avatars)
+_failed = set()
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.AVATAR_THUMBNAIL_WORKERS,
+                thread_name_prefix='avatars',
+            )
+        return _executor
+
+
+def _generate_in_background(digest):
+    try:
+        generate_thumbnails(digest)
+    except Exception:
+        logger.exception("Miniatures de l'avatar %s impossibles à générer", digest)
+        with _lock:
+            _failed.add(digest)
+    finally:
+        with _lock:
+            _pending.discard(digest)
+        close_old_connections()
+
+
+def schedule_thumbnails(digest, retry=True):
+    """
+    Génère les miniatures dans le pool de threads (une fois par empreinte) ;
+    retry=False : pas après un échec dans ce processus
+    """
+    with _lock:
+        if digest in _pending or (not retry and digest in _failed):
+            return
+        _pending.add(digest)
+        _failed.discard(digest)
+    _get_executor().submit(_generate_in_background, digest)
+
+
+# =============================================================================
+# FICHIERS ORPHELINS
+# =============================================================================
+
+def _list_files(directory):
+    try:
+        return default_storage.listdir(directory)[1]
+    except FileNotFoundError:
+        return []
+
+
+def orphan_files(grace=AVATAR_ORPHAN_GRACE):
+    """
+    Fichiers d'avatar qu'aucun profil n'utilise : originaux remplacés ou
+    retirés, et leurs miniatures. Les fichiers de moins de grace sont gardés.
+    """
+    used_names = set(
+        Profile.objects.exclude(avatar='').exclude(avatar__isnull=True)
+        .values_list('avatar', flat=True)
+    )
+    used_thumbs = {
+        thumbnail_name(digest, size)
+        for digest in Profile.objects.exclude(avatar_hash='').values_list('avatar_hash', flat=True)
+        for size in AVATAR_SIZES.values()
+    }
+    candidates = (
+        [f'{AVATAR_DIR}/{name}' for name in _list_files(AVATAR_DIR)]
+        + [f'{AVATAR_DIR}/thumbs/{name}' for name in _list_files(f'{AVATAR_DIR}/thumbs')]
+    )
+    threshold = timezone.now() - grace
+    return [
+        name for name in candidates
+        if name not in used_names and name not in used_thumbs
+        and default_storage.get_modified_time(name) < threshold
+    ]
+
+
+# =============================================================================
+# URL ET DIFFUSION
+# =============================================================================
+
+def avatar_urls(profile, request=None):
+    """{ small, medium, large } : URL de chaque taille (None sans avatar)"""
+    if not profile.avatar:
+        return None
+    if not profile.avatar_ready and profile.avatar_hash:
+        # Génération perdue (redémarrage) : replanifiée, après le commit
+        digest = profile.avatar_hash
+        transaction.on_commit(lambda: schedule_thumbnails(digest, retry=False))
+    if profile.avatar_ready:
+        urls = {
+            name: reverse('avatar', kwargs={'digest': profile.avatar_hash, 'size': size})
+            for name, size in AVATAR_SIZES.items()
+        }
+    else:
+        urls = dict.fromkeys(AVATAR_SIZES, profile.avatar.url)
+    if request is not None:
+        urls = {name: request.build_absolute_uri(url) for name, url in urls.items()}
+    return urls
+
+
+@require_GET
+def avatar_file(request, digest, size):
+    """
+    GET /api/avatars/<empreinte>-<taille>.jpg
+
+    Contenu immuable pour une URL donnée : cache d'un an, et 304 sur
+    If-None-Match sans ouvrir le fichier.
+    """
+    size = int(size)
+    if size not in AVATAR_SIZES.values():
+        raise Http404
+    etag = f'"{digest}-{size}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        name = thumbnail_name(digest, size)
+        try:
+            file = default_storage.open(name, 'rb')
+        except FileNotFoundError:
+            raise Http404
+        response = FileResponse(file, content_type='image/jpeg')
+    response['ETag'] = etag
+    response['Cache-Control'] = AVATAR_CACHE_CONTROL
+    return response
@@ -0,0 +1,173 @@
+"""
+Requêtes groupées (POST /api/batch/)
+
+    { "requests": [
+        { "method": "GET", "path": "/api/reading-sessions/?ordering=-date" },
+        { "method": "POST", "path": "/api/my-books/12/update_progress/",
+          "body": { "pages_read": 150 } }
+      ],
+      "atomic": false }
+
+Chaque sous-requête est résolue par les URL de l'API et passée directement
+à la vue correspondante (sans repasser par les middlewares) :
+- une seule authentification, celle de la requête groupée : l'utilisateur
+  est transmis aux vues DRF (authentification forcée), le jeton n'est pas
+  décodé à nouveau ;
+- "atomic": true exécute tout dans une transaction, annulée si une
+  sous-requête répond par une erreur (statut >= 400) ;
+- une exception levée par une vue est journalisée et donne une entrée de
+  statut 500 : les autres sous-requêtes gardent leur résultat (en mode non
+  atomique, celles déjà exécutées sont validées).
+
+Réponse : { "responses": [{ status, headers, body }, ...] }, dans l'ordre
+des sous-requêtes (plus "committed" en mode atomique).
+"""
+
+import asyncio
+import io
+import json
+import logging
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.db import transaction
+from django.http import HttpRequest, QueryDict, StreamingHttpResponse
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+BATCH_PATH_PREFIX = '/api/'
+
+# En-têtes de la requête groupée qui ne concernent pas les sous-requêtes
+_REQUEST_ONLY_META = (
+    'CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE',
+)
+# Le corps des sous-réponses est intégré au JSON du lot
+_BODY_HEADERS = ('Content-Type', 'Content-Length')
+
+
+class BatchError(Exception):
+    """Sous-requête impossible à exécuter (chemin inconnu ou non autorisé)"""
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def build_subrequest(request, method, path, body=None):
+    """HttpRequest d'une sous-requête, authentifiée comme la requête groupée"""
+    url = urlsplit(path)
+    payload = b'' if body is None else json.dumps(body).encode()
+
+    subrequest = HttpRequest()
+    subrequest.method = method
+    subrequest.path = subrequest.path_info = url.path
+    subrequest.META = {
+        key: value for key, value in request.META.items()
+        if key not in _REQUEST_ONLY_META
+    }
+    subrequest.META.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+    })
+    subrequest.GET = QueryDict(url.query)
+    subrequest.COOKIES = request.COOKIES
+    subrequest._stream = io.BytesIO(payload)
+    subrequest._read_started = False
+
+    # Lu par rest_framework.request.Request : pas de nouvelle authentification
+    subrequest._force_auth_user = request.user
+    subrequest._force_auth_token = request.auth
+    return subrequest
+
+
+def dispatch(request, method, path, body=None, exclude=()):
+    """Exécute une sous-requête et retourne la réponse de la vue"""
+    url_path = urlsplit(path).path
+    if not url_path.startswith(BATCH_PATH_PREFIX):
+        raise BatchError(400, f"Chemin hors de l'API : {path}")
+    try:
+        match = resolve(url_path)
+    except Resolver404:
+        raise BatchError(404, f"Chemin inconnu : {path}")
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is not None and issubclass(view_class, tuple(exclude)):
+        raise BatchError(400, f"Chemin non autorisé dans un lot : {path}")
+
+    subrequest = build_subrequest(request, method, path, body)
+    subrequest.resolver_match = match
+    response = match.func(subrequest, *match.args, **match.kwargs)
+    if asyncio.iscoroutine(response):
+        # Vue asynchrone (ex. tableau de bord)
+        response = async_to_sync(_await)(response)
+    if isinstance(response, StreamingHttpResponse):
+        raise BatchError(400, f"Réponse en flux non disponible dans un lot : {path}")
+    return response
+
+
+async def _await(coroutine):
+    return await coroutine
+
+
+def response_entry(response):
+    """{ status, headers, body } d'une réponse de vue"""
+    if hasattr(response, 'data'):
+        body = response.data
+    elif not response.content:
+        body = None
+    elif response.get('Content-Type', '').startswith('application/json'):
+        body = json.loads(response.content)
+    else:
+        body = response.content.decode(response.charset, errors='replace')
+    return {
+        'status': response.status_code,
+        'headers': {
+            name: value for name, value in response.items()
+            if name not in _BODY_HEADERS
+        },
+        'body': body,
+    }
+
+
+def run_batch(request, subrequests, atomic=False, exclude=()):
+    """
+    Exécute les sous-requêtes dans l'ordre.
+
+    Retourne (entrées, committed) ; committed vaut None hors mode atomique.
+    """
+    entries = []
+
+    def run_one(item):
+        try:
+            # Mode atomique : un point de sauvegarde par sous-requête, pour
+            # qu'une erreur SQL n'empêche pas d'exécuter les suivantes
+            with transaction.atomic() if atomic else nullcontext():
+                response = dispatch(
+                    request, item['method'], item['path'], item.get('body'), exclude,
+                )
+        except BatchError as error:
+            return {'status': error.status, 'headers': {}, 'body': {'detail': error.detail}}
+        except Exception:
+            logger.exception("Sous-requête %s %s en échec", item['method'], item['path'])
+            return {'status': 500, 'headers': {}, 'body': {'detail': "Erreur interne du serveur."}}
+        return response_entry(response)
+
+    def run_all():
+        for item in subrequests:
+            entries.append(run_one(item))
+
+    if not atomic:
+        run_all()
+        return entries, None
+
+    with transaction.atomic():
+        run_all()
+        failed = any(entry['status'] >= 400 for entry in entries)
+        if failed:
+            transaction.set_rollback(True)
+    return entries, not failed
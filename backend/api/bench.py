@@ -0,0 +1,299 @@
+"""
+Banc de mesure des endpoints de l'API (python manage.py bench)
+
+- seed_dataset : jeu de données synthétique inséré par bulk_create
+  (utilisateurs, catalogue, bibliothèques, sessions, objectifs, listes),
+  puis compteurs dénormalisés recalculés en une fois
+- run_benchmarks : chaque endpoint est appelé via le client de test Django
+  pour un échantillon d'utilisateurs ; latences p50 / p95, nombre de
+  requêtes SQL et pic mémoire (tracemalloc, passe séparée)
+- compare_to_baseline : régressions par rapport à un résultat enregistré
+- bench_database / ensure_dataset / capture_queries : base de test, jeu de
+  données et capture des requêtes SQL (toutes bases), partagés avec
+  manage.py explain_hot_paths
+
+Le jeu de données est reproductible (graine fixe).
+"""
+
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_test_environment, teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import (
+    Author, Book, Profile, ReadingGoal, ReadingList, ReadingSession, UserBook,
+)
+from .stats import rebuild_daily_stats, rebuild_library_stats, repair_pages_read
+
+BENCH_USER_PREFIX = 'bench_'
+SEED_BATCH_SIZE = 10000
+
+# (nom, URL) appelés pour chaque utilisateur de l'échantillon
+BENCH_ENDPOINTS = [
+    ('books', '/api/books/'),
+    ('books_search', '/api/books/?search=livre 12'),
+    ('my_books', '/api/my-books/'),
+    ('my_books_cursor', '/api/my-books/?pagination=cursor'),
+    ('my_books_stats', '/api/my-books/stats/'),
+    ('goals', '/api/goals/'),
+    ('lists', '/api/lists/'),
+    ('sessions', '/api/reading-sessions/'),
+    ('sessions_summary', '/api/reading-sessions/summary/?days=30'),
+    ('sessions_analytics', '/api/reading-sessions/analytics/'),
+]
+
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _bulk_insert(model, objects, log=None):
+    count = 0
+    for batch in _batched(objects, SEED_BATCH_SIZE):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+        count += len(batch)
+    if log:
+        log(f"{model.__name__} : {count}")
+    return count
+
+
+def seed_dataset(users, books, sessions, books_per_user=50, seed=42, log=None):
+    """Insère le jeu de données synthétique (base supposée vide de données bench)"""
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    password = make_password('bench')
+    books_per_user = min(books_per_user, books)
+
+    _bulk_insert(User, (
+        User(username=f'{BENCH_USER_PREFIX}{index:07d}', password=password)
+        for index in range(users)
+    ), log)
+    user_ids = list(
+        User.objects.filter(username__startswith=BENCH_USER_PREFIX)
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    # bulk_create n'envoie pas post_save : profils créés ici
+    _bulk_insert(Profile, (Profile(user_id=user_id) for user_id in user_ids), log)
+
+    author_count = max(1, books // 10)
+    _bulk_insert(Author, (Author(name=f'Auteur {index}') for index in range(author_count)), log)
+    author_ids = list(Author.objects.order_by('pk').values_list('pk', flat=True))
+    _bulk_insert(Book, (
+        Book(
+            title=f'Livre {index}',
+            author_id=author_ids[index % len(author_ids)],
+            total_pages=rng.randint(80, 900),
+        )
+        for index in range(books)
+    ), log)
+    book_ids = list(Book.objects.order_by('pk').values_list('pk', flat=True))
+
+    _bulk_insert(UserBook, (
+        UserBook(user_id=user_id, book_id=book_id)
+        for user_id in user_ids
+        for book_id in rng.sample(book_ids, books_per_user)
+    ), log)
+    user_books = list(UserBook.objects.order_by('pk').values_list('pk', 'user_id'))
+
+    _bulk_insert(ReadingSession, (
+        ReadingSession(
+            user_book_id=user_book_id,
+            user_id=user_id,
+            date=today - timedelta(days=rng.randint(0, 364)),
+            pages_read=rng.randint(1, 40),
+            duration_minutes=rng.randint(5, 90),
+        )
+        for user_book_id, user_id in (rng.choice(user_books) for _ in range(sessions))
+    ), log)
+
+    _bulk_insert(ReadingGoal, (
+        goal
+        for user_id in user_ids
+        for goal in (
+            ReadingGoal(
+                user_id=user_id, goal_type=ReadingGoal.GoalType.PAGES,
+                period=ReadingGoal.Period.MONTHLY, target=1000,
+                start_date=today.replace(day=1), end_date=today,
+            ),
+            ReadingGoal(
+                user_id=user_id, goal_type=ReadingGoal.GoalType.BOOKS,
+                period=ReadingGoal.Period.YEARLY, target=20,
+                start_date=today.replace(month=1, day=1), end_date=today,
+            ),
+        )
+    ), log)
+
+    _bulk_insert(ReadingList, (
+        ReadingList(user_id=user_id, name=name)
+        for user_id in user_ids
+        for name in ('À lire', 'Favoris')
+    ), log)
+    Membership = ReadingList.books.through
+    user_books_by_user = {}
+    for user_book_id, user_id in UserBook.objects.values_list('pk', 'user_id').iterator():
+        user_books_by_user.setdefault(user_id, []).append(user_book_id)
+    _bulk_insert(Membership, (
+        Membership(readinglist_id=list_id, userbook_id=user_book_id)
+        for list_id, user_id in ReadingList.objects.values_list('pk', 'user_id').iterator()
+        for user_book_id in user_books_by_user.get(user_id, [])[:10]
+    ), log)
+
+    # Totaux de pages, statuts et compteurs, en quelques requêtes ensemblistes
+    with transaction.atomic():
+        repair_pages_read(user_ids)
+    rebuild_library_stats(user_ids)
+    rebuild_daily_stats(user_ids)
+    if log:
+        log("Compteurs recalculés")
+
+
+@contextmanager
+def bench_database(keepdb=False):
+    """
+    Base de test dédiée (comme manage.py test), jamais la base de
+    l'application ; conservée avec keepdb
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    # serialize=False : pas de copie sérialisée de la base (utile seulement
+    # aux TransactionTestCase avec serialized_rollback)
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb,
+    )
+    # Les réplicas lisent la base de test, comme sous manage.py test
+    for alias in settings.DATABASE_REPLICAS:
+        connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def ensure_dataset(dataset, log):
+    """Seed du jeu de données, sauf s'il existe déjà (base conservée)"""
+    if User.objects.filter(username__startswith=BENCH_USER_PREFIX).exists():
+        log("Jeu de données existant réutilisé (--keepdb).")
+        return
+    started = time.monotonic()
+    seed_dataset(**dataset, log=log)
+    log(f"Seed terminé en {time.monotonic() - started:.1f} s")
+
+
+@contextmanager
+def capture_queries():
+    """
+    Requêtes SQL exécutées dans le bloc sur toutes les bases (primaire et
+    réplicas) : liste de (alias, { sql, time }), remplie à la sortie du bloc
+    """
+    queries = []
+    with ExitStack() as stack:
+        captured = {
+            alias: stack.enter_context(CaptureQueriesContext(connections[alias]))
+            for alias in connections
+        }
+        yield queries
+    for alias, context in captured.items():
+        queries.extend((alias, query) for query in context.captured_queries)
+
+
+def bench_clients(sample_users=10):
+    """Clients de test authentifiés, pour un échantillon d'utilisateurs bench"""
+    users = list(
+        User.objects.filter(username__startswith=BENCH_USER_PREFIX).order_by('pk')
+    )
+    if not users:
+        raise ValueError("Aucun utilisateur de bench : lancer d'abord le seed.")
+    step = max(1, len(users) // sample_users)
+    return [
+        Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        for user in users[::step][:sample_users]
+    ]
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_benchmarks(requests=30, sample_users=10, endpoints=BENCH_ENDPOINTS):
+    """
+    Mesure chaque endpoint. Retourne { nom: { p50_ms, p95_ms, queries, peak_kb } }.
+    """
+    clients = bench_clients(sample_users)
+
+    cache.clear()
+    results = {}
+    for name, url in endpoints:
+        # Échauffement (caches, connexions) puis mesures
+        clients[0].get(url)
+
+        durations = []
+        queries = 0
+        for index in range(requests):
+            client = clients[index % len(clients)]
+            with capture_queries() as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                durations.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise ValueError(f"{url} : statut {response.status_code}")
+            queries = max(queries, len(captured))
+
+        # Pic mémoire mesuré à part : tracemalloc fausse les latences
+        tracemalloc.start()
+        clients[0].get(url)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[name] = {
+            'p50_ms': round(statistics.median(durations) * 1000, 2),
+            'p95_ms': round(_percentile(durations, 0.95) * 1000, 2),
+            'queries': queries,
+            'peak_kb': round(peak / 1024),
+        }
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """
+    Liste des régressions : p95 au-delà de (1 + tolerance) fois la référence,
+    ou davantage de requêtes SQL qu'en référence.
+    """
+    regressions = []
+    for name, reference in baseline.get('endpoints', baseline).items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current['queries'] > reference['queries']:
+            regressions.append(
+                f"{name} : {current['queries']} requêtes (référence {reference['queries']})"
+            )
+        if current['p95_ms'] > reference['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{name} : p95 {current['p95_ms']} ms (référence {reference['p95_ms']} ms)"
+            )
+    return regressions
@@ -0,0 +1,225 @@
+"""
+Liste noire des jetons de rafraîchissement, avec filtre de Bloom
+
+Avec ROTATE_REFRESH_TOKENS et BLACKLIST_AFTER_ROTATION, chaque appel à
+/api/token/refresh/ vérifie que le jeton présenté n'est pas dans la liste
+noire (token_blacklist de simplejwt), puis l'y ajoute. La table ne fait
+que grandir : la vérification passe d'abord par un filtre de Bloom en
+mémoire (par processus) des jetons en liste noire non expirés.
+
+- « absent » (la grande majorité des appels) : pas de requête SQL
+- « peut-être présent » : vérification en base, comme simplejwt
+
+Le filtre n'a pas de faux négatif tant qu'il est à jour :
+- un jeton mis en liste noire par ce processus y est ajouté après le commit
+- les ajouts des autres processus sont relus (id > dernier id vu) quand la
+  version partagée dans le cache Django change, et au plus tard toutes les
+  BLACKLIST_FILTER_SYNC_SECONDS secondes
+- le filtre est reconstruit toutes les BLACKLIST_FILTER_REBUILD_SECONDS
+  (jetons expirés retirés, taille ajustée)
+
+La version n'est visible des autres processus qu'avec un cache partagé
+(CACHE_BACKEND) : sans lui, un jeton remplacé sur un processus pourrait
+être rejoué sur un autre jusqu'à la relecture suivante. Avec un cache propre
+au processus (api.shared_cache), la liste noire est donc toujours vérifiée
+en base, comme avec simplejwt.
+
+Purge des jetons expirés : python manage.py prune_tokens
+"""
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework_simplejwt.serializers import TokenBlacklistSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .shared_cache import cache_is_shared
+
+VERSION_KEY = 'token_blacklist:version'
+
+
+class BloomFilter:
+    """Filtre de Bloom : bits dans un bytearray, k positions par double hachage"""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + index * second) % self.size for index in range(self.hash_count))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class BlacklistFilter:
+    """Filtre de Bloom des jti en liste noire, tenu à jour (voir le module)"""
+
+    # Les id sont attribués avant le commit : une transaction plus ancienne
+    # peut valider un id inférieur au dernier lu. La relecture repart donc
+    # un peu en arrière (ré-ajouter un jti au filtre est sans effet).
+    sync_lookback_ids = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._version = None
+        self._built_at = 0.0
+        self._synced_at = 0.0
+        self.negatives = 0
+        self.positives = 0
+        self.false_positives = 0
+
+    def rebuild(self):
+        """Reconstruit le filtre à partir des jetons en liste noire non expirés"""
+        version = cache.get(VERSION_KEY, 0)
+        last_id = BlacklistedToken.objects.aggregate(last=Max('pk'))['last'] or 0
+        rows = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        # Marge pour les ajouts jusqu'à la prochaine reconstruction
+        bloom = BloomFilter(
+            int(rows.count() * 1.5) + 1024,
+            getattr(settings, 'BLACKLIST_FILTER_ERROR_RATE', 0.001),
+        )
+        for jti in rows.values_list('token__jti', flat=True).iterator(chunk_size=10000):
+            bloom.add(jti)
+
+        now = time.monotonic()
+        with self._lock:
+            self._bloom = bloom
+            self._last_id = last_id
+            self._version = version
+            self._built_at = self._synced_at = now
+
+    def sync(self):
+        """Ajoute les jetons mis en liste noire depuis la dernière lecture"""
+        version = cache.get(VERSION_KEY, 0)
+        added = list(
+            BlacklistedToken.objects
+            .filter(pk__gt=self._last_id - self.sync_lookback_ids)
+            .values_list('pk', 'token__jti')
+        )
+        with self._lock:
+            for pk, jti in added:
+                self._bloom.add(jti)
+                self._last_id = max(self._last_id, pk)
+            self._version = version
+            self._synced_at = time.monotonic()
+
+    def add(self, jti):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        rebuild = (
+            self._bloom is None
+            or now - self._built_at > getattr(settings, 'BLACKLIST_FILTER_REBUILD_SECONDS', 300)
+        )
+        changed = cache.get(VERSION_KEY, 0) != self._version
+        sync = changed or now - self._synced_at > getattr(settings, 'BLACKLIST_FILTER_SYNC_SECONDS', 5)
+        if not (rebuild or sync):
+            return
+        # Un seul thread met à jour ; les autres gardent le filtre courant,
+        # sauf s'il n'existe pas encore ou s'il manque un ajout signalé
+        if not self._refresh_lock.acquire(blocking=self._bloom is None or changed):
+            return
+        try:
+            if self._bloom is None or rebuild:
+                self.rebuild()
+            else:
+                self.sync()
+        finally:
+            self._refresh_lock.release()
+
+    def might_contain(self, jti):
+        self.ensure_fresh()
+        with self._lock:
+            found = jti in self._bloom
+            if found:
+                self.positives += 1
+            else:
+                self.negatives += 1
+        return found
+
+    def record_false_positive(self):
+        with self._lock:
+            self.false_positives += 1
+
+    def stats(self):
+        with self._lock:
+            checks = self.negatives + self.positives
+            return {
+                'entries': self._bloom.count if self._bloom is not None else 0,
+                'size_bytes': len(self._bloom.bits) if self._bloom is not None else 0,
+                'negatives': self.negatives,
+                'positives': self.positives,
+                'false_positives': self.false_positives,
+                'skipped_db_rate': round(self.negatives / checks, 4) if checks else None,
+            }
+
+
+blacklist_filter = BlacklistFilter()
+
+
+def token_blacklisted(jti):
+    """Appelé après le commit d'un BlacklistedToken (signal dans models.py)"""
+    blacklist_filter.add(jti)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+
+def token_blacklisted_on_commit(jti):
+    transaction.on_commit(lambda: token_blacklisted(jti))
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken dont la vérification de liste noire passe par le filtre"""
+
+    def check_blacklist(self):
+        if not cache_is_shared():
+            # Ajouts des autres processus non signalés : vérification en base
+            return super().check_blacklist()
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not blacklist_filter.might_contain(jti):
+            return
+        # Lève TokenError si le jeton est bien en liste noire
+        super().check_blacklist()
+        blacklist_filter.record_false_positive()
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    """POST /api/token/refresh/ (SIMPLE_JWT['TOKEN_REFRESH_SERIALIZER'])"""
+    token_class = FilteredRefreshToken
+
+
+class FilteredTokenBlacklistSerializer(TokenBlacklistSerializer):
+    """POST /api/logout/ (SIMPLE_JWT['TOKEN_BLACKLIST_SERIALIZER'])"""
+    token_class = FilteredRefreshToken
@@ -0,0 +1,127 @@
+"""
+Cache des réponses du catalogue (livres et auteurs)
+
+Le catalogue est commun à tous les utilisateurs : les réponses GET de
+BookViewSet / AuthorViewSet (liste et détail) sont mises en cache via le
+framework de cache Django (settings.CACHES, mémoire locale ou fichiers).
+
+Invalidation par version : chaque clé contient le numéro de version du
+catalogue, incrémenté à chaque enregistrement / suppression d'un Book ou
+d'un Author (signaux dans models.py). Les anciennes entrées ne sont plus
+lues et expirent d'elles-mêmes (CATALOG_CACHE_TIMEOUT).
+
+Avec un cache propre au processus (LocMemCache), le changement de version
+n'atteint pas les autres processus : les entrées y vivent alors au plus
+LOCAL_CACHE_TIMEOUT secondes (api.shared_cache).
+
+    catalog:v12:3f5c...   → réponse sérialisée de /api/books/?page=2
+
+Les compteurs de succès / échecs sont lisibles avec
+python manage.py catalog_cache_stats.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .shared_cache import versioned_timeout
+
+VERSION_KEY = 'catalog:version'
+HITS_KEY = 'catalog:stats:hits'
+MISSES_KEY = 'catalog:stats:misses'
+
+
+def get_catalog_version():
+    """Version courante du catalogue (initialisée à 1 au premier appel)"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version():
+    """Invalide immédiatement toutes les réponses du catalogue en cache"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Clé absente (cache vidé, redémarrage) : toute valeur neuve convient
+        cache.set(VERSION_KEY, get_catalog_version() + 1, timeout=None)
+
+
+def invalidate_catalog_on_commit():
+    """
+    Invalide le cache après le commit de la transaction en cours, pour
+    qu'une requête concurrente ne remette pas en cache l'ancien état sous
+    la nouvelle version.
+    """
+    transaction.on_commit(bump_catalog_version)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_cache_stats():
+    """Retourne { hits, misses, hit_rate, version }"""
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+        'version': get_catalog_version(),
+    }
+
+
+def reset_cache_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+def response_cache_key(request):
+    """Clé de cache d'une requête GET (URL absolue : les liens de pagination en dépendent)"""
+    digest = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f'catalog:v{get_catalog_version()}:{digest}'
+
+
+class CatalogCacheMixin:
+    """
+    Met en cache les réponses list / retrieve d'un viewset du catalogue.
+
+    L'en-tête X-Cache (HIT / MISS) indique si la réponse vient du cache.
+    """
+
+    # Lectures sur le primaire (api.replicas) : juste après un changement de
+    # version, un réplica en retard remettrait l'ancien état en cache sous la
+    # nouvelle version. Une réponse servie par le cache ne lit pas la base.
+    primary_db = True
+
+    def _cached_response(self, request, handler, *args, **kwargs):
+        key = response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            _count(HITS_KEY)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count(MISSES_KEY)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, versioned_timeout(settings.CATALOG_CACHE_TIMEOUT))
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(request, super().retrieve, *args, **kwargs)
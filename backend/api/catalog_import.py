@@ -0,0 +1,223 @@
+"""
+Import en masse du catalogue (Book / Author) depuis des fichiers CSV ou JSONL
+
+Utilisé par python manage.py import_catalog. Chaque ligne contient title,
+author (nom) et total_pages ; les fichiers .gz sont décompressés au vol.
+
+- les auteurs existants sont chargés une fois dans un dictionnaire
+  nom normalisé → id ; les nouveaux sont créés par lots (bulk_create)
+- les livres sont dédoublonnés sur (titre normalisé, auteur), contre le
+  catalogue existant comme à l'intérieur des fichiers
+- les livres sont écrits par lots avec bulk_create, un lot par transaction
+
+La normalisation ignore la casse, les accents et les espaces multiples :
+« Les  Misérables » et « les miserables » sont le même livre.
+"""
+
+import codecs
+import csv
+import gzip
+import hashlib
+import json
+import unicodedata
+from pathlib import Path
+
+from django.db import transaction
+
+from .catalog_cache import bump_catalog_version
+from .models import POSITIVE_INTEGER_MAX, Author, Book
+
+CATALOG_BATCH_SIZE = 5000
+
+TITLE_MAX_LENGTH = Book._meta.get_field('title').max_length
+AUTHOR_MAX_LENGTH = Author._meta.get_field('name').max_length
+
+
+class CatalogRowError(ValueError):
+    """Ligne invalide (ignorée et comptée)"""
+
+
+class CatalogFileError(ValueError):
+    """Fichier illisible (encodage, CSV mal formé) : l'import s'arrête"""
+
+
+def normalize(value):
+    """Forme de comparaison : sans accents, en minuscules, espaces réduits"""
+    value = unicodedata.normalize('NFKD', value)
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.casefold().split())
+
+
+def book_key(normalized_title, author_id):
+    """Empreinte de 8 octets de (titre normalisé, auteur) : peu de mémoire par livre"""
+    digest = hashlib.blake2b(f'{author_id}\x00{normalized_title}'.encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), 'big')
+
+
+def open_catalog_file(path):
+    """Ouvre un fichier en binaire, décompressé s'il se termine par .gz"""
+    path = Path(path)
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rb')
+    return path.open('rb')
+
+
+def detect_format(path):
+    suffixes = [suffix for suffix in Path(path).suffixes if suffix != '.gz']
+    if suffixes and suffixes[-1] == '.csv':
+        return 'csv'
+    return 'jsonl'
+
+
+def iter_catalog_rows(stream, file_format):
+    """
+    Lignes brutes (dictionnaires) d'un fichier CSV ou JSONL. Lève
+    CatalogFileError (avec le numéro de ligne du fichier) si le fichier
+    n'est pas en UTF-8 ou si le CSV est mal formé.
+    """
+    line_number = 0
+
+    def lines():
+        nonlocal line_number
+        for line in codecs.iterdecode(stream, 'utf-8-sig'):
+            line_number += 1
+            yield line
+
+    try:
+        if file_format == 'csv':
+            yield from csv.DictReader(lines())
+            return
+        for line in lines():
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+    except UnicodeDecodeError:
+        raise CatalogFileError(f"ligne {line_number + 1} : fichier non encodé en UTF-8")
+    except csv.Error as error:
+        raise CatalogFileError(f"ligne {line_number} : CSV mal formé ({error})")
+
+
+def clean_row(row):
+    """Retourne (titre, auteur, total_pages) ou lève CatalogRowError"""
+    if not isinstance(row, dict):
+        raise CatalogRowError("ligne illisible")
+
+    title = ' '.join(str(row.get('title') or '').split())
+    author = ' '.join(str(row.get('author') or '').split())
+    if not title or not author:
+        raise CatalogRowError("titre ou auteur manquant")
+    if len(title) > TITLE_MAX_LENGTH or len(author) > AUTHOR_MAX_LENGTH:
+        raise CatalogRowError("titre ou auteur trop long")
+
+    try:
+        total_pages = int(row.get('total_pages'))
+    except (TypeError, ValueError):
+        raise CatalogRowError("total_pages invalide")
+    if total_pages <= 0:
+        raise CatalogRowError("total_pages doit être positif")
+    if total_pages > POSITIVE_INTEGER_MAX:
+        raise CatalogRowError("total_pages trop grand")
+
+    return title, author, total_pages
+
+
+class CatalogImporter:
+    """
+    Importe des lignes par lots. Les compteurs (rows, created, authors_created,
+    duplicates, errors) sont mis à jour au fil de l'import.
+
+        importer = CatalogImporter(batch_size=5000)
+        for stats in importer.run(rows):
+            ...  # un état par lot écrit (progression)
+    """
+
+    def __init__(self, batch_size=CATALOG_BATCH_SIZE, on_error=None):
+        self.batch_size = batch_size
+        self.on_error = on_error
+        self.rows = 0
+        self.created = 0
+        self.authors_created = 0
+        self.duplicates = 0
+        self.errors = 0
+        self.author_ids = {}
+        self.book_keys = set()
+
+    def load_existing(self):
+        """Charge les auteurs (nom → id) et les empreintes des livres existants"""
+        for author_id, name in Author.objects.values_list('id', 'name').iterator(chunk_size=10000):
+            self.author_ids.setdefault(normalize(name), author_id)
+        for title, author_id in Book.objects.values_list('title', 'author_id').iterator(chunk_size=10000):
+            self.book_keys.add(book_key(normalize(title), author_id))
+
+    def resolve_authors(self, names):
+        """Crée en un lot les auteurs inconnus ; names : { normalisé: nom affiché }"""
+        missing = {
+            normalized: Author(name=name)
+            for normalized, name in names.items()
+            if normalized not in self.author_ids
+        }
+        if not missing:
+            return
+        Author.objects.bulk_create(missing.values())
+        for normalized, author in missing.items():
+            self.author_ids[normalized] = author.pk
+        self.authors_created += len(missing)
+
+    def write_batch(self, batch):
+        """Écrit un lot de lignes valides [(titre, auteur, total_pages)]"""
+        # Un nom d'auteur revient souvent : normalisé une fois par lot
+        normalized_authors = {}
+        for _, author, _ in batch:
+            if author not in normalized_authors:
+                normalized_authors[author] = normalize(author)
+
+        # Nouvel auteur écrit de plusieurs façons : la première graphie l'emporte
+        names = {}
+        for author, normalized in normalized_authors.items():
+            names.setdefault(normalized, author)
+
+        with transaction.atomic():
+            self.resolve_authors(names)
+
+            books = []
+            for title, author, total_pages in batch:
+                author_id = self.author_ids[normalized_authors[author]]
+                key = book_key(normalize(title), author_id)
+                if key in self.book_keys:
+                    self.duplicates += 1
+                    continue
+                self.book_keys.add(key)
+                books.append(Book(title=title, author_id=author_id, total_pages=total_pages))
+
+            Book.objects.bulk_create(books)
+        self.created += len(books)
+
+    def run(self, rows):
+        self.load_existing()
+        batch = []
+        try:
+            for row in rows:
+                self.rows += 1
+                try:
+                    batch.append(clean_row(row))
+                except CatalogRowError as error:
+                    self.errors += 1
+                    if self.on_error:
+                        self.on_error(self.rows, error)
+                    continue
+
+                if len(batch) >= self.batch_size:
+                    self.write_batch(batch)
+                    batch = []
+                    yield self
+
+            if batch:
+                self.write_batch(batch)
+                yield self
+        finally:
+            # bulk_create ne déclenche pas les signaux : invalidation explicite
+            if self.created or self.authors_created:
+                bump_catalog_version()
@@ -0,0 +1,84 @@
+"""
+GET conditionnels (ETag / Last-Modified) sur les données de l'utilisateur
+
+Chaque utilisateur a une version de ses données (Profile.data_version et
+Profile.data_changed_at), incrémentée par les signaux de models.py à toute
+modification de ses UserBook, ReadingList, ReadingGoal ou ReadingSession,
+et explicitement après les écritures en masse (imports, réparations).
+
+Les vues list / retrieve renvoient :
+
+    ETag: "u3-v42-c7"            (utilisateur, version, version du catalogue)
+    Last-Modified: <data_changed_at>
+    Cache-Control: private, no-cache
+
+et répondent 304 à If-None-Match en une seule requête (lecture de la
+version), avant la requête principale et la sérialisation. La version du
+catalogue est incluse car les livres y sont imbriqués.
+
+If-Modified-Since seul n'est pas honoré : Last-Modified est à la seconde,
+et deux écritures dans la même seconde donneraient un 304 périmé. Seul
+l'ETag, qui change à chaque écriture, permet de valider une réponse.
+"""
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .catalog_cache import get_catalog_version
+from .models import Profile
+
+
+def bump_user_data_version(user_ids):
+    """Nouvelle version des données de ces utilisateurs (un seul UPDATE)"""
+    Profile.objects.filter(user_id__in=user_ids).update(
+        data_version=F('data_version') + 1,
+        data_changed_at=timezone.now(),
+    )
+
+
+def get_user_data_stamp(user):
+    """Retourne (etag, last_modified) de l'utilisateur, ou (None, None) sans profil"""
+    stamp = (
+        Profile.objects
+        .filter(user=user)
+        .values_list('data_version', 'data_changed_at')
+        .first()
+    )
+    if stamp is None:
+        return None, None
+    version, changed_at = stamp
+    etag = f'"u{user.pk}-v{version}-c{get_catalog_version()}"'
+    return etag, int(changed_at.timestamp())
+
+
+class ConditionalGetMixin:
+    """
+    Ajoute ETag / Last-Modified aux réponses list / retrieve d'un viewset
+    et répond 304 Not Modified si le client a déjà la version courante.
+    """
+
+    def _conditional_response(self, request, handler, *args, **kwargs):
+        etag, last_modified = get_user_data_stamp(request.user)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+
+        # Sans last_modified : If-Modified-Since ignoré (voir plus haut)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(request, super().retrieve, *args, **kwargs)
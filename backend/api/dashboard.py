@@ -0,0 +1,194 @@
+"""
+Tableau de bord en un seul appel (GET /api/dashboard/)
+
+Vue asynchrone : les blocs du tableau de bord (compteurs, livres en cours,
+objectifs en cours, sessions récentes, résumé des 30 derniers jours) sont
+lus en parallèle avec asyncio.gather. La latence est celle du bloc le plus
+lent, et non la somme des requêtes.
+
+Les méthodes asynchrones de l'ORM (aget, alist...) passent toutes par le
+même thread : chaque bloc est donc exécuté par sync_to_async dans un
+thread d'un pool propre au tableau de bord (DASHBOARD_WORKERS threads,
+conservés entre les requêtes), avec la connexion de ce thread.
+
+Le parallélisme suppose des connexions persistantes (DB_CONN_MAX_AGE > 0) :
+sinon chaque bloc ouvrirait sa connexion, ce qui coûte plus que le
+parallélisme ne fait gagner (mesuré : une connexion par bloc double la
+latence du tableau de bord, au-delà de la lecture séquentielle des cinq
+blocs). Sans connexions persistantes, les blocs sont donc lus l'un après
+l'autre, sur la connexion de la requête.
+
+L'accès passe par les contrôles de DRF (DashboardAccess) : authentification,
+DEFAULT_PERMISSION_CLASSES, DEFAULT_THROTTLE_CLASSES, et réponses d'erreur
+du gestionnaire d'exceptions (WWW-Authenticate, Retry-After).
+
+Sous ASGI (config/asgi.py) la vue tourne dans la boucle d'événements ;
+sous WSGI, Django lui ouvre une boucle dédiée, avec le même parallélisme.
+Les blocs sont lus dans des transactions distinctes : pas d'instantané
+commun garanti, ce qui suffit pour un affichage.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import APIView
+
+from .middleware import track_queries
+from .models import ReadingGoal, ReadingSession, UserBook
+from .serializers import ReadingGoalSerializer, ReadingSessionSerializer, UserBookSerializer
+from .stats import get_library_stats
+from .summary import reading_summary
+
+DASHBOARD_IN_PROGRESS = 5
+DASHBOARD_GOALS = 3
+DASHBOARD_RECENT_SESSIONS = 5
+DASHBOARD_SUMMARY_DAYS = 30
+
+
+# =============================================================================
+# BLOCS (synchrones, un thread chacun)
+# =============================================================================
+
+def library_stats_block(request):
+    return get_library_stats(request.user).as_dict()
+
+
+def in_progress_block(request):
+    queryset = (
+        UserBook.objects
+        .filter(user=request.user, status=UserBook.Status.EN_COURS)
+        .select_related('book', 'book__author')
+        .order_by('-date_added', '-id')[:DASHBOARD_IN_PROGRESS]
+    )
+    return UserBookSerializer(queryset, many=True, context={'request': request}).data
+
+
+def goals_block(request):
+    queryset = (
+        ReadingGoal.objects
+        .filter(user=request.user, end_date__gte=timezone.localdate())
+        .order_by('end_date', 'id')
+        .with_progress()[:DASHBOARD_GOALS]
+    )
+    return ReadingGoalSerializer(queryset, many=True, context={'request': request}).data
+
+
+def recent_sessions_block(request):
+    queryset = (
+        ReadingSession.objects
+        .filter(user=request.user)
+        .select_related('user_book__book')
+        .order_by('-date', '-created_at', '-id')[:DASHBOARD_RECENT_SESSIONS]
+    )
+    return ReadingSessionSerializer(queryset, many=True, context={'request': request}).data
+
+
+def summary_block(request):
+    today = timezone.localdate()
+    start = today - timedelta(days=DASHBOARD_SUMMARY_DAYS - 1)
+    return reading_summary(request.user, 'day', start, today, today)
+
+
+DASHBOARD_BLOCKS = {
+    'stats': library_stats_block,
+    'in_progress': in_progress_block,
+    'goals': goals_block,
+    'recent_sessions': recent_sessions_block,
+    'summary': summary_block,
+}
+
+
+# =============================================================================
+# VUE
+# =============================================================================
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.DASHBOARD_WORKERS,
+                thread_name_prefix='dashboard',
+            )
+        return _executor
+
+
+def _parallel_blocks():
+    """Blocs en parallèle seulement si les threads du pool gardent leur connexion"""
+    return connections[DEFAULT_DB_ALIAS].settings_dict['CONN_MAX_AGE'] != 0
+
+
+def _run_blocks(request):
+    """Tous les blocs dans le thread courant, sur sa connexion"""
+    return [block(request) for block in DASHBOARD_BLOCKS.values()]
+
+
+def _run_block(block, request):
+    """Exécute un bloc dans le thread courant puis rend sa connexion (selon CONN_MAX_AGE)"""
+    with track_queries():
+        try:
+            return block(request)
+        finally:
+            close_old_connections()
+
+
+class DashboardAccess(APIView):
+    """Contrôles d'accès de DRF (réglages par défaut) pour la vue asynchrone"""
+
+    def check(self, request):
+        """
+        Retourne (requête DRF, None) si l'accès est accordé, sinon
+        (requête DRF, réponse d'erreur rendue)
+        """
+        self.args, self.kwargs = (), {}
+        drf_request = self.initialize_request(request)
+        self.request = drf_request
+        self.headers = self.default_response_headers
+        try:
+            self.initial(drf_request)
+        except Exception as exc:
+            response = self.finalize_response(drf_request, self.handle_exception(exc))
+            return drf_request, response.render()
+        return drf_request, None
+
+
+@require_GET
+async def dashboard(request):
+    """
+    GET /api/dashboard/
+    Retourne { stats, in_progress, goals, recent_sessions, summary }
+    """
+    drf_request, error = await sync_to_async(DashboardAccess().check)(request)
+    if error is not None:
+        return error
+
+    if _parallel_blocks():
+        executor = _get_executor()
+        results = await asyncio.gather(*(
+            sync_to_async(_run_block, thread_sensitive=False, executor=executor)(block, drf_request)
+            for block in DASHBOARD_BLOCKS.values()
+        ))
+    else:
+        results = await sync_to_async(_run_blocks)(drf_request)
+    data = dict(zip(DASHBOARD_BLOCKS, results))
+    response = JsonResponse(data, encoder=JSONEncoder)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+# Utilisateur + un bloc chacun (objectifs : lecture puis progression groupée) ;
+# compteurs créés avec l'utilisateur (api.models.create_library_stats)
+dashboard.query_budget = 7
@@ -0,0 +1,134 @@
+"""
+Plans d'exécution des chemins chauds (python manage.py explain_hot_paths)
+
+Chaque endpoint de HOT_PATHS est appelé via le client de test Django, sur le
+jeu de données du bench, pour un utilisateur bench, cache vidé (les requêtes
+servies par le cache en régime établi sont donc aussi analysées) ; les blocs
+du tableau de bord sont appelés directement (la vue les exécute dans
+d'autres threads). Chaque SELECT exécuté, sur le primaire comme sur un
+réplica, est relancé sous EXPLAIN (ANALYZE, FORMAT JSON) (PostgreSQL) sur
+la même base, après un ANALYZE des tables.
+
+Sont signalés les parcours séquentiels (Seq Scan) qui écartent au moins
+min_rows lignes par leur condition : lues pour rien, elles trahissent un
+index manquant (ou inutilisable) pour la forme de la requête. Un parcours
+qui garde la plupart des lignes (terme de recherche présent partout) ou
+sans condition (COUNT(*) du catalogue) est le bon plan, pas un index
+manquant.
+"""
+
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client, RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .bench import BENCH_ENDPOINTS, BENCH_USER_PREFIX, capture_queries
+from .dashboard import DASHBOARD_BLOCKS
+from .models import UserBook
+
+# (nom, URL) : endpoints du bench et formes filtrées les plus courantes ;
+# {user_book} est remplacé par un livre de l'utilisateur
+HOT_PATHS = BENCH_ENDPOINTS + [
+    ('my_books_in_progress', '/api/my-books/?status=en_cours'),
+    ('sessions_by_book', '/api/reading-sessions/?user_book={user_book}'),
+    ('sessions_summary_year', '/api/reading-sessions/summary/?granularity=month&days=365'),
+]
+
+EXPLAIN_MIN_ROWS = 1000
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from _plan_nodes(child)
+
+
+def explain_query(sql, using=DEFAULT_DB_ALIAS):
+    """EXPLAIN ANALYZE d'une requête : (temps d'exécution en ms, nœuds du plan)"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (ANALYZE, FORMAT JSON) {sql}')
+        result = cursor.fetchone()[0]
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]['Execution Time'], list(_plan_nodes(result[0]['Plan']))
+
+
+def seq_scans(nodes, min_rows=EXPLAIN_MIN_ROWS):
+    """[{ table, rows, removed, filter }] des Seq Scan qui écartent au moins min_rows lignes"""
+    scans = []
+    for node in nodes:
+        if node['Node Type'] != 'Seq Scan':
+            continue
+        loops = node.get('Actual Loops', 1)
+        removed = node.get('Rows Removed by Filter', 0) * loops
+        if removed >= min_rows:
+            scans.append({
+                'table': node['Relation Name'],
+                'rows': node.get('Actual Rows', 0) * loops + removed,
+                'removed': removed,
+                'filter': node['Filter'],
+            })
+    return scans
+
+
+def explain_hot_paths(min_rows=EXPLAIN_MIN_ROWS, paths=HOT_PATHS):
+    """
+    Plans des SELECT de chaque endpoint. Retourne
+    { nom: { url, queries: [{ alias, sql, execution_ms, indexes, seq_scans }] } }.
+    """
+    if connection.vendor != 'postgresql':
+        raise ValueError("EXPLAIN ANALYZE : PostgreSQL uniquement.")
+    user = (
+        User.objects.filter(username__startswith=BENCH_USER_PREFIX)
+        .order_by('pk').first()
+    )
+    if user is None:
+        raise ValueError("Aucun utilisateur de bench : lancer d'abord le seed.")
+    user_book = UserBook.objects.filter(user=user).order_by('pk').first()
+    client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    with connection.cursor() as cursor:
+        # Statistiques du planificateur à jour après le seed
+        cursor.execute('ANALYZE')
+
+    results = {}
+    for name, url in paths:
+        url = url.format(user_book=user_book.pk if user_book else 0)
+        cache.clear()
+        with capture_queries() as captured:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise ValueError(f"{url} : statut {response.status_code}")
+        results[name] = {'url': url, 'queries': _explain_captured(captured, min_rows)}
+
+    for block_name, block in DASHBOARD_BLOCKS.items():
+        request = RequestFactory().get('/api/dashboard/')
+        request.user = user
+        cache.clear()
+        with capture_queries() as captured:
+            block(request)
+        results[f'dashboard.{block_name}'] = {
+            'url': f'/api/dashboard/ ({block_name})',
+            'queries': _explain_captured(captured, min_rows),
+        }
+    return results
+
+
+def _explain_captured(captured, min_rows):
+    queries = []
+    for alias, query in captured:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            continue
+        execution_ms, nodes = explain_query(sql, using=alias)
+        queries.append({
+            'alias': alias,
+            'sql': sql,
+            'execution_ms': round(execution_ms, 2),
+            'indexes': sorted({node['Index Name'] for node in nodes if 'Index Name' in node}),
+            'seq_scans': seq_scans(nodes, min_rows),
+        })
+    return queries
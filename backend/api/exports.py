@@ -0,0 +1,144 @@
+"""
+Export en flux de la bibliothèque et des sessions de lecture
+
+    GET /api/my-books/export/?output=csv
+    GET /api/reading-sessions/export/?output=ndjson&gzip=1
+
+Les lignes sont lues par paquets (queryset.values().iterator(chunk_size))
+et écrites au fil de l'eau dans une StreamingHttpResponse : la mémoire
+reste constante quelle que soit la taille de la bibliothèque, et le premier
+octet part dès le premier paquet lu.
+
+Les dates sont au format ISO 8601 ; l'export CSV des sessions peut être
+renvoyé tel quel à POST /api/reading-sessions/import/.
+"""
+
+import csv
+import json
+import zlib
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Taille visée des morceaux envoyés au client (octets)
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+USER_BOOK_EXPORT_FIELDS = {
+    'id': 'id',
+    'book_id': 'book_id',
+    'title': 'book__title',
+    'author': 'book__author__name',
+    'total_pages': 'book__total_pages',
+    'status': 'status',
+    'pages_read': 'pages_read',
+    'rating': 'rating',
+    'is_favorite': 'is_favorite',
+    'comment': 'comment',
+    'date_added': 'date_added',
+    'finished_on': 'finished_on',
+}
+
+SESSION_EXPORT_FIELDS = {
+    'id': 'id',
+    'user_book': 'user_book_id',
+    'title': 'user_book__book__title',
+    'date': 'date',
+    'pages_read': 'pages_read',
+    'duration_minutes': 'duration_minutes',
+    'notes': 'notes',
+    'created_at': 'created_at',
+}
+
+
+class _LineBuffer:
+    """Pseudo-fichier pour csv.writer : write() renvoie la ligne écrite"""
+
+    def write(self, value):
+        return value
+
+
+def _serialize(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def iter_rows(queryset, fields):
+    """Lignes { nom exporté: valeur } lues par paquets, sans instancier de modèles"""
+    names = list(fields)
+    rows = queryset.values_list(*fields.values()).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for row in rows:
+        yield dict(zip(names, map(_serialize, row)))
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow(list(fields))
+    for row in rows:
+        yield writer.writerow(['' if value is None else value for value in row.values()])
+
+
+def iter_chunks(lines, compress=False):
+    """Regroupe les lignes en morceaux d'environ EXPORT_BUFFER_SIZE (gzip en option)"""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+    buffer = []
+    size = 0
+
+    def emit(final=False):
+        data = ''.join(buffer).encode('utf-8')
+        buffer.clear()
+        if compressor is None:
+            return data
+        flush_mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return compressor.compress(data) + compressor.flush(flush_mode)
+
+    for index, line in enumerate(lines):
+        buffer.append(line)
+        size += len(line)
+        # Premier morceau envoyé sans attendre (en-tête CSV / première ligne)
+        if size >= EXPORT_BUFFER_SIZE or index == 0:
+            yield emit()
+            size = 0
+
+    last = emit(final=True)
+    if last:
+        yield last
+
+
+def export_response(request, queryset, fields, basename):
+    """
+    StreamingHttpResponse d'export selon ?output=ndjson|csv (défaut ndjson)
+    et ?gzip=1 (fichier .gz).
+    """
+    output = request.query_params.get('output', 'ndjson').lower()
+    if output not in CONTENT_TYPES:
+        raise ValidationError({'output': "Format inconnu (ndjson ou csv)."})
+    compress = request.query_params.get('gzip') in ('1', 'true')
+
+    rows = iter_rows(queryset, fields)
+    lines = iter_csv(rows, fields) if output == 'csv' else iter_ndjson(rows)
+
+    filename = f"{basename}-{timezone.localdate():%Y%m%d}.{output}"
+    if compress:
+        filename += '.gz'
+        content_type = 'application/gzip'
+    else:
+        content_type = CONTENT_TYPES[output]
+
+    response = StreamingHttpResponse(iter_chunks(lines, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    return response
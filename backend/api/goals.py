@@ -0,0 +1,60 @@
+"""
+Calcul groupé de la progression des objectifs de lecture
+
+Au lieu d'une requête agrégée par objectif (et par lecture de
+current_value / progress_percentage), tous les objectifs d'un utilisateur
+sont évalués en une seule requête d'agrégation conditionnelle sur
+l'agrégat quotidien (DailyReadingStat) :
+
+    SELECT SUM(pages_read + manual_pages) FILTER (WHERE <période objectif 1>),
+           SUM(books_finished) FILTER (WHERE <période objectif 2>),
+           ...
+    FROM api_dailyreadingstat
+    WHERE user_id = ... AND date BETWEEN <début le plus tôt> AND <fin la plus tard>
+
+Objectif de pages : pages des sessions, plus la progression saisie hors
+sessions (update_progress) au jour de la saisie.
+"""
+
+from collections import defaultdict
+
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models import DailyReadingStat, ReadingGoal
+
+
+def goal_aggregate(goal):
+    """Expression d'agrégation conditionnelle correspondant à un objectif"""
+    in_period = Q(date__gte=goal.start_date, date__lte=goal.end_date)
+    if goal.goal_type == ReadingGoal.GoalType.PAGES:
+        return Coalesce(Sum(F('pages_read') + F('manual_pages'), filter=in_period), 0)
+    return Coalesce(Sum('books_finished', filter=in_period), 0)
+
+
+def evaluate_goals(goals):
+    """
+    Calcule current_value pour une liste d'objectifs et l'attache à chaque
+    instance (attribut _current_value, lu par ReadingGoal.current_value).
+
+    Une requête par utilisateur concerné, quel que soit le nombre d'objectifs.
+    """
+    goals_by_user = defaultdict(list)
+    for goal in goals:
+        goals_by_user[goal.user_id].append(goal)
+
+    for user_id, user_goals in goals_by_user.items():
+        aggregates = {
+            f'goal_{index}': goal_aggregate(goal)
+            for index, goal in enumerate(user_goals)
+        }
+        values = DailyReadingStat.objects.filter(
+            user_id=user_id,
+            date__gte=min(goal.start_date for goal in user_goals),
+            date__lte=max(goal.end_date for goal in user_goals),
+        ).aggregate(**aggregates)
+
+        for index, goal in enumerate(user_goals):
+            goal._current_value = values[f'goal_{index}']
+
+    return goals
@@ -0,0 +1,172 @@
+"""
+Import en masse de sessions de lecture
+
+Formats acceptés par POST /api/reading-sessions/import/ :
+- application/json     : tableau d'objets
+- application/x-ndjson : un objet JSON par ligne (lu au fil de l'eau)
+- text/csv             : en-tête user_book,date,pages_read,duration_minutes,notes
+
+Les sessions sont insérées par lots avec bulk_create (sans le recalcul de
+ReadingSession.save), puis chaque UserBook touché est recalculé une seule
+fois à la fin, ainsi que les compteurs de l'utilisateur.
+
+Le texte doit être en UTF-8. Une ligne NDJSON non décodable est rapportée
+comme erreur ; en CSV (enregistrements sur plusieurs lignes possibles), une
+erreur d'encodage ou de format interrompt la lecture à cet enregistrement,
+les précédents restant importés.
+"""
+
+import codecs
+import csv
+import json
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from .models import ReadingSession, UserBook
+from .serializers import ReadingSessionImportSerializer
+from .stats import rebuild_daily_stats, rebuild_library_stats, repair_pages_read
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/ndjson')
+CSV_CONTENT_TYPES = ('text/csv',)
+
+
+ENCODING_ERROR = "Encodage invalide (UTF-8 attendu)."
+
+
+class UnreadableRow:
+    """Ligne illisible (encodage, CSV mal formé), rapportée comme erreur"""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def iter_ndjson_rows(stream):
+    """Une valeur par ligne non vide ; une ligne invalide est renvoyée telle quelle"""
+    for line in stream:
+        # Décodage ligne par ligne : une ligne invalide n'arrête pas la lecture
+        try:
+            line = line.decode('utf-8-sig').strip()
+        except UnicodeDecodeError:
+            yield UnreadableRow(ENCODING_ERROR)
+            continue
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield line
+
+
+def iter_csv_rows(stream):
+    """Lignes CSV sous forme de dictionnaires (cellules vides ignorées)"""
+    reader = csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+    try:
+        for row in reader:
+            yield {
+                key.strip(): value
+                for key, value in row.items()
+                if key and value not in ('', None)
+            }
+    except UnicodeDecodeError:
+        yield UnreadableRow(f"{ENCODING_ERROR} Import interrompu à cette ligne.")
+    except csv.Error as error:
+        yield UnreadableRow(f"CSV invalide ({error}). Import interrompu à cette ligne.")
+
+
+def iter_import_rows(request):
+    """Choisit le lecteur selon le Content-Type de la requête"""
+    content_type = (request.content_type or '').split(';')[0].strip().lower()
+    stream = request.stream or []
+
+    if content_type in NDJSON_CONTENT_TYPES:
+        return iter_ndjson_rows(stream)
+    if content_type in CSV_CONTENT_TYPES:
+        return iter_csv_rows(stream)
+
+    if not isinstance(request.data, list):
+        raise ValidationError(
+            "Le corps doit être un tableau JSON, du NDJSON ou du CSV."
+        )
+    return iter(request.data)
+
+
+def import_reading_sessions(user, rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Importe des sessions pour un utilisateur.
+
+    Les lignes invalides sont ignorées et rapportées sans interrompre
+    l'import. Retourne { created, error_count, errors: [{ row, errors }] }.
+    """
+    # Vérification de propriété : une seule requête pour tout l'import
+    owned_ids = set(
+        UserBook.objects.filter(user=user).values_list('id', flat=True)
+    )
+
+    created = 0
+    error_count = 0
+    errors = []
+    touched_ids = set()
+    batch = []
+
+    def report(index, detail):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({'row': index, 'errors': detail})
+
+    def flush():
+        nonlocal created
+        if batch:
+            with transaction.atomic():
+                ReadingSession.objects.bulk_create(batch)
+            created += len(batch)
+            batch.clear()
+
+    for index, row in enumerate(rows, start=1):
+        if isinstance(row, UnreadableRow):
+            report(index, {api_settings.NON_FIELD_ERRORS_KEY: [row.message]})
+            continue
+
+        serializer = ReadingSessionImportSerializer(data=row)
+        if not serializer.is_valid():
+            report(index, serializer.errors)
+            continue
+
+        data = serializer.validated_data
+        if data['user_book'] not in owned_ids:
+            report(index, {
+                'user_book': ["Vous ne pouvez ajouter des sessions que pour vos propres livres."]
+            })
+            continue
+
+        batch.append(ReadingSession(
+            user_book_id=data['user_book'],
+            user_id=user.pk,
+            date=data['date'],
+            pages_read=data['pages_read'],
+            duration_minutes=data.get('duration_minutes'),
+            notes=data['notes'],
+        ))
+        touched_ids.add(data['user_book'])
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+
+    # Recalcul unique des livres touchés et des compteurs de l'utilisateur
+    if touched_ids:
+        with transaction.atomic():
+            repair_pages_read(user_ids=[user.pk], user_book_ids=touched_ids)
+            rebuild_library_stats([user.pk])
+            rebuild_daily_stats([user.pk])
+
+    return {
+        'created': created,
+        'error_count': error_count,
+        'errors': errors,
+    }
@@ -0,0 +1,96 @@
+"""
+Banc de mesure des principaux endpoints sur un jeu de données synthétique.
+
+    python manage.py bench
+    python manage.py bench --users 10000 --books 200000 --sessions 5000000 --keepdb
+    python manage.py bench --output bench.json
+    python manage.py bench --baseline bench.json --tolerance 0.2
+
+Les données sont créées dans une base de test dédiée (comme manage.py test),
+jamais dans la base de l'application. --keepdb la conserve entre deux
+exécutions (le seed n'est alors fait qu'une fois).
+
+Résultat JSON : { dataset, endpoints: { nom: { p50_ms, p95_ms, queries, peak_kb } } }.
+Code de sortie non nul si une régression est détectée par rapport à --baseline.
+"""
+
+import json
+import logging
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.bench import bench_database, compare_to_baseline, ensure_dataset, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = "Mesure les latences et requêtes SQL des endpoints sur des données synthétiques"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--books', type=int, default=5000)
+        parser.add_argument('--sessions', type=int, default=50000)
+        parser.add_argument('--books-per-user', type=int, default=50)
+        parser.add_argument(
+            '--requests', type=int, default=30,
+            help="Requêtes mesurées par endpoint (défaut : 30)",
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help="Conserver la base de test (et son jeu de données) entre deux exécutions",
+        )
+        parser.add_argument('--output', help="Écrire le résultat JSON dans ce fichier")
+        parser.add_argument('--baseline', help="Résultat JSON de référence à comparer")
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help="Hausse de p95 tolérée par rapport à la référence (défaut : 0.2 = 20 %%)",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Référence illisible : {error}")
+
+        # Une ligne de log par requête mesurée : inutile ici
+        logging.getLogger('api.requests').setLevel(logging.WARNING)
+
+        with bench_database(keepdb=options['keepdb']):
+            result = self.run(options)
+
+        output = json.dumps(result, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        self.stdout.write(output)
+
+        if baseline is not None:
+            regressions = compare_to_baseline(
+                result['endpoints'], baseline, options['tolerance'],
+            )
+            if regressions:
+                for regression in regressions:
+                    self.stderr.write(regression)
+                raise CommandError(f"{len(regressions)} régression(s) détectée(s).")
+            self.stderr.write(self.style.SUCCESS("Aucune régression."))
+
+    def run(self, options):
+        dataset = {
+            'users': options['users'],
+            'books': options['books'],
+            'sessions': options['sessions'],
+            'books_per_user': options['books_per_user'],
+        }
+
+        ensure_dataset(dataset, log=self.stderr.write)
+
+        return {
+            'dataset': dataset,
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'endpoints': run_benchmarks(requests=options['requests']),
+        }
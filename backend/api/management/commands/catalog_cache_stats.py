@@ -0,0 +1,46 @@
+"""
+Affiche les compteurs du cache du catalogue (succès, échecs, taux).
+
+    python manage.py catalog_cache_stats
+    python manage.py catalog_cache_stats --reset
+    python manage.py catalog_cache_stats --invalidate
+
+Avec le cache en mémoire locale, les compteurs sont propres à chaque
+processus : utiliser un cache partagé (fichiers) pour les lire ici.
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.catalog_cache import (
+    bump_catalog_version, get_cache_stats, reset_cache_stats,
+)
+
+
+class Command(BaseCommand):
+    help = "Affiche les compteurs du cache du catalogue"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help="Remettre les compteurs à zéro après affichage",
+        )
+        parser.add_argument(
+            '--invalidate', action='store_true',
+            help="Invalider toutes les réponses en cache",
+        )
+
+    def handle(self, *args, **options):
+        stats = get_cache_stats()
+        hit_rate = stats['hit_rate']
+        self.stdout.write(
+            f"version {stats['version']} : {stats['hits']} succès, "
+            f"{stats['misses']} échecs, taux "
+            + (f"{hit_rate:.1%}" if hit_rate is not None else "n/a")
+        )
+
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Compteurs remis à zéro."))
+        if options['invalidate']:
+            bump_catalog_version()
+            self.stdout.write(self.style.SUCCESS("Cache du catalogue invalidé."))
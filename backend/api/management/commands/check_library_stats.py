@@ -0,0 +1,45 @@
+"""
+Vérifie que les compteurs LibraryStats correspondent aux UserBook.
+
+    python manage.py check_library_stats
+    python manage.py check_library_stats --fix
+
+Code de sortie non nul si des incohérences restent (utilisable en CI / cron).
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.stats import find_inconsistent_stats, rebuild_library_stats
+
+
+class Command(BaseCommand):
+    help = "Vérifie la cohérence des statistiques de bibliothèque (LibraryStats)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', type=int, dest='user_ids',
+            help="Limiter à un utilisateur (option répétable)",
+        )
+        parser.add_argument(
+            '--fix', action='store_true',
+            help="Reconstruire les lignes incohérentes",
+        )
+
+    def handle(self, *args, **options):
+        mismatches = find_inconsistent_stats(options['user_ids'])
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("Statistiques cohérentes."))
+            return
+
+        for user_id, stored, expected in mismatches:
+            self.stdout.write(f"user {user_id} : stocké={stored} attendu={expected}")
+
+        if options['fix']:
+            rebuild_library_stats([user_id for user_id, _, _ in mismatches])
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(mismatches)} ligne(s) corrigée(s)."
+            ))
+            return
+
+        raise CommandError(f"{len(mismatches)} statistique(s) incohérente(s).")
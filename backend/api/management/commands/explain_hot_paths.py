@@ -0,0 +1,83 @@
+"""
+EXPLAIN ANALYZE des requêtes des principaux endpoints (PostgreSQL).
+
+    python manage.py explain_hot_paths
+    python manage.py explain_hot_paths --users 1000 --sessions 500000 --keepdb
+    python manage.py explain_hot_paths --min-rows 5000 --output plans.json
+
+Même base de test et même jeu de données que manage.py bench (--keepdb
+réutilise le seed de l'un pour l'autre). Code de sortie non nul si un
+parcours séquentiel écarte au moins --min-rows lignes (index manquant).
+"""
+
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection
+
+from api.bench import bench_database, ensure_dataset
+from api.explain import EXPLAIN_MIN_ROWS, explain_hot_paths
+
+
+class Command(BaseCommand):
+    help = "Plans d'exécution des endpoints principaux ; signale les parcours séquentiels"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--books', type=int, default=5000)
+        parser.add_argument('--sessions', type=int, default=50000)
+        parser.add_argument('--books-per-user', type=int, default=50)
+        parser.add_argument(
+            '--min-rows', type=int, default=EXPLAIN_MIN_ROWS,
+            help=f"Seq Scan signalé à partir de ce nombre de lignes écartées (défaut : {EXPLAIN_MIN_ROWS})",
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help="Conserver la base de test (et son jeu de données) entre deux exécutions",
+        )
+        parser.add_argument('--output', help="Écrire les plans (JSON) dans ce fichier")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("EXPLAIN ANALYZE : PostgreSQL uniquement.")
+        logging.getLogger('api.requests').setLevel(logging.WARNING)
+        dataset = {
+            'users': options['users'],
+            'books': options['books'],
+            'sessions': options['sessions'],
+            'books_per_user': options['books_per_user'],
+        }
+
+        with bench_database(keepdb=options['keepdb']):
+            ensure_dataset(dataset, log=self.stderr.write)
+            try:
+                results = explain_hot_paths(min_rows=options['min_rows'])
+            except ValueError as error:
+                raise CommandError(str(error))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({'dataset': dataset, 'endpoints': results}, file, indent=2, ensure_ascii=False)
+                file.write('\n')
+
+        flagged = 0
+        for name, result in results.items():
+            queries = result['queries']
+            total = sum(query['execution_ms'] for query in queries)
+            self.stdout.write(f"{name}  {result['url']}  {len(queries)} SELECT, {total:.2f} ms")
+            for query in queries:
+                indexes = ', '.join(query['indexes']) or 'aucun index'
+                alias = f"  [{query['alias']}]" if query['alias'] != DEFAULT_DB_ALIAS else ''
+                self.stdout.write(f"    {query['execution_ms']:>8.2f} ms  {indexes}{alias}")
+                for scan in query['seq_scans']:
+                    flagged += 1
+                    self.stdout.write(self.style.WARNING(
+                        f"    Seq Scan {scan['table']} ({scan['removed']}/{scan['rows']} lignes écartées, "
+                        f"{scan['filter'][:120]}) : "
+                        f"{query['sql'][:160]}"
+                    ))
+
+        if flagged:
+            raise CommandError(f"{flagged} parcours séquentiel(s) signalé(s).")
+        self.stderr.write(self.style.SUCCESS("Aucun parcours séquentiel signalé."))
@@ -0,0 +1,74 @@
+"""
+Génère les miniatures des avatars qui n'en ont pas encore, puis supprime
+les fichiers d'avatar qu'aucun profil n'utilise plus.
+
+    python manage.py generate_avatars
+    python manage.py generate_avatars --dry-run
+
+Pour les avatars envoyés avant les miniatures, l'empreinte est calculée à
+partir du fichier stocké (le fichier n'est pas déplacé). Les miniatures
+sont générées ici, sans passer par le pool de threads.
+
+Fichiers orphelins : originaux remplacés ou retirés et leurs miniatures,
+hors fichiers de moins d'une heure (envoi en cours). À planifier (cron).
+"""
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from api.avatars import file_digest, generate_thumbnails, orphan_files
+from api.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Génère les miniatures d'avatar manquantes et supprime les fichiers orphelins"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Lister les fichiers orphelins sans rien générer ni supprimer",
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            orphans = orphan_files()
+            for name in orphans:
+                self.stdout.write(name)
+            self.stdout.write(f"{len(orphans)} fichier(s) orphelin(s).")
+            return
+
+        profiles = (
+            Profile.objects.exclude(avatar='').exclude(avatar__isnull=True)
+            .filter(avatar_ready=False)
+            .only('pk', 'avatar', 'avatar_hash')
+        )
+        digests = set()
+        missing_files = 0
+        for profile in profiles.iterator():
+            if not profile.avatar_hash:
+                try:
+                    with default_storage.open(profile.avatar.name, 'rb') as file:
+                        profile.avatar_hash = file_digest(file)
+                except FileNotFoundError:
+                    missing_files += 1
+                    self.stderr.write(f"Fichier introuvable : {profile.avatar.name}")
+                    continue
+                Profile.objects.filter(pk=profile.pk).update(avatar_hash=profile.avatar_hash)
+            digests.add(profile.avatar_hash)
+
+        written = 0
+        for digest in sorted(digests):
+            try:
+                written += generate_thumbnails(digest)
+            except OSError as error:
+                self.stderr.write(f"{digest} : {error}")
+
+        orphans = orphan_files()
+        for name in orphans:
+            default_storage.delete(name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(digests)} avatar(s) traité(s), {written} miniature(s) écrite(s), "
+            f"{len(orphans)} fichier(s) orphelin(s) supprimé(s)"
+            + (f", {missing_files} fichier(s) introuvable(s)." if missing_files else ".")
+        ))
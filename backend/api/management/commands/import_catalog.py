@@ -0,0 +1,90 @@
+"""
+Importe des livres et des auteurs dans le catalogue depuis des fichiers
+CSV ou JSONL (éventuellement .gz), par lots.
+
+    python manage.py import_catalog livres.csv
+    python manage.py import_catalog dump-1.jsonl.gz dump-2.jsonl.gz --batch-size 10000
+
+Colonnes / clés attendues : title, author, total_pages. Les doublons
+(même titre et même auteur, sans tenir compte de la casse ni des accents)
+et les lignes invalides sont ignorés et comptés. Un fichier illisible
+(encodage autre que UTF-8, CSV mal formé) arrête l'import ; les lots déjà
+écrits restent, et relancer l'import ne crée pas de doublon.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.catalog_import import (
+    CATALOG_BATCH_SIZE, CatalogFileError, CatalogImporter, detect_format,
+    iter_catalog_rows, open_catalog_file,
+)
+
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = "Importe des livres (CSV / JSONL) dans le catalogue, par lots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help="Fichiers .csv / .jsonl (.gz acceptés)")
+        parser.add_argument(
+            '--format', choices=['csv', 'jsonl'],
+            help="Format des fichiers (par défaut : d'après l'extension)",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=CATALOG_BATCH_SIZE,
+            help=f"Livres par lot / transaction (défaut : {CATALOG_BATCH_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError("--batch-size doit être positif.")
+
+        self.position = None
+        self.reported_errors = 0
+        importer = CatalogImporter(
+            batch_size=options['batch_size'], on_error=self.report_error,
+        )
+
+        started = time.monotonic()
+        rows = self.iter_files(options['files'], options['format'])
+        for stats in importer.run(rows):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"{stats.rows} lignes lues, {stats.created} livres créés, "
+                f"{stats.duplicates} doublons, {stats.errors} erreurs "
+                f"({stats.rows / elapsed:,.0f} lignes/s)"
+            )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Import terminé en {elapsed:.1f} s : {importer.created} livres et "
+            f"{importer.authors_created} auteurs créés, {importer.duplicates} doublons, "
+            f"{importer.errors} lignes invalides "
+            f"({importer.rows / elapsed if elapsed else 0:,.0f} lignes/s)."
+        ))
+
+    def iter_files(self, paths, file_format):
+        for path in paths:
+            try:
+                stream = open_catalog_file(path)
+            except OSError as error:
+                raise CommandError(f"{path} : {error}")
+            with stream:
+                rows = iter_catalog_rows(stream, file_format or detect_format(path))
+                try:
+                    for line, row in enumerate(rows, start=1):
+                        self.position = (path, line)
+                        yield row
+                except CatalogFileError as error:
+                    raise CommandError(f"{path}, {error}")
+
+    def report_error(self, index, error):
+        self.reported_errors += 1
+        if self.reported_errors <= MAX_REPORTED_ERRORS:
+            path, line = self.position
+            self.stderr.write(f"{path}, ligne {line} : {error}")
+        elif self.reported_errors == MAX_REPORTED_ERRORS + 1:
+            self.stderr.write("(erreurs suivantes non affichées)")
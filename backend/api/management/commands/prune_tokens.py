@@ -0,0 +1,62 @@
+"""
+Supprime les jetons de rafraîchissement expirés (et leur entrée de liste
+noire), par lots.
+
+    python manage.py prune_tokens
+    python manage.py prune_tokens --batch-size 5000 --dry-run
+
+Un jeton expiré est refusé sans consulter la liste noire : ses lignes
+OutstandingToken / BlacklistedToken ne servent plus. À planifier (cron)
+pour que les tables restent à la taille des jetons encore valides.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = "Supprime par lots les jetons expirés (OutstandingToken et BlacklistedToken)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help="Jetons supprimés par transaction (défaut : 10000)",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Compter sans supprimer",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = OutstandingToken.objects.filter(expires_at__lte=now)
+
+        if options['dry_run']:
+            self.stdout.write(
+                f"{expired.count()} jeton(s) expiré(s), dont "
+                f"{BlacklistedToken.objects.filter(token__expires_at__lte=now).count()} en liste noire."
+            )
+            return
+
+        outstanding = blacklisted = 0
+        last_pk = 0
+        while True:
+            # Parcours par clé primaire : les jetons les plus anciens
+            # (expirés les premiers) sont en tête
+            batch = list(
+                expired.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+            with transaction.atomic():
+                blacklisted += BlacklistedToken.objects.filter(token_id__in=batch).delete()[0]
+                outstanding += OutstandingToken.objects.filter(pk__in=batch).delete()[0]
+            self.stderr.write(f"… {outstanding} jeton(s) supprimé(s)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{outstanding} jeton(s) expiré(s) supprimé(s), dont {blacklisted} en liste noire."
+        ))
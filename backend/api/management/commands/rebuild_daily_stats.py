@@ -0,0 +1,33 @@
+"""
+Reconstruit l'agrégat quotidien DailyReadingStat à partir des sessions de
+lecture et des livres terminés.
+
+    python manage.py rebuild_daily_stats
+    python manage.py rebuild_daily_stats --user 3
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Recalcule l'agrégat quotidien de lecture (DailyReadingStat)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', type=int, dest='user_ids',
+            help="Limiter à un utilisateur (option répétable)",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help="Nombre d'utilisateurs traités par transaction",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_daily_stats(
+            options['user_ids'], batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{written} ligne(s) DailyReadingStat reconstruite(s)."
+        ))
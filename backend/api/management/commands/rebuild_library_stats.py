@@ -0,0 +1,32 @@
+"""
+Reconstruit les compteurs LibraryStats à partir des UserBook.
+
+    python manage.py rebuild_library_stats
+    python manage.py rebuild_library_stats --user 3 --user 7
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.stats import rebuild_library_stats
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques de bibliothèque (LibraryStats)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', type=int, dest='user_ids',
+            help="Limiter à un utilisateur (option répétable)",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Nombre d'utilisateurs traités par requête",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_library_stats(
+            options['user_ids'], batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{written} ligne(s) LibraryStats reconstruite(s)."
+        ))
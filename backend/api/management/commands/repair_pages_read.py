@@ -0,0 +1,34 @@
+"""
+Recalcule le total des pages lues (UserBook.session_pages / pages_read) à
+partir des sessions de lecture, en une requête UPDATE ensembliste, puis
+reconstruit les compteurs des utilisateurs concernés.
+
+    python manage.py repair_pages_read
+    python manage.py repair_pages_read --user 3
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.stats import rebuild_daily_stats, rebuild_library_stats, repair_pages_read
+
+
+class Command(BaseCommand):
+    help = "Recalcule pages_read des livres à partir de leurs sessions de lecture"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', type=int, dest='user_ids',
+            help="Limiter à un utilisateur (option répétable)",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            affected_users = repair_pages_read(options['user_ids'])
+            if affected_users:
+                rebuild_library_stats(affected_users)
+                rebuild_daily_stats(affected_users)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Totaux corrigés pour {len(affected_users)} utilisateur(s)."
+        ))
@@ -0,0 +1,269 @@
+"""
+Mesures par requête : requêtes SQL, temps SQL, sérialisation, vue
+
+RequestMetricsMiddleware relève pour chaque requête :
+- le nombre de requêtes SQL et leur durée totale (execute_wrapper)
+- le temps passé dans serializer.data (sérialisation DRF)
+- le temps de la vue (rendu compris) et le temps total
+
+et les renvoie dans l'en-tête Server-Timing (visible dans les outils de
+développement du navigateur) ainsi que dans une ligne de log JSON
+(logger « api.requests ») :
+
+    Server-Timing: db;dur=4.1;desc="6 queries", serialize;dur=2.3, view;dur=9.8, total;dur=10.4
+
+Le résultat du cache des utilisateurs (authentification JWT) y figure
+aussi : auth;desc="hit" ou "miss".
+Avec plusieurs bases (réplicas), le log donne le nombre de requêtes par
+alias (champ databases).
+
+Une requête SQL identique répétée REQUEST_METRICS_REPEAT_THRESHOLD fois ou
+plus (même texte, paramètres exclus) est signalée comme N+1 probable.
+
+Budget de requêtes : une vue peut déclarer query_budget (un entier, ou un
+dictionnaire par action : {'list': 4, 'stats': 2}). En mode strict
+(REQUEST_METRICS_STRICT, à activer dans les tests), un dépassement de
+budget ou un N+1 lève QueryBudgetExceeded ; sinon ils sont journalisés.
+
+Réponses en flux (StreamingHttpResponse, exports) : les requêtes SQL sont
+exécutées pendant la lecture du flux, après le retour de la vue. Elles sont
+comptées au fil des morceaux ; le budget est vérifié et la ligne de log
+écrite à la fin du flux. L'en-tête Server-Timing, envoyé avant le premier
+morceau, ne couvre que le temps jusqu'au début du flux.
+
+Les requêtes sans problème sont journalisées au niveau INFO, les problèmes
+au niveau WARNING (REQUEST_LOG_LEVEL, WARNING par défaut pendant les tests).
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+logger = logging.getLogger('api.requests')
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Budget de requêtes dépassé ou N+1 détecté (mode strict)"""
+
+
+class RequestMetrics:
+    """Compteurs d'une requête"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.view_started = None
+        self.view_time = 0.0
+        self.statements = Counter()
+        # Requêtes par base (alias), utile avec des réplicas
+        self.databases = Counter()
+        self.view_name = None
+        self.query_budget = None
+        # 'hit' / 'miss' du cache des utilisateurs (api.authentication)
+        self.auth_cache = None
+        # Une vue peut répartir ses requêtes sur plusieurs threads (track_queries)
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper : chronomètre chaque requête SQL"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.db_time += elapsed
+                self.queries += 1
+                self.statements[sql] += 1
+                self.databases[context['connection'].alias] += 1
+
+    def repeated_queries(self, threshold):
+        """[(nombre, sql)] des requêtes identiques répétées au moins threshold fois"""
+        return [
+            (count, sql)
+            for sql, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+def _timed_data(data_property):
+    """Enveloppe serializer.data pour mesurer la sérialisation (niveau le plus haut)"""
+
+    def data(self):
+        metrics = _current_metrics.get()
+        if metrics is None or getattr(self, '_timed', False):
+            return data_property.fget(self)
+        self._timed = True
+        started = time.perf_counter()
+        try:
+            return data_property.fget(self)
+        finally:
+            metrics.serialize_time += time.perf_counter() - started
+            self._timed = False
+
+    return property(data)
+
+
+def instrument_serializers():
+    """Installe la mesure du temps de sérialisation (appelé une fois par ApiConfig.ready)"""
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(serializer_class, '_metrics_installed', False):
+            serializer_class.data = _timed_data(serializer_class.data)
+            serializer_class._metrics_installed = True
+
+
+def get_current_metrics():
+    """Mesures de la requête en cours (None hors requête ou mesures désactivées)"""
+    return _current_metrics.get()
+
+
+@contextmanager
+def _measure(metrics):
+    """Mesures actives pour le thread courant : variable de contexte et execute_wrapper"""
+    token = _current_metrics.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield
+    finally:
+        _current_metrics.reset(token)
+
+
+@contextmanager
+def track_queries():
+    """
+    Compte les requêtes SQL du thread courant dans les mesures de la requête
+    en cours (pour le travail qu'une vue confie à d'autres threads)
+    """
+    metrics = _current_metrics.get()
+    with ExitStack() as stack:
+        if metrics is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+        yield
+
+
+def _query_budget(view_func, request):
+    """Budget déclaré par la vue (attribut query_budget), pour l'action courante"""
+    view_class = getattr(view_func, 'cls', view_func)
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        actions = getattr(view_func, 'actions', None) or {}
+        return budget.get(actions.get(request.method.lower()))
+    return budget
+
+
+class RequestMetricsMiddleware:
+    """Voir la documentation du module"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.strict = getattr(settings, 'REQUEST_METRICS_STRICT', False)
+        self.repeat_threshold = getattr(settings, 'REQUEST_METRICS_REPEAT_THRESHOLD', 5)
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        started = time.perf_counter()
+        with _measure(metrics):
+            response = self.get_response(request)
+
+        total_time = time.perf_counter() - started
+        if metrics.view_started is not None:
+            metrics.view_time = time.perf_counter() - metrics.view_started
+
+        timings = [
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+            f'serialize;dur={metrics.serialize_time * 1000:.1f}',
+            f'view;dur={metrics.view_time * 1000:.1f}',
+            f'total;dur={total_time * 1000:.1f}',
+        ]
+        if metrics.auth_cache is not None:
+            timings.append(f'auth;desc="{metrics.auth_cache}"')
+        response['Server-Timing'] = ', '.join(timings)
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.measured_stream(
+                request, response, response.streaming_content, metrics, started,
+            )
+        else:
+            self.check_and_log(request, response, metrics, total_time)
+        return response
+
+    def measured_stream(self, request, response, content, metrics, started):
+        """Flux de la réponse, requêtes comptées ; contrôle et log à la fin du flux"""
+        chunks = iter(content)
+        while True:
+            # Mesures actives le temps de produire un morceau seulement : le
+            # code qui lit le flux entre deux morceaux n'est pas compté
+            with _measure(metrics):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+        self.check_and_log(request, response, metrics, time.perf_counter() - started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            metrics.view_name = f'{view_func.__module__}.{view_func.__name__}'
+            metrics.query_budget = _query_budget(view_func, request)
+            metrics.view_started = time.perf_counter()
+
+    def check_and_log(self, request, response, metrics, total_time):
+        problems = []
+        repeated = metrics.repeated_queries(self.repeat_threshold)
+        if repeated:
+            problems.append(
+                f"requête répétée {repeated[0][0]} fois (N+1 probable) : {repeated[0][1][:200]}"
+            )
+        if metrics.query_budget is not None and metrics.queries > metrics.query_budget:
+            problems.append(
+                f"{metrics.queries} requêtes SQL pour un budget de {metrics.query_budget}"
+            )
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'view': metrics.view_name,
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_time * 1000, 1),
+            'serialize_ms': round(metrics.serialize_time * 1000, 1),
+            'view_ms': round(metrics.view_time * 1000, 1),
+            'total_ms': round(total_time * 1000, 1),
+        }
+        if response.streaming:
+            record['streaming'] = True
+        if metrics.query_budget is not None:
+            record['query_budget'] = metrics.query_budget
+        if metrics.auth_cache is not None:
+            record['auth_cache'] = metrics.auth_cache
+        if len(settings.DATABASES) > 1:
+            record['databases'] = dict(metrics.databases)
+        if repeated:
+            record['repeated_queries'] = [
+                {'count': count, 'sql': sql[:200]} for count, sql in repeated
+            ]
+
+        level = logging.WARNING if problems else logging.INFO
+        logger.log(level, json.dumps(record, ensure_ascii=False))
+
+        if problems and self.strict:
+            raise QueryBudgetExceeded(
+                f"{request.method} {request.path} : " + " ; ".join(problems)
+            )
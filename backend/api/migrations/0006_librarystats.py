@@ -0,0 +1,54 @@
+# Generated by Django 5.0 on 2026-10-18 01:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_library_stats(apps, schema_editor):
+    """Initialise les compteurs pour les bibliothèques existantes"""
+    UserBook = apps.get_model('api', 'UserBook')
+    LibraryStats = apps.get_model('api', 'LibraryStats')
+
+    rows = (
+        UserBook.objects
+        .values('user_id')
+        .annotate(
+            total=Count('id'),
+            lu=Count('id', filter=Q(status='lu')),
+            en_cours=Count('id', filter=Q(status='en_cours')),
+            non_lu=Count('id', filter=Q(status='non_lu')),
+            pages_read=Coalesce(Sum('pages_read'), 0),
+        )
+        .order_by()
+    )
+    LibraryStats.objects.bulk_create(
+        [LibraryStats(**row) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_userbook_is_favorite_userbook_rating'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='library_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('lu', models.PositiveIntegerField(default=0)),
+                ('en_cours', models.PositiveIntegerField(default=0)),
+                ('non_lu', models.PositiveIntegerField(default=0)),
+                ('pages_read', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_library_stats, migrations.RunPython.noop),
+    ]
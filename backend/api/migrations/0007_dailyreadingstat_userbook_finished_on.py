@@ -0,0 +1,96 @@
+# Generated by Django 5.0 on 2026-10-18 01:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_daily_stats(apps, schema_editor):
+    """
+    Renseigne finished_on des livres déjà lus (date de la dernière session,
+    à défaut date d'ajout) puis construit l'agrégat quotidien.
+    """
+    UserBook = apps.get_model('api', 'UserBook')
+    ReadingSession = apps.get_model('api', 'ReadingSession')
+    DailyReadingStat = apps.get_model('api', 'DailyReadingStat')
+
+    last_session = (
+        ReadingSession.objects
+        .filter(user_book=OuterRef('pk'))
+        .values('user_book')
+        .annotate(last=Max('date'))
+        .values('last')
+    )
+    UserBook.objects.filter(status='lu').update(
+        finished_on=Coalesce(Subquery(last_session), TruncDate('date_added'))
+    )
+
+    rows = {}
+    sessions = (
+        ReadingSession.objects
+        .values('user_book__user_id', 'date')
+        .annotate(
+            pages=Sum('pages_read'),
+            minutes=Coalesce(Sum('duration_minutes'), 0),
+            count=Count('id'),
+        )
+        .order_by()
+    )
+    for row in sessions:
+        key = (row['user_book__user_id'], row['date'])
+        rows[key] = DailyReadingStat(
+            user_id=key[0], date=key[1],
+            pages_read=row['pages'],
+            minutes=row['minutes'],
+            sessions_count=row['count'],
+        )
+
+    finished = (
+        UserBook.objects
+        .filter(finished_on__isnull=False)
+        .values('user_id', 'finished_on')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for row in finished:
+        key = (row['user_id'], row['finished_on'])
+        if key not in rows:
+            rows[key] = DailyReadingStat(user_id=key[0], date=key[1])
+        rows[key].books_finished = row['count']
+
+    DailyReadingStat.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_librarystats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userbook',
+            name='finished_on',
+            field=models.DateField(blank=True, help_text='Date à laquelle le livre a été terminé', null=True),
+        ),
+        migrations.CreateModel(
+            name='DailyReadingStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('pages_read', models.PositiveIntegerField(default=0)),
+                ('minutes', models.PositiveIntegerField(default=0)),
+                ('sessions_count', models.PositiveIntegerField(default=0)),
+                ('books_finished', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0 on 2026-10-18 01:37
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_session_pages(apps, schema_editor):
+    """Initialise session_pages en une seule requête UPDATE"""
+    UserBook = apps.get_model('api', 'UserBook')
+    ReadingSession = apps.get_model('api', 'ReadingSession')
+
+    session_total = (
+        ReadingSession.objects
+        .filter(user_book=OuterRef('pk'))
+        .values('user_book')
+        .annotate(total=Sum('pages_read'))
+        .values('total')
+    )
+    UserBook.objects.update(session_pages=Coalesce(Subquery(session_total), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_dailyreadingstat_userbook_finished_on'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userbook',
+            name='session_pages',
+            field=models.PositiveIntegerField(default=0, help_text='Somme brute des pages des sessions de lecture'),
+        ),
+        migrations.RunPython(backfill_session_pages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.0 on 2026-10-18 01:39
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations, models
+
+
+# Recherche du catalogue (PostgreSQL uniquement ; ignoré sous SQLite)
+#
+# - search_vector : tsvector 'french' du titre (poids A) et de l'auteur (poids B),
+#   sans accents, indexé en GIN pour la recherche plein texte
+# - search_text   : "titre auteur" en minuscules sans accents, indexé en GIN
+#   trigrammes pour tolérer les fautes de frappe
+#
+# Les deux colonnes sont maintenues par trigger, y compris pour les
+# bulk_create / update() qui ne passent pas par Book.save().
+CREATE_SEARCH_SQL = """
+CREATE OR REPLACE FUNCTION api_book_search_update() RETURNS trigger AS $$
+DECLARE
+    author_name text;
+BEGIN
+    SELECT name INTO author_name FROM api_author WHERE id = NEW.author_id;
+    NEW.search_vector :=
+        setweight(to_tsvector('french', unaccent(coalesce(NEW.title, ''))), 'A') ||
+        setweight(to_tsvector('french', unaccent(coalesce(author_name, ''))), 'B');
+    NEW.search_text := lower(unaccent(coalesce(NEW.title, '') || ' ' || coalesce(author_name, '')));
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER api_book_search_update
+    BEFORE INSERT OR UPDATE ON api_book
+    FOR EACH ROW EXECUTE FUNCTION api_book_search_update();
+
+CREATE OR REPLACE FUNCTION api_author_search_update() RETURNS trigger AS $$
+BEGIN
+    -- Réécrit les livres de l'auteur pour relancer api_book_search_update
+    UPDATE api_book SET author_id = author_id WHERE author_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER api_author_search_update
+    AFTER UPDATE OF name ON api_author
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION api_author_search_update();
+
+CREATE INDEX api_book_search_vector_gin ON api_book USING gin (search_vector);
+CREATE INDEX api_book_search_text_trgm ON api_book USING gin (search_text gin_trgm_ops);
+
+UPDATE api_book SET author_id = author_id;
+"""
+
+DROP_SEARCH_SQL = """
+DROP INDEX IF EXISTS api_book_search_text_trgm;
+DROP INDEX IF EXISTS api_book_search_vector_gin;
+DROP TRIGGER IF EXISTS api_author_search_update ON api_author;
+DROP FUNCTION IF EXISTS api_author_search_update();
+DROP TRIGGER IF EXISTS api_book_search_update ON api_book;
+DROP FUNCTION IF EXISTS api_book_search_update();
+"""
+
+
+def create_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SEARCH_SQL, params=None)
+
+
+def drop_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_SQL, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_userbook_session_pages'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='book',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_objects, drop_search_objects),
+    ]
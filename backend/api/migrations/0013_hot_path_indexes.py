@@ -0,0 +1,41 @@
+# Generated by Django 5.0 on 2026-10-18 02:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_profile_avatar_thumbnails'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Nouveaux index d'abord, puis suppression des index simples sur les
+        # clés étrangères, couverts par un index composite (même préfixe)
+        migrations.AddIndex(
+            model_name='readingsession',
+            index=models.Index(fields=['user_book', 'date'], name='session_userbook_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userbook',
+            index=models.Index(condition=models.Q(('status', 'en_cours')), fields=['user', 'date_added', 'id'], name='userbook_in_progress_idx'),
+        ),
+        migrations.AlterField(
+            model_name='dailyreadingstat',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='readingsession',
+            name='user_book',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reading_sessions', to='api.userbook'),
+        ),
+        migrations.AlterField(
+            model_name='userbook',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='user_books', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0 on 2026-10-18 02:40
+
+from django.db import migrations, transaction
+from django.db.models import Max, Min, OuterRef, Subquery
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def backfill_session_user(apps, schema_editor):
+    """
+    Renseigne ReadingSession.user à partir du UserBook, par tranches d'id :
+    une transaction courte par tranche (pas de verrou sur toute la table)
+    """
+    UserBook = apps.get_model('api', 'UserBook')
+    ReadingSession = apps.get_model('api', 'ReadingSession')
+
+    bounds = ReadingSession.objects.aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return
+    owner = UserBook.objects.filter(pk=OuterRef('user_book_id')).values('user_id')[:1]
+    for start in range(bounds['first'], bounds['last'] + 1, BACKFILL_BATCH_SIZE):
+        with transaction.atomic():
+            ReadingSession.objects.filter(
+                pk__gte=start, pk__lt=start + BACKFILL_BATCH_SIZE, user__isnull=True,
+            ).update(user_id=Subquery(owner))
+
+
+class Migration(migrations.Migration):
+
+    # Une transaction par tranche (voir backfill_session_user)
+    atomic = False
+
+    dependencies = [
+        ('api', '0014_readingsession_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_session_user, migrations.RunPython.noop),
+    ]
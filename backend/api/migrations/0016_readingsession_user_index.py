@@ -0,0 +1,31 @@
+# Generated by Django 5.0 on 2026-10-18 02:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_backfill_readingsession_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='readingsession',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reading_sessions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='readingsession',
+            index=models.Index(fields=['user', 'date', 'created_at', 'id'], name='session_user_date_idx'),
+        ),
+        # Remplacé par session_user_date_idx : les sessions sont toujours
+        # lues pour un utilisateur
+        migrations.RemoveIndex(
+            model_name='readingsession',
+            name='session_date_created_idx',
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.0 on 2026-10-18 02:48
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import TruncDate
+
+
+def backfill_manual_pages(apps, schema_editor):
+    """
+    Progression saisie hors sessions des livres existants (pages_read au-delà
+    de session_pages), sans date connue : comptée à la date d'ajout du livre,
+    comme le faisaient les objectifs avant l'agrégat quotidien.
+    """
+    UserBook = apps.get_model('api', 'UserBook')
+    DailyReadingStat = apps.get_model('api', 'DailyReadingStat')
+
+    manual = {}
+    surplus = (
+        UserBook.objects
+        .filter(pages_read__gt=F('session_pages'))
+        .annotate(day=TruncDate('date_added'))
+        .values_list('user_id', 'day', 'pages_read', 'session_pages')
+    )
+    for user_id, day, pages_read, session_pages in surplus.iterator():
+        manual[(user_id, day)] = manual.get((user_id, day), 0) + pages_read - session_pages
+
+    existing = {
+        (row.user_id, row.date): row
+        for row in DailyReadingStat.objects.filter(
+            user_id__in={user_id for user_id, _ in manual}
+        )
+    }
+    updated, created = [], []
+    for (user_id, day), pages in manual.items():
+        row = existing.get((user_id, day))
+        if row is None:
+            created.append(DailyReadingStat(user_id=user_id, date=day, manual_pages=pages))
+        else:
+            row.manual_pages = pages
+            updated.append(row)
+    DailyReadingStat.objects.bulk_update(updated, ['manual_pages'], batch_size=1000)
+    DailyReadingStat.objects.bulk_create(created, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_readingsession_user_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyreadingstat',
+            name='manual_pages',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_manual_pages, migrations.RunPython.noop),
+    ]
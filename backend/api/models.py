@@ -1,9 +1,15 @@
 # backend/api/models.py
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.db.models import Sum
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
+
+# Valeur maximale d'un PositiveIntegerField (colonne integer de PostgreSQL) :
+# borne des validations faites sans ModelSerializer (imports en masse)
+POSITIVE_INTEGER_MAX = 2147483647
 
 
 class Author(models.Model):
@@ -19,6 +25,17 @@ class Book(models.Model):
     title = models.CharField(max_length=255)
     author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='books')
     total_pages = models.PositiveIntegerField()
+
+    # Recherche : maintenus par trigger PostgreSQL (migration 0009), à partir
+    # du titre et du nom de l'auteur, sans accents
+    search_vector = SearchVectorField(null=True, editable=False)
+    search_text = models.TextField(blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            # Pagination par curseur du catalogue (title, id)
+            models.Index(fields=['title', 'id'], name='book_title_id_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -32,7 +49,10 @@ class UserBook(models.Model):
         EN_COURS = 'en_cours', 'En cours'
         LU = 'lu', 'Lu'
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='user_books')
+    # Pas d'index propre : (user, book) et (user, date_added, id) commencent par user
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='user_books', db_index=False,
+    )
     book = models.ForeignKey(Book, on_delete=models.CASCADE)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.NON_LU)
     pages_read = models.PositiveIntegerField(default=0)
@@ -46,18 +66,94 @@ class UserBook(models.Model):
         blank=True,
         help_text="Note de 1 à 5"
     )
+    finished_on = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Date à laquelle le livre a été terminé"
+    )
+    session_pages = models.PositiveIntegerField(
+        default=0,
+        help_text="Somme brute des pages des sessions de lecture"
+    )
     
     class Meta:
         unique_together = ['user', 'book']
-    
-    def save(self, *args, **kwargs):
-        # Mise à jour automatique du statut
+        indexes = [
+            # Pagination par curseur de la bibliothèque (user, date_added, id)
+            models.Index(fields=['user', 'date_added', 'id'], name='userbook_user_added_idx'),
+            # Livres en cours (tableau de bord, ?status=en_cours), les plus récents d'abord
+            models.Index(
+                fields=['user', 'date_added', 'id'],
+                condition=models.Q(status='en_cours'),
+                name='userbook_in_progress_idx',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_stats_state()
+        return instance
+
+    def _remember_stats_state(self):
+        """
+        Mémorise (status, pages_read) et finished_on tels qu'ils sont en base,
+        pour que LibraryStats et DailyReadingStat puissent être mis à jour par
+        différence.
+        """
+        self._stats_state = (
+            self.__dict__.get('status'),
+            self.__dict__.get('pages_read'),
+        )
+        self._finished_on_state = self.__dict__.get('finished_on')
+
+    def refresh_status(self, on_date=None):
+        """
+        Met à jour le statut (et la date de fin) selon pages_read.
+
+        on_date : date de la lecture qui termine le livre (aujourd'hui par
+        défaut), conservée dans finished_on tant que le livre reste 'lu'.
+        """
         if self.pages_read >= self.book.total_pages:
             self.status = self.Status.LU
             self.pages_read = self.book.total_pages
         elif self.pages_read > 0:
             self.status = self.Status.EN_COURS
+
+        if self.status != self.Status.LU:
+            self.finished_on = None
+        elif self.finished_on is None:
+            self.finished_on = on_date or timezone.localdate()
+    
+    def save(self, *args, **kwargs):
+        # Mise à jour automatique du statut
+        self.refresh_status()
         super().save(*args, **kwargs)
+
+    @classmethod
+    def add_session_pages(cls, user_book_id, delta, on_date=None):
+        """
+        Répercute une différence de pages de sessions sur un UserBook.
+
+        La ligne est verrouillée (SELECT ... FOR UPDATE) le temps de
+        l'écriture : deux sessions enregistrées en même temps pour le même
+        livre s'appliquent l'une après l'autre. Seules les colonnes
+        concernées sont écrites. Retourne le UserBook mis à jour.
+        """
+        with transaction.atomic():
+            user_book = (
+                cls.objects
+                .select_related('book')
+                .select_for_update(of=('self',))
+                .get(pk=user_book_id)
+            )
+            user_book.session_pages = max(0, user_book.session_pages + delta)
+            user_book.pages_read = user_book.session_pages
+            user_book.refresh_status(on_date=on_date)
+            user_book.save(update_fields=[
+                'session_pages', 'pages_read', 'status', 'finished_on',
+            ])
+        return user_book
     
     @property
     def progress(self):
@@ -66,6 +162,76 @@ class UserBook(models.Model):
         return 0
 
 
+class LibraryStats(models.Model):
+    """
+    Compteurs de la bibliothèque d'un utilisateur.
+
+    Maintenus par différence à chaque save/delete de UserBook (voir les
+    signaux plus bas), pour que /api/my-books/stats/ soit une simple lecture
+    par clé primaire. Reconstruction : manage.py rebuild_library_stats.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='library_stats'
+    )
+    total = models.PositiveIntegerField(default=0)
+    lu = models.PositiveIntegerField(default=0)
+    en_cours = models.PositiveIntegerField(default=0)
+    non_lu = models.PositiveIntegerField(default=0)
+    pages_read = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Statistiques de {self.user_id}"
+
+    def as_dict(self):
+        """Format historique de GET /api/my-books/stats/"""
+        return {
+            'total': self.total,
+            'lu': self.lu,
+            'en_cours': self.en_cours,
+            'non_lu': self.non_lu,
+            'pages_lues': self.pages_read,
+        }
+
+
+class ReadingGoalQuerySet(models.QuerySet):
+    """
+    QuerySet des objectifs avec calcul groupé de la progression.
+
+    ReadingGoal.objects.with_progress() : à l'évaluation du queryset, la
+    progression de tous les objectifs est calculée en une requête agrégée
+    par utilisateur (voir api/goals.py), comme un prefetch_related.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._with_progress = False
+
+    def with_progress(self):
+        clone = self._chain()
+        clone._with_progress = True
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._with_progress = self._with_progress
+        return clone
+
+    def _fetch_all(self):
+        needs_progress = (
+            self._with_progress
+            and self._result_cache is None
+            and issubclass(self._iterable_class, models.query.ModelIterable)
+        )
+        super()._fetch_all()
+        if needs_progress:
+            from .goals import evaluate_goals
+            evaluate_goals(self._result_cache)
+
+
 class ReadingGoal(models.Model):
     """Objectif de lecture"""
     
@@ -85,33 +251,37 @@ class ReadingGoal(models.Model):
     target = models.PositiveIntegerField()
     start_date = models.DateField()
     end_date = models.DateField()
+
+    objects = ReadingGoalQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.user.username} - {self.target} {self.goal_type}/{self.period}"
 
+    def save(self, *args, **kwargs):
+        # La période ou le type ont pu changer : progression à recalculer
+        self.__dict__.pop('_current_value', None)
+        super().save(*args, **kwargs)
+
     @property
     def current_value(self):
         """
         Valeur actuelle de l'objectif.
 
         - Si goal_type == 'pages' : somme des pages lues sur la période
-        - Si goal_type == 'books' : nb de livres 'lu' sur la période
-
-        Ici on approxime "sur la période" avec date_added de UserBook,
-        faute d'avoir des dates de lecture détaillées.
-        """
-        from .models import UserBook  # référence au modèle défini plus haut
+          (sessions, et progression saisie hors sessions au jour de la saisie)
+        - Si goal_type == 'books' : nb de livres terminés sur la période
 
-        qs = UserBook.objects.filter(
-            user=self.user,
-            date_added__gte=self.start_date,
-            date_added__lte=self.end_date,
-        )
+        Calculée à partir de l'agrégat quotidien DailyReadingStat, donc
+        selon les dates réelles de lecture.
 
-        if self.goal_type == self.GoalType.PAGES:
-            return qs.aggregate(total=Sum('pages_read'))['total'] or 0
-        else:  # BOOKS
-            return qs.filter(status=UserBook.Status.LU).count()
+        La valeur est calculée une seule fois par instance ; pour une liste
+        d'objectifs, ReadingGoal.objects.with_progress() la calcule pour tous
+        en une requête.
+        """
+        if '_current_value' not in self.__dict__:
+            from .goals import evaluate_goals
+            evaluate_goals([self])
+        return self._current_value
 
     @property
     def progress_percentage(self):
@@ -145,6 +315,10 @@ class Profile(models.Model):
         null=True,
         blank=True
     )
+    # Empreinte SHA-256 de l'avatar (nom du fichier et des miniatures) et
+    # miniatures générées ou non (voir api/avatars.py)
+    avatar_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    avatar_ready = models.BooleanField(default=False, editable=False)
     bio = models.TextField(
         blank=True,
         help_text="Courte description / biographie"
@@ -157,6 +331,12 @@ class Profile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Version des données de lecture de l'utilisateur (UserBook, ReadingList,
+    # ReadingGoal, ReadingSession), incrémentée à chaque modification :
+    # sert d'ETag / Last-Modified aux GET conditionnels (api.conditional)
+    data_version = models.PositiveBigIntegerField(default=0, editable=False)
+    data_changed_at = models.DateTimeField(default=timezone.now, editable=False)
+
     def __str__(self):
         return f"Profil de {self.user.username}"
 
@@ -167,12 +347,131 @@ def create_user_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
 
+
+@receiver(post_save, sender=User)
+def create_library_stats(sender, instance, created, raw=False, **kwargs):
+    """
+    Compteurs à zéro dès la création de l'utilisateur : le tableau de bord et
+    /api/my-books/stats/ d'un nouvel utilisateur restent une simple lecture
+    """
+    if created and not raw:
+        LibraryStats.objects.create(user=instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_cache(sender, instance, created=False, **kwargs):
+    """
+    Mot de passe, is_active... : l'utilisateur en cache pour
+    l'authentification JWT est périmé (après le commit)
+    """
+    if created:
+        return
+    from .authentication import invalidate_cached_user
+
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
+
+@receiver(post_save, sender='token_blacklist.BlacklistedToken')
+def add_to_blacklist_filter(sender, instance, created, raw=False, **kwargs):
+    """Jeton de rafraîchissement mis en liste noire : filtre de Bloom à jour"""
+    if not created or raw:
+        return
+    from .blacklist import token_blacklisted_on_commit
+
+    token_blacklisted_on_commit(instance.token.jti)
+
+
+@receiver(post_save, sender='token_blacklist.OutstandingToken')
+def stick_new_session_to_primary(sender, instance, created, raw=False, **kwargs):
+    """
+    Connexion ou rafraîchissement : les lectures qui suivent (un compte qui
+    vient d'être créé par exemple) vont au primaire un court instant
+    """
+    if not created or raw:
+        return
+    from .replicas import stick_to_primary
+
+    stick_to_primary(instance.user_id)
+
+
+@receiver(post_save, sender=UserBook)
+def update_stats_on_userbook_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Répercute la création / modification d'un UserBook sur LibraryStats et
+    sur DailyReadingStat (livres terminés, progression saisie hors sessions)
+    """
+    if raw:
+        return
+    from .stats import (
+        apply_daily_delta, apply_library_stats_delta,
+        rebuild_daily_stats, rebuild_library_stats,
+    )
+
+    old_state = getattr(instance, '_stats_state', None)
+    if not created and old_state is None:
+        # Instance construite à la main : état précédent inconnu
+        rebuild_library_stats([instance.user_id])
+        rebuild_daily_stats([instance.user_id])
+    else:
+        apply_library_stats_delta(
+            instance.user_id,
+            None if created else old_state,
+            (instance.status, instance.pages_read),
+        )
+        # Livre terminé aujourd'hui et progression saisie : même ligne, un
+        # seul UPDATE
+        today = timezone.localdate()
+        today_deltas = {}
+        old_finished_on = None if created else instance._finished_on_state
+        if old_finished_on != instance.finished_on:
+            if old_finished_on:
+                apply_daily_delta(instance.user_id, old_finished_on, books_finished=-1)
+            if instance.finished_on == today:
+                today_deltas['books_finished'] = 1
+            elif instance.finished_on:
+                apply_daily_delta(instance.user_id, instance.finished_on, books_finished=1)
+
+        # Pages venues des sessions (add_session_pages) : déjà comptées à
+        # la date de chaque session
+        if not update_fields or 'session_pages' not in update_fields:
+            old_pages = 0 if created else old_state[1] or 0
+            today_deltas['manual_pages'] = instance.pages_read - old_pages
+        apply_daily_delta(instance.user_id, today, **today_deltas)
+    instance._remember_stats_state()
+
+
+@receiver(post_delete, sender=UserBook)
+def update_stats_on_userbook_delete(sender, instance, **kwargs):
+    """Répercute la suppression d'un UserBook (y compris en cascade)"""
+    from .stats import apply_daily_delta, apply_library_stats_delta
+
+    old_state = getattr(instance, '_stats_state', None) or (
+        instance.status, instance.pages_read
+    )
+    apply_library_stats_delta(instance.user_id, old_state, None)
+
+    finished_on = getattr(instance, '_finished_on_state', instance.finished_on)
+    if finished_on:
+        apply_daily_delta(instance.user_id, finished_on, books_finished=-1)
+
+
 class ReadingSession(models.Model):
     """Session de lecture (détail par jour)"""
     user_book = models.ForeignKey(
         UserBook,
         on_delete=models.CASCADE,
-        related_name='reading_sessions'
+        related_name='reading_sessions',
+        db_index=False,  # index (user_book, date) ci-dessous
+    )
+    # Propriétaire du livre, dénormalisé (renseigné par save) : listes et
+    # agrégats des sessions d'un utilisateur sans jointure sur UserBook
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reading_sessions',
+        db_index=False,  # index (user, date, ...) ci-dessous
     )
     date = models.DateField()
     pages_read = models.PositiveIntegerField(
@@ -191,25 +490,198 @@ class ReadingSession(models.Model):
 
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Sessions d'un utilisateur, par date ; pagination par curseur
+            # (date, created_at, id)
+            models.Index(fields=['user', 'date', 'created_at', 'id'], name='session_user_date_idx'),
+            # Sessions d'un livre, par date (?user_book=, allure de lecture, recomptage)
+            models.Index(fields=['user_book', 'date'], name='session_userbook_date_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_rollup_state()
+        return instance
+
+    def _remember_rollup_state(self):
+        """Mémorise (date, pages_read, duration_minutes) et le livre tels qu'en base"""
+        self._rollup_state = (
+            self.__dict__.get('date'),
+            self.__dict__.get('pages_read'),
+            self.__dict__.get('duration_minutes'),
+        )
+        self._user_book_state = self.__dict__.get('user_book_id')
 
     def __str__(self):
         return f"{self.user_book.book.title} - {self.date} - {self.pages_read} pages"
 
     def save(self, *args, **kwargs):
-        """Après chaque save, recalcule le total pages_read sur le UserBook."""
-        super().save(*args, **kwargs)
-        total = self.user_book.reading_sessions.aggregate(
-            total=Sum('pages_read')
-        )['total'] or 0
-        self.user_book.pages_read = total
-        self.user_book.save()
+        """
+        Après chaque save, répercute la différence de pages sur le UserBook
+        (sans ré-agréger toutes les sessions du livre).
+        """
+        adding = self._state.adding
+        old_user_book_id = getattr(self, '_user_book_state', None)
+        old_pages = self._rollup_state[1] if old_user_book_id else None
+
+        # Propriétaire : celui du livre (déjà chargé par le serializer)
+        if self.user_id is None or self.user_book_id != old_user_book_id:
+            self.user_id = self.user_book.user_id
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'user'}
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            if adding:
+                deltas = {self.user_book_id: self.pages_read}
+            elif old_user_book_id is None:
+                # Instance construite à la main : état précédent inconnu
+                deltas = {self.user_book_id: None}
+            elif old_user_book_id != self.user_book_id:
+                deltas = {old_user_book_id: -old_pages, self.user_book_id: self.pages_read}
+            else:
+                deltas = {self.user_book_id: self.pages_read - old_pages}
+
+            for user_book_id, delta in deltas.items():
+                if delta is None:
+                    delta = self.recount_delta(user_book_id)
+                if not delta:
+                    continue
+                # Si cette session termine le livre, il est terminé à sa date
+                user_book = UserBook.add_session_pages(user_book_id, delta, on_date=self.date)
+                if user_book_id == self.user_book_id:
+                    self.user_book = user_book
 
     def delete(self, *args, **kwargs):
-        """Après suppression, recalcule le total pages_read sur le UserBook."""
-        user_book = self.user_book
-        super().delete(*args, **kwargs)
-        total = user_book.reading_sessions.aggregate(
+        """Après suppression, retire les pages de la session du UserBook."""
+        old_user_book_id = getattr(self, '_user_book_state', None) or self.user_book_id
+        old_pages = self._rollup_state[1] if hasattr(self, '_rollup_state') else self.pages_read
+
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            UserBook.add_session_pages(old_user_book_id, -old_pages)
+        return result
+
+    @staticmethod
+    def recount_delta(user_book_id):
+        """Écart entre la somme réelle des sessions et UserBook.session_pages"""
+        total = ReadingSession.objects.filter(user_book_id=user_book_id).aggregate(
             total=Sum('pages_read')
         )['total'] or 0
-        user_book.pages_read = total
-        user_book.save()
\ No newline at end of file
+        current = UserBook.objects.filter(pk=user_book_id).values_list(
+            'session_pages', flat=True
+        ).get()
+        return total - current
+
+
+class DailyReadingStat(models.Model):
+    """
+    Agrégat quotidien de lecture d'un utilisateur.
+
+    Maintenu par différence à chaque écriture de ReadingSession (pages,
+    minutes, sessions) et à chaque livre terminé (UserBook.finished_on).
+    Alimente les objectifs et /api/reading-sessions/summary/.
+    Reconstruction : manage.py rebuild_daily_stats.
+
+    manual_pages : progression saisie hors sessions (update_progress,
+    modification de pages_read), nette, au jour de la saisie ; comptée
+    par les objectifs de pages. Sans historique dont la recalculer, elle
+    est conservée telle quelle par la reconstruction.
+    """
+    # Pas d'index propre : l'unicité (user, date) commence par user
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='daily_stats', db_index=False,
+    )
+    date = models.DateField()
+    pages_read = models.PositiveIntegerField(default=0)
+    minutes = models.PositiveIntegerField(default=0)
+    sessions_count = models.PositiveIntegerField(default=0)
+    books_finished = models.PositiveIntegerField(default=0)
+    # Signée : une correction à la baisse retire des pages
+    manual_pages = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['user', 'date']
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.user_id} - {self.date} - {self.pages_read} pages"
+
+
+@receiver(post_save, sender=ReadingSession)
+def update_daily_stats_on_session_save(sender, instance, created, raw=False, **kwargs):
+    """Répercute la création / modification d'une session sur DailyReadingStat"""
+    if raw:
+        return
+    from .stats import apply_session_rollup_delta, rebuild_daily_stats
+
+    user_id = instance.user_id
+    old_state = getattr(instance, '_rollup_state', None)
+    if not created and old_state is None:
+        rebuild_daily_stats([user_id])
+    else:
+        apply_session_rollup_delta(
+            user_id,
+            None if created else old_state,
+            (instance.date, instance.pages_read, instance.duration_minutes),
+        )
+    instance._remember_rollup_state()
+
+
+@receiver(post_delete, sender=ReadingSession)
+def update_daily_stats_on_session_delete(sender, instance, **kwargs):
+    """Répercute la suppression d'une session (y compris en cascade)"""
+    from .stats import apply_session_rollup_delta
+
+    old_state = getattr(instance, '_rollup_state', None) or (
+        instance.date, instance.pages_read, instance.duration_minutes
+    )
+    apply_session_rollup_delta(instance.user_id, old_state, None)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    """Invalide les réponses du catalogue en cache (nouvelle version)"""
+    from .catalog_cache import invalidate_catalog_on_commit
+
+    invalidate_catalog_on_commit()
+
+
+@receiver(post_save, sender=UserBook)
+@receiver(post_delete, sender=UserBook)
+@receiver(post_save, sender=ReadingList)
+@receiver(post_delete, sender=ReadingList)
+@receiver(post_save, sender=ReadingGoal)
+@receiver(post_delete, sender=ReadingGoal)
+def bump_data_version(sender, instance, raw=False, **kwargs):
+    """Nouvelle version des données de l'utilisateur (GET conditionnels)"""
+    if raw:
+        return
+    from .conditional import bump_user_data_version
+
+    bump_user_data_version([instance.user_id])
+
+
+@receiver(post_save, sender=ReadingSession)
+@receiver(post_delete, sender=ReadingSession)
+def bump_data_version_on_session_change(sender, instance, raw=False, **kwargs):
+    """Idem pour les sessions"""
+    if raw:
+        return
+    from .conditional import bump_user_data_version
+
+    bump_user_data_version([instance.user_id])
+
+
+@receiver(m2m_changed, sender=ReadingList.books.through)
+def bump_data_version_on_list_books_change(sender, instance, action, **kwargs):
+    """Ajout / retrait de livres dans une liste (instance : liste ou UserBook)"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        from .conditional import bump_user_data_version
+
+        bump_user_data_version([instance.user_id])
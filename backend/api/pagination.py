@@ -0,0 +1,130 @@
+"""
+Pagination de l'API
+
+Par défaut : pagination par numéro de page (?page=N), comme avant.
+
+Sur les vues qui déclarent un attribut keyset_ordering, le client peut
+demander une pagination par curseur (keyset) avec ?pagination=cursor :
+chaque page est lue avec un WHERE sur la dernière ligne de la page
+précédente, sans COUNT(*) ni OFFSET, donc au même coût en page 1 et en
+page 5000. L'ordre est alors celui de keyset_ordering (ex. ('title', 'id')),
+qui doit se terminer par une colonne unique, ne porter que sur des colonnes
+NOT NULL et correspondre à un index.
+
+    GET /api/books/?pagination=cursor
+    → { "next": "...?pagination=cursor&cursor=WyJMZS...", "results": [...] }
+"""
+
+import base64
+import binascii
+import json
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPagination(BasePagination):
+    """Pagination par curseur sur un ordre composite (keyset_ordering de la vue)"""
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = "Curseur invalide."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in view.keyset_ordering
+        ]
+        queryset = queryset.order_by(*view.keyset_ordering)
+
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.after_position(position))
+
+        # Une ligne de plus pour savoir s'il existe une page suivante
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def after_position(self, position):
+        """
+        Condition « strictement après » la position, pour un ordre composite :
+
+            a >= x AND (a > x OR (a = x AND (b > y OR (b = y AND c > z))))
+
+        Le premier terme borne le parcours de l'index sur sa colonne de tête.
+        """
+        condition = None
+        for (name, descending), value in reversed(list(zip(self.ordering, position))):
+            after = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            condition = after if condition is None else after | (Q(**{name: value}) & condition)
+
+        first_name, first_descending = self.ordering[0]
+        bound = Q(**{f"{first_name}__{'lte' if first_descending else 'gte'}": position[0]})
+        return bound & condition
+
+    def encode_cursor(self, instance):
+        values = []
+        for name, _ in self.ordering:
+            value = getattr(instance, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        encoded = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, encoded
+        )
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            # Colonnes NOT NULL : une valeur nulle vient d'un curseur forgé
+            # (to_python la laisserait passer jusqu'au filtre)
+            if any(value is None for value in values):
+                raise ValueError
+            return [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.encode_cursor(self.page[-1]) if self.has_next else None,
+            'results': data,
+        })
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    Pagination par défaut de l'API (settings.REST_FRAMEWORK) :
+    numéro de page, ou curseur sur demande (?pagination=cursor) pour les
+    vues qui déclarent keyset_ordering.
+    """
+    mode_query_param = 'pagination'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            and getattr(view, 'keyset_ordering', None)
+        ):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,175 @@
+"""
+Lectures sur réplicas PostgreSQL (DATABASE_ROUTERS)
+
+Avec des réplicas configurés (DB_REPLICA_HOSTS, alias replica_1, replica_2…),
+ReplicaRouter répartit les requêtes SQL d'une requête HTTP :
+
+- écritures : toujours sur le primaire (default)
+- lectures d'une requête GET / HEAD / OPTIONS : sur un réplica, tiré au sort
+  une fois par requête HTTP (toutes ses lectures voient le même état)
+
+Les lectures restent sur le primaire :
+- hors requête HTTP (commandes, threads d'arrière-plan) et dans une
+  transaction ouverte sur le primaire
+- pour toute la requête si elle modifie des données (POST, PATCH…) ou si la
+  vue le demande (attribut primary_db : True, ou ensemble d'actions,
+  par ex. {'update_progress'})
+- après une première écriture, pour le reste de la requête
+- pour les tables d'authentification (auth, token_blacklist) : une
+  révocation ne doit pas attendre la réplication
+- pendant DB_REPLICA_STICKY_SECONDS pour un utilisateur qui vient d'écrire
+  (lecture de ses propres écritures malgré le retard des réplicas) ; la
+  marque est posée dans le cache Django, qui doit donc être partagé entre
+  processus (CACHE_BACKEND) : ImproperlyConfigured sinon
+
+L'utilisateur est lu dans le jeton JWT (signature vérifiée, sans requête
+SQL), seulement si la requête lit la base.
+
+Sans réplica, ReplicaRoutingMiddleware est désactivé et tout va au primaire.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .shared_cache import cache_is_shared
+
+PRIMARY = DEFAULT_DB_ALIAS
+
+_current_routing = ContextVar('db_routing', default=None)
+
+
+def _sticky_key(user_id):
+    return f'db:primary:user:{user_id}'
+
+
+def stick_to_primary(user_id):
+    """Envoie les lectures de l'utilisateur au primaire pendant DB_REPLICA_STICKY_SECONDS"""
+    if user_id is not None and settings.DATABASE_REPLICAS:
+        cache.set(_sticky_key(user_id), True, timeout=settings.DB_REPLICA_STICKY_SECONDS)
+
+
+def _token_user_id(request):
+    """Identifiant de l'utilisateur du jeton d'accès (None si absent ou invalide)"""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = header and authentication.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+    except InvalidToken:
+        return None
+    return validated_token.get(api_settings.USER_ID_CLAIM)
+
+
+class RequestRouting:
+    """État de routage d'une requête HTTP"""
+
+    _unresolved = object()
+
+    def __init__(self, request):
+        self.request = request
+        self.primary = request.method not in SAFE_METHODS
+        self.wrote = False
+        self._alias = None
+        self._user_id = self._unresolved
+
+    def user_id(self):
+        if self._user_id is self._unresolved:
+            self._user_id = _token_user_id(self.request)
+        return self._user_id
+
+    def read_alias(self):
+        if self.primary or self.wrote:
+            return PRIMARY
+        if self._alias is None:
+            # Les lectures faites pendant la résolution (cache en base de
+            # données par exemple) vont au primaire
+            self._alias = PRIMARY
+            user_id = self.user_id()
+            if user_id is None or not cache.get(_sticky_key(user_id)):
+                self._alias = random.choice(settings.DATABASE_REPLICAS)
+        return self._alias
+
+
+class ReplicaRouter:
+    """Voir la documentation du module"""
+
+    # Applications dont les lectures restent sur le primaire
+    primary_apps = {'auth', 'token_blacklist'}
+
+    def db_for_read(self, model, **hints):
+        routing = _current_routing.get()
+        if (
+            routing is None
+            or model._meta.app_label in self.primary_apps
+            or connections[PRIMARY].in_atomic_block
+        ):
+            return PRIMARY
+        return routing.read_alias()
+
+    def db_for_write(self, model, **hints):
+        routing = _current_routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mêmes données partout
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Les réplicas reçoivent le schéma par réplication
+        return db == PRIMARY
+
+
+def _view_uses_primary(view_func, request):
+    """Attribut primary_db de la vue (True, ou ensemble d'actions)"""
+    view_class = getattr(view_func, 'cls', view_func)
+    primary_db = getattr(view_class, 'primary_db', False)
+    if isinstance(primary_db, (set, frozenset, list, tuple)):
+        actions = getattr(view_func, 'actions', None) or {}
+        return actions.get(request.method.lower()) in primary_db
+    return bool(primary_db)
+
+
+class ReplicaRoutingMiddleware:
+    """Pose l'état de routage de la requête (voir la documentation du module)"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'DATABASE_REPLICAS', None):
+            raise MiddlewareNotUsed
+        if not cache_is_shared():
+            # Un processus ne verrait pas la marque posée par un autre : ses
+            # lectures iraient sur un réplica en retard juste après l'écriture
+            raise ImproperlyConfigured(
+                "DATABASE_REPLICAS exige un cache partagé entre processus "
+                "(CACHE_BACKEND) pour la lecture de ses propres écritures."
+            )
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routing = RequestRouting(request)
+        token = _current_routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_routing.reset(token)
+
+        if routing.primary and routing.wrote and response.status_code < 400:
+            stick_to_primary(routing.user_id())
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routing = _current_routing.get()
+        if routing is not None and _view_uses_primary(view_func, request):
+            routing.primary = True
@@ -0,0 +1,69 @@
+"""
+Recherche dans le catalogue
+
+Sous PostgreSQL : recherche plein texte (search_vector, config 'french')
+combinée à une similarité par trigrammes (search_text) pour tolérer les
+fautes de frappe, le tout sans accents et trié par pertinence. Les deux
+colonnes sont indexées en GIN et maintenues par trigger (migration 0009).
+
+Sous SQLite (tests, développement) : simple icontains sur le titre et
+l'auteur, sans classement.
+"""
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, TrigramWordSimilarity,
+)
+from django.db import connections
+from django.db.models import F, Func, Q, TextField, Value
+from django.db.models.functions import Lower
+from rest_framework.filters import BaseFilterBackend
+
+
+class Unaccent(Func):
+    """unaccent(texte) de l'extension PostgreSQL du même nom"""
+    function = 'UNACCENT'
+    output_field = TextField()
+
+
+def search_books(queryset, term, book_path=''):
+    """
+    Filtre et trie un queryset par pertinence pour le terme recherché.
+
+    book_path : chemin vers le Book depuis le modèle du queryset
+    ('' pour Book, 'book__' pour UserBook).
+    """
+    term = term.strip()
+    if not term:
+        return queryset
+
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.filter(
+            Q(**{f'{book_path}title__icontains': term})
+            | Q(**{f'{book_path}author__name__icontains': term})
+        )
+
+    query = SearchQuery(Unaccent(Value(term)), config='french', search_type='websearch')
+    folded_term = Lower(Unaccent(Value(term)))
+
+    return queryset.annotate(
+        search_rank=SearchRank(F(f'{book_path}search_vector'), query),
+        search_similarity=TrigramWordSimilarity(folded_term, f'{book_path}search_text'),
+    ).filter(
+        Q(**{f'{book_path}search_vector': query})
+        | Q(**{f'{book_path}search_text__trigram_word_similar': folded_term})
+    ).order_by('-search_rank', '-search_similarity', f'{book_path}title', 'pk')
+
+
+class BookSearchFilter(BaseFilterBackend):
+    """
+    Filtre DRF ?search=terme sur le titre et l'auteur des livres.
+
+    Remplace filters.SearchFilter ; la vue indique le chemin vers le Book
+    avec l'attribut search_book_path ('' par défaut).
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '')
+        book_path = getattr(view, 'search_book_path', '')
+        return search_books(queryset, term, book_path)
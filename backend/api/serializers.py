@@ -4,7 +4,8 @@ from django.contrib.auth.models import User
 from .models import (
     Author, Book, UserBook,
     ReadingGoal, ReadingList,
-    Profile, ReadingSession
+    Profile, ReadingSession,
+    POSITIVE_INTEGER_MAX,
 )
 
 # =========================
@@ -67,8 +68,9 @@ class UserBookSerializer(serializers.ModelSerializer):
             'date_added',
             'is_favorite',     # Favori
             'rating',          # Note 1-5
+            'finished_on',     # Date de fin de lecture
         ]
-        read_only_fields = ['status', 'progress', 'date_added']
+        read_only_fields = ['status', 'progress', 'date_added', 'finished_on']
 
     def validate(self, attrs):
         """
@@ -169,14 +171,55 @@ class ReadingListSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'books', 'created_at']
 
 
+class ReadingListSummarySerializer(serializers.ModelSerializer):
+    """
+    Résumé d'une liste pour GET /api/lists/ : compteurs annotés par la vue
+    et aperçu de quelques livres (preview_books), sans la liste complète.
+    """
+    book_count = serializers.IntegerField(read_only=True)
+    total_pages = serializers.IntegerField(read_only=True)
+    completion_percentage = serializers.IntegerField(read_only=True)
+    preview = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReadingList
+        fields = [
+            'id',
+            'name',
+            'created_at',
+            'book_count',
+            'total_pages',
+            'completion_percentage',
+            'preview',
+        ]
+
+    def get_preview(self, obj):
+        return [
+            {
+                'id': user_book.id,
+                'book_id': user_book.book_id,
+                'title': user_book.book.title,
+                'author': user_book.book.author.name,
+            }
+            for user_book in getattr(obj, 'preview_books', [])
+        ]
+
+
 # =========================
 # Profil utilisateur
 # =========================
 
 class ProfileSerializer(serializers.ModelSerializer):
+    # URL des miniatures : { small, medium, large }
+    avatar_urls = serializers.SerializerMethodField()
+
     class Meta:
         model = Profile
-        fields = ['avatar', 'bio', 'favorite_genre']
+        fields = ['avatar', 'avatar_urls', 'bio', 'favorite_genre']
+
+    def get_avatar_urls(self, profile):
+        from .avatars import avatar_urls
+        return avatar_urls(profile, self.context.get('request'))
 
 
 # =========================
@@ -209,7 +252,7 @@ class ReadingSessionSerializer(serializers.ModelSerializer):
         pages_read = attrs.get('pages_read', self.instance.pages_read if self.instance else None)
 
         if user_book and request:
-            if user_book.user != request.user:
+            if user_book.user_id != request.user.pk:
                 raise serializers.ValidationError(
                     "Vous ne pouvez ajouter des sessions que pour vos propres livres."
                 )
@@ -219,4 +262,66 @@ class ReadingSessionSerializer(serializers.ModelSerializer):
                 'pages_read': "Le nombre de pages doit être supérieur à 0."
             })
 
-        return attrs
\ No newline at end of file
+        return attrs
+
+class ReadingSessionImportSerializer(serializers.Serializer):
+    """
+    Ligne d'un import en masse de sessions (POST /api/reading-sessions/import/).
+
+    Validation sans accès à la base : la propriété des livres est vérifiée
+    en une seule requête pour tout l'import.
+    """
+    user_book = serializers.IntegerField()
+    date = serializers.DateField(input_formats=['iso-8601', '%d/%m/%Y'])
+    # Bornes des colonnes : une valeur hors plage ferait échouer tout le
+    # bulk_create au lieu d'une seule ligne
+    pages_read = serializers.IntegerField(
+        min_value=1, max_value=POSITIVE_INTEGER_MAX,
+        error_messages={'min_value': "Le nombre de pages doit être supérieur à 0."}
+    )
+    duration_minutes = serializers.IntegerField(
+        min_value=0, max_value=POSITIVE_INTEGER_MAX, required=False, allow_null=True,
+    )
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class ProgressUpdateSerializer(serializers.Serializer):
+    """
+    Élément d'une mise à jour groupée de progression
+    (POST /api/my-books/bulk_update_progress/).
+
+    Validation sans accès à la base : l'appartenance et total_pages sont
+    vérifiés en une seule requête pour tout le lot.
+    """
+    id = serializers.IntegerField()
+    pages_read = serializers.IntegerField(
+        min_value=0,
+        error_messages={'min_value': "'pages_read' ne peut pas être négatif."}
+    )
+
+
+# =========================
+# Requêtes groupées
+# =========================
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    """Sous-requête de POST /api/batch/"""
+    method = serializers.ChoiceField(choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
+    path = serializers.CharField(max_length=2000)
+    body = serializers.JSONField(required=False, allow_null=True)
+
+
+class BatchSerializer(serializers.Serializer):
+    """
+    Corps de POST /api/batch/ : { "requests": [...], "atomic": false }
+    """
+    requests = BatchSubRequestSerializer(many=True, allow_empty=False)
+    atomic = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        max_requests = self.context.get('max_requests')
+        if max_requests and len(value) > max_requests:
+            raise serializers.ValidationError(
+                f"{max_requests} sous-requêtes au maximum par lot."
+            )
+        return value
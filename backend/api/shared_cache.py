@@ -0,0 +1,34 @@
+"""
+Cache Django partagé ou propre au processus
+
+Les invalidations par version / génération (catalogue, résumés de lecture)
+passent par le cache Django. Avec un cache propre au processus
+(LocMemCache, défaut de CACHE_BACKEND), elles n'atteignent que le processus
+qui les fait : dès que le serveur lance plusieurs processus (gunicorn
+--workers…), les autres continuent de servir leurs entrées.
+
+Sans cache partagé, ces entrées vivent donc au plus LOCAL_CACHE_TIMEOUT
+secondes (versioned_timeout) ; avec un CACHE_BACKEND partagé (fichiers,
+Redis, Memcached), leur durée de vie normale s'applique. Les réplicas
+(api.replicas), dont la lecture de ses propres écritures repose sur une
+marque dans le cache, exigent un cache partagé.
+"""
+
+from django.conf import settings
+
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_is_shared():
+    """True si le cache par défaut est commun à tous les processus"""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def versioned_timeout(timeout):
+    """Durée de vie d'une entrée invalidée par version (bornée sans cache partagé)"""
+    if cache_is_shared():
+        return timeout
+    return min(timeout, settings.LOCAL_CACHE_TIMEOUT)
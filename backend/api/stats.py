@@ -0,0 +1,434 @@
+"""
+Compteurs dénormalisés de lecture
+
+LibraryStats (compteurs de la bibliothèque) :
+- apply_library_stats_delta : mise à jour par différence (signaux UserBook)
+- apply_user_book_changes   : idem pour des UserBook écrits par bulk_update
+- compute_library_stats     : recalcul complet en une requête agrégée
+- rebuild_library_stats     : recalcul + écriture (commande rebuild_library_stats)
+- find_inconsistent_stats   : comparaison stocké / recalculé (check_library_stats)
+
+DailyReadingStat (agrégat quotidien) :
+- apply_daily_delta / apply_session_rollup_delta : mise à jour par différence
+- rebuild_daily_stats       : recalcul complet (commande rebuild_daily_stats)
+
+UserBook.session_pages / pages_read :
+- repair_pages_read         : recalcul ensembliste (commande repair_pages_read)
+"""
+
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Case, Count, Exists, F, Max, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+from .conditional import bump_user_data_version
+from .summary import invalidate_summary, invalidate_summary_day
+from .models import Book, DailyReadingStat, LibraryStats, ReadingSession, UserBook
+
+STATUS_FIELDS = {
+    UserBook.Status.LU: 'lu',
+    UserBook.Status.EN_COURS: 'en_cours',
+    UserBook.Status.NON_LU: 'non_lu',
+}
+
+COUNTER_FIELDS = ['total', 'lu', 'en_cours', 'non_lu', 'pages_read']
+
+
+def library_stats_deltas(old_state, new_state, deltas=None):
+    """
+    Différences de compteurs entre deux états (status, pages_read) d'un
+    UserBook, ajoutées à deltas s'il est fourni (cumul de plusieurs livres).
+    """
+    if deltas is None:
+        deltas = dict.fromkeys(COUNTER_FIELDS, 0)
+
+    if old_state is not None:
+        old_status, old_pages = old_state
+        deltas['total'] -= 1
+        deltas[STATUS_FIELDS[old_status]] -= 1
+        deltas['pages_read'] -= old_pages or 0
+
+    if new_state is not None:
+        new_status, new_pages = new_state
+        deltas['total'] += 1
+        deltas[STATUS_FIELDS[new_status]] += 1
+        deltas['pages_read'] += new_pages or 0
+
+    return deltas
+
+
+def apply_library_stats_delta(user_id, old_state, new_state):
+    """
+    Applique la différence entre deux états (status, pages_read) d'un UserBook.
+
+    old_state vaut None pour une création, new_state vaut None pour une
+    suppression. La mise à jour est un UPDATE atomique avec des F().
+    """
+    deltas = library_stats_deltas(old_state, new_state)
+
+    changes = {
+        field: F(field) + delta
+        for field, delta in deltas.items()
+        if delta
+    }
+    if not changes:
+        return
+
+    updated = LibraryStats.objects.filter(user_id=user_id).update(**changes)
+
+    # Ligne absente : on la reconstruit (sauf en suppression, où l'utilisateur
+    # est peut-être lui-même en cours de suppression ; elle sera recréée à la
+    # prochaine lecture)
+    if not updated and new_state is not None:
+        rebuild_library_stats([user_id])
+
+
+def apply_user_book_changes(user_id, user_books):
+    """
+    Répercute sur LibraryStats et DailyReadingStat des UserBook modifiés
+    sans save() (bulk_update), à partir de leur état mémorisé au chargement :
+    un UPDATE pour les compteurs, un par jour de fin de lecture modifié, un
+    pour la ligne du jour (progression saisie et livres terminés ce jour).
+    """
+    deltas = dict.fromkeys(COUNTER_FIELDS, 0)
+    finished = defaultdict(int)
+    manual_pages = 0
+
+    for user_book in user_books:
+        library_stats_deltas(
+            user_book._stats_state,
+            (user_book.status, user_book.pages_read),
+            deltas,
+        )
+        manual_pages += user_book.pages_read - (user_book._stats_state[1] or 0)
+        if user_book._finished_on_state != user_book.finished_on:
+            if user_book._finished_on_state:
+                finished[user_book._finished_on_state] -= 1
+            if user_book.finished_on:
+                finished[user_book.finished_on] += 1
+        user_book._remember_stats_state()
+
+    changes = {
+        field: F(field) + delta
+        for field, delta in deltas.items()
+        if delta
+    }
+    if changes and not LibraryStats.objects.filter(user_id=user_id).update(**changes):
+        rebuild_library_stats([user_id])
+
+    # Livres terminés aujourd'hui : même ligne que la progression saisie
+    today = timezone.localdate()
+    finished_today = finished.pop(today) if finished.get(today, 0) > 0 else 0
+    for day, delta in finished.items():
+        apply_daily_delta(user_id, day, books_finished=delta)
+    apply_daily_delta(user_id, today, manual_pages=manual_pages, books_finished=finished_today)
+
+
+def compute_library_stats(user_ids):
+    """
+    Recalcule les compteurs de plusieurs utilisateurs en une seule requête.
+
+    Retourne { user_id: { total, lu, en_cours, non_lu, pages_read } },
+    avec des zéros pour les utilisateurs sans livre.
+    """
+    rows = (
+        UserBook.objects
+        .filter(user_id__in=user_ids)
+        .values('user_id')
+        .annotate(
+            total=Count('id'),
+            lu=Count('id', filter=Q(status=UserBook.Status.LU)),
+            en_cours=Count('id', filter=Q(status=UserBook.Status.EN_COURS)),
+            non_lu=Count('id', filter=Q(status=UserBook.Status.NON_LU)),
+            pages_read=Coalesce(Sum('pages_read'), 0),
+        )
+        .order_by()
+    )
+
+    result = {user_id: dict.fromkeys(COUNTER_FIELDS, 0) for user_id in user_ids}
+    for row in rows:
+        result[row.pop('user_id')] = row
+    return result
+
+
+def rebuild_library_stats(user_ids=None, batch_size=1000):
+    """
+    Recalcule et enregistre les compteurs (tous les utilisateurs si user_ids
+    vaut None). Retourne le nombre de lignes écrites.
+    """
+    if user_ids is None:
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+
+    user_ids = list(user_ids)
+    written = 0
+
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        computed = compute_library_stats(batch)
+        LibraryStats.objects.bulk_create(
+            [
+                LibraryStats(user_id=user_id, **counters)
+                for user_id, counters in computed.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=COUNTER_FIELDS,
+        )
+        written += len(computed)
+
+    return written
+
+
+def get_library_stats(user):
+    """Lit les compteurs d'un utilisateur (reconstruits s'ils manquent)"""
+    try:
+        return LibraryStats.objects.get(user=user)
+    except LibraryStats.DoesNotExist:
+        stats = LibraryStats(user=user, **compute_library_stats([user.pk])[user.pk])
+        LibraryStats.objects.bulk_create(
+            [stats], update_conflicts=True, unique_fields=['user'], update_fields=COUNTER_FIELDS,
+        )
+        return stats
+
+
+def find_inconsistent_stats(user_ids=None, batch_size=1000):
+    """
+    Compare les compteurs stockés aux valeurs recalculées.
+
+    Retourne une liste de (user_id, stocké, attendu) ; « stocké » vaut None
+    si la ligne LibraryStats est absente.
+    """
+    if user_ids is None:
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+
+    user_ids = list(user_ids)
+    mismatches = []
+
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        expected = compute_library_stats(batch)
+        stored = {
+            row.pop('user_id'): row
+            for row in LibraryStats.objects
+            .filter(user_id__in=batch)
+            .values('user_id', *COUNTER_FIELDS)
+        }
+        for user_id in batch:
+            if stored.get(user_id) != expected[user_id]:
+                mismatches.append((user_id, stored.get(user_id), expected[user_id]))
+
+    return mismatches
+
+
+# =============================================================================
+# AGRÉGAT QUOTIDIEN (DailyReadingStat)
+# =============================================================================
+
+DAILY_FIELDS = ['pages_read', 'minutes', 'sessions_count', 'books_finished']
+
+# Compteur signé, hors recalcul (voir DailyReadingStat)
+MANUAL_FIELD = 'manual_pages'
+
+
+def apply_daily_delta(user_id, day, **deltas):
+    """
+    Ajoute des différences aux compteurs d'une journée, par ex.
+    apply_daily_delta(3, date(2026, 1, 2), pages_read=20, sessions_count=1).
+
+    La ligne est créée au besoin. Une diminution sur une ligne absente est
+    ignorée (utilisateur en cours de suppression, ou agrégat à reconstruire),
+    sauf pour manual_pages, compteur signé.
+    """
+    changes = {
+        field: F(field) + delta
+        for field, delta in deltas.items()
+        if delta
+    }
+    if not changes:
+        return
+
+    # Les périodes déjà résumées qui contiennent ce jour sont à recalculer
+    # (après le commit, pour qu'une lecture concurrente ne remette pas
+    # l'ancienne valeur en cache)
+    transaction.on_commit(lambda: invalidate_summary_day(user_id, day))
+
+    queryset = DailyReadingStat.objects.filter(user_id=user_id, date=day)
+    if queryset.update(**changes):
+        return
+    if any(delta < 0 for field, delta in deltas.items() if field != MANUAL_FIELD):
+        return
+
+    try:
+        with transaction.atomic():
+            DailyReadingStat.objects.create(user_id=user_id, date=day, **deltas)
+    except IntegrityError:
+        # Créée entre-temps par une écriture concurrente
+        queryset.update(**changes)
+
+
+def apply_session_rollup_delta(user_id, old_state, new_state):
+    """
+    Applique la différence entre deux états (date, pages_read,
+    duration_minutes) d'une session ; None pour une création / suppression.
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(('pages_read', 'minutes', 'sessions_count'), 0))
+
+    for state, sign in ((old_state, -1), (new_state, 1)):
+        if state is None:
+            continue
+        day, pages, minutes = state
+        deltas[day]['pages_read'] += sign * (pages or 0)
+        deltas[day]['minutes'] += sign * (minutes or 0)
+        deltas[day]['sessions_count'] += sign
+
+    for day, day_deltas in deltas.items():
+        apply_daily_delta(user_id, day, **day_deltas)
+
+
+def compute_daily_stats(user_ids):
+    """
+    Recalcule les agrégats quotidiens de plusieurs utilisateurs à partir des
+    sessions et des livres terminés. Retourne { (user_id, date): compteurs }.
+    """
+    result = defaultdict(lambda: dict.fromkeys(DAILY_FIELDS, 0))
+
+    sessions = (
+        ReadingSession.objects
+        .filter(user_id__in=user_ids)
+        .values('user_id', 'date')
+        .annotate(
+            pages=Sum('pages_read'),
+            total_minutes=Coalesce(Sum('duration_minutes'), 0),
+            count=Count('id'),
+        )
+        .order_by()
+    )
+    for row in sessions:
+        counters = result[(row['user_id'], row['date'])]
+        counters['pages_read'] = row['pages']
+        counters['minutes'] = row['total_minutes']
+        counters['sessions_count'] = row['count']
+
+    finished = (
+        UserBook.objects
+        .filter(user_id__in=user_ids, finished_on__isnull=False)
+        .values('user_id', 'finished_on')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for row in finished:
+        result[(row['user_id'], row['finished_on'])]['books_finished'] = row['count']
+
+    return result
+
+
+def rebuild_daily_stats(user_ids=None, batch_size=200):
+    """
+    Reconstruit les agrégats quotidiens (tous les utilisateurs si user_ids
+    vaut None). Retourne le nombre de lignes écrites.
+    """
+    if user_ids is None:
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+
+    user_ids = list(user_ids)
+    written = 0
+
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        computed = compute_daily_stats(batch)
+        with transaction.atomic():
+            # Progression saisie hors sessions : conservée (rien pour la recalculer)
+            manual = (
+                DailyReadingStat.objects
+                .filter(user_id__in=batch)
+                .exclude(**{MANUAL_FIELD: 0})
+                .values_list('user_id', 'date', MANUAL_FIELD)
+            )
+            for user_id, day, manual_pages in manual:
+                computed[(user_id, day)][MANUAL_FIELD] = manual_pages
+            DailyReadingStat.objects.filter(user_id__in=batch).delete()
+            transaction.on_commit(lambda batch=batch: invalidate_summary(batch))
+            DailyReadingStat.objects.bulk_create(
+                [
+                    DailyReadingStat(user_id=user_id, date=day, **counters)
+                    for (user_id, day), counters in computed.items()
+                ],
+                batch_size=1000,
+            )
+        written += len(computed)
+
+    return written
+
+
+# =============================================================================
+# TOTAL DES PAGES DES SESSIONS (UserBook.session_pages)
+# =============================================================================
+
+def repair_pages_read(user_ids=None, user_book_ids=None):
+    """
+    Recalcule session_pages, pages_read, status et finished_on des UserBook
+    dont le total ne correspond plus à leurs sessions, en une seule requête
+    UPDATE ensembliste (mêmes règles que UserBook.refresh_status).
+
+    Retourne la liste des utilisateurs concernés (leurs compteurs
+    LibraryStats / DailyReadingStat sont à reconstruire).
+    """
+    sessions = ReadingSession.objects.filter(user_book=OuterRef('pk'))
+    session_total = Coalesce(
+        Subquery(
+            sessions.values('user_book')
+            .annotate(total=Sum('pages_read'))
+            .values('total')
+        ),
+        0,
+    )
+    last_session_date = Subquery(
+        sessions.values('user_book').annotate(last=Max('date')).values('last')
+    )
+    total_pages = Subquery(
+        Book.objects.filter(pk=OuterRef('book_id')).values('total_pages')
+    )
+
+    queryset = UserBook.objects.alias(
+        expected=session_total,
+        total_pages=total_pages,
+        has_sessions=Exists(sessions),
+    ).filter(
+        ~Q(session_pages=F('expected'))
+        | Q(has_sessions=True) & ~Q(pages_read=Least(F('expected'), F('total_pages')))
+    )
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    if user_book_ids is not None:
+        queryset = queryset.filter(pk__in=user_book_ids)
+
+    affected_users = list(
+        queryset.order_by().values_list('user_id', flat=True).distinct()
+    )
+    if not affected_users:
+        return []
+
+    is_finished = Q(expected__gte=F('total_pages'))
+    new_status = Case(
+        When(is_finished, then=Value(UserBook.Status.LU)),
+        When(expected__gt=0, then=Value(UserBook.Status.EN_COURS)),
+        default=F('status'),
+    )
+    queryset.update(
+        session_pages=F('expected'),
+        pages_read=Least(F('expected'), F('total_pages')),
+        status=new_status,
+        finished_on=Case(
+            When(is_finished, then=Coalesce(F('finished_on'), last_session_date)),
+            When(expected__gt=0, then=Value(None)),
+            When(status=UserBook.Status.LU, then=F('finished_on')),
+            default=Value(None),
+        ),
+    )
+    bump_user_data_version(affected_users)
+    return affected_users
@@ -0,0 +1,201 @@
+"""
+Résumé des sessions par période (GET /api/reading-sessions/summary/)
+
+    ?granularity=day|week|month|year   (défaut : day)
+    ?from=2026-01-01&to=2026-03-31     (défaut : les `days` derniers jours)
+
+Les bornes sont élargies aux périodes entières (semaine du lundi au
+dimanche, mois, année) et le nombre de périodes est plafonné
+(SUMMARY_MAX_BUCKETS, vérifié par calcul avant toute itération). Les dates
+sont bornées à [SUMMARY_MIN_DATE, SUMMARY_MAX_DATE] : la période suivant la
+dernière doit rester représentable. Chaque période apparaît, à zéro si rien
+n'a été lu.
+
+Les périodes terminées sont mises en cache par utilisateur : seules la
+période en cours et les périodes absentes du cache sont recalculées, en
+une requête groupée sur DailyReadingStat (TruncWeek / TruncMonth /
+TruncYear). Les clés portent une génération par utilisateur, incrémentée
+après le commit de toute écriture de l'agrégat quotidien qui touche une
+période terminée (stats.apply_daily_delta, stats.rebuild_daily_stats) ;
+les valeurs calculées ne sont mises en cache que si la génération n'a pas
+changé pendant le calcul. Sans cache partagé entre processus, leur durée
+de vie est bornée (shared_cache.versioned_timeout).
+"""
+
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+from django.utils import timezone
+
+from .models import DailyReadingStat
+from .shared_cache import versioned_timeout
+
+GRANULARITIES = ('day', 'week', 'month', 'year')
+SUMMARY_MAX_BUCKETS = 366
+
+# Marge d'un an aux extrémités de datetime.date : next_bucket (année
+# suivante) et la période par défaut (days jours avant to) restent valides
+SUMMARY_MIN_DATE = date(date.min.year + 1, 1, 1)
+SUMMARY_MAX_DATE = date(date.max.year - 1, 12, 31)
+
+# Une période terminée ne change plus qu'en cas de session antidatée
+# (invalidation explicite) : longue durée de vie
+SUMMARY_CACHE_TIMEOUT = 30 * 24 * 3600
+
+TRUNCATE = {
+    'week': TruncWeek,
+    'month': TruncMonth,
+    'year': TruncYear,
+}
+
+
+def bucket_start(day, granularity):
+    """Premier jour de la période contenant day"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'year':
+        return day.replace(month=1, day=1)
+    return day
+
+
+def next_bucket(start, granularity):
+    """Premier jour de la période suivante"""
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    if granularity == 'year':
+        return date(start.year + 1, 1, 1)
+    return start + timedelta(days=1)
+
+
+def bucket_count(start, end, granularity):
+    """Nombre de périodes couvrant [start, end], calculé sans les parcourir"""
+    if granularity == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    if granularity == 'year':
+        return end.year - start.year + 1
+    span = (bucket_start(end, granularity) - bucket_start(start, granularity)).days
+    return span // 7 + 1 if granularity == 'week' else span + 1
+
+
+def iter_buckets(start, end, granularity):
+    """Débuts des périodes couvrant [start, end]"""
+    current = bucket_start(start, granularity)
+    while current <= end:
+        yield current
+        current = next_bucket(current, granularity)
+
+
+# =============================================================================
+# CACHE DES PÉRIODES TERMINÉES
+# =============================================================================
+
+def _generation_key(user_id):
+    return f'summary:{user_id}:generation'
+
+
+def _generation(user_id):
+    return cache.get(_generation_key(user_id), 0)
+
+
+def _bucket_key(user_id, generation, granularity, start):
+    return f'summary:{user_id}:{generation}:{granularity}:{start.isoformat()}'
+
+
+def invalidate_summary_day(user_id, day):
+    """
+    Oublie les périodes en cache de l'utilisateur si ce jour appartient à
+    une période terminée (jour passé) : les périodes en cours ne sont
+    jamais en cache.
+    """
+    if day < timezone.localdate():
+        invalidate_summary([user_id])
+
+
+def invalidate_summary(user_ids):
+    """Oublie toutes les périodes en cache de ces utilisateurs"""
+    for user_id in user_ids:
+        try:
+            cache.incr(_generation_key(user_id))
+        except ValueError:
+            cache.set(_generation_key(user_id), 1, timeout=None)
+
+
+# =============================================================================
+# CALCUL
+# =============================================================================
+
+def compute_buckets(user, granularity, start, end):
+    """{ début de période: { pages, minutes, sessions } } lu en une requête"""
+    queryset = DailyReadingStat.objects.filter(
+        user=user, date__gte=start, date__lte=end, sessions_count__gt=0,
+    )
+    if granularity == 'day':
+        bucket = F('date')
+    else:
+        bucket = TRUNCATE[granularity]('date')
+
+    rows = (
+        queryset
+        .annotate(bucket=bucket)
+        .values('bucket')
+        .annotate(
+            pages=Sum('pages_read'),
+            minutes=Sum('minutes'),
+            sessions=Sum('sessions_count'),
+        )
+        .order_by()
+    )
+    return {
+        row.pop('bucket'): {key: row[key] for key in ('pages', 'minutes', 'sessions')}
+        for row in rows
+    }
+
+
+def reading_summary(user, granularity, start, end, today):
+    """
+    Liste [{ date, pages, minutes, sessions }] de chaque période entre start
+    et end (date : premier jour de la période), périodes vides comprises.
+    """
+    buckets = list(iter_buckets(start, end, granularity))
+    empty = {'pages': 0, 'minutes': 0, 'sessions': 0}
+
+    generation = _generation(user.pk)
+    closed_keys = {
+        bucket: _bucket_key(user.pk, generation, granularity, bucket)
+        for bucket in buckets
+        if next_bucket(bucket, granularity) <= today
+    }
+    cached = cache.get_many(closed_keys.values())
+    values = {
+        bucket: cached[key]
+        for bucket, key in closed_keys.items()
+        if key in cached
+    }
+
+    missing = [bucket for bucket in buckets if bucket not in values]
+    if missing:
+        computed = compute_buckets(
+            user, granularity,
+            missing[0], next_bucket(missing[-1], granularity) - timedelta(days=1),
+        )
+        fresh = {bucket: computed.get(bucket, empty) for bucket in missing}
+        values.update(fresh)
+        # Une écriture validée pendant le calcul a changé la génération :
+        # ces valeurs sont peut-être déjà périmées
+        if _generation(user.pk) == generation:
+            cache.set_many(
+                {
+                    closed_keys[bucket]: counters
+                    for bucket, counters in fresh.items()
+                    if bucket in closed_keys
+                },
+                versioned_timeout(SUMMARY_CACHE_TIMEOUT),
+            )
+
+    return [{'date': bucket, **values[bucket]} for bucket in buckets]
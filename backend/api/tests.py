@@ -1,3 +1,1536 @@
-from django.test import TestCase
+"""
+Tests de l'API Library Tracker
 
-# Create your tests here.
+    python manage.py test api
+"""
+
+import base64
+import csv
+import gzip
+import importlib
+import io
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from unittest import mock, skipIf, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.permissions import IsAdminUser
+from rest_framework.test import APIClient
+from rest_framework.throttling import UserRateThrottle
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import avatars, summary
+from .analytics import WEEKDAYS
+from .authentication import user_cache
+from .avatars import AVATAR_SIZES, generate_thumbnails, orphan_files, thumbnail_name
+from .bench import seed_dataset
+from .blacklist import VERSION_KEY, BlacklistFilter, BloomFilter, FilteredRefreshToken
+from .catalog_cache import bump_catalog_version
+from .dashboard import DASHBOARD_BLOCKS, DashboardAccess
+from .explain import HOT_PATHS, explain_hot_paths, seq_scans
+from .exports import SESSION_EXPORT_FIELDS, USER_BOOK_EXPORT_FIELDS
+from .middleware import QueryBudgetExceeded
+from .models import (
+    Author, Book, DailyReadingStat, LibraryStats, Profile, ReadingGoal, ReadingList, ReadingSession,
+    UserBook,
+)
+from .pagination import KeysetPagination
+from .replicas import (
+    ReplicaRouter, ReplicaRoutingMiddleware, RequestRouting, _current_routing, _sticky_key,
+)
+from .stats import (
+    DAILY_FIELDS, apply_user_book_changes, compute_daily_stats, find_inconsistent_stats,
+    get_library_stats, rebuild_daily_stats,
+)
+from .summary import SUMMARY_MAX_BUCKETS, bucket_count, iter_buckets, reading_summary
+from .views import ReadingGoalViewSet, ReadingSessionViewSet, UserBookViewSet
+
+# Cache partagé entre processus (exigé par certaines fonctions)
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'library-tracker-tests-cache'),
+    }
+}
+
+
+class APITestCase(TestCase):
+    """Client authentifié pour un utilisateur de test"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('lecteur', password='motdepasse-de-test')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_user_book(self, user=None, title='Livre', **fields):
+        return create_user_book(user or self.user, title, **fields)
+
+
+def create_user_book(user, title='Livre', **fields):
+    author = Author.objects.create(name=f'Auteur de {title}')
+    book = Book.objects.create(title=title, author=author, total_pages=300)
+    return UserBook.objects.create(user=user, book=book, **fields)
+
+
+def create_library(user):
+    """Plusieurs lignes par relation : livres, sessions, objectifs, listes"""
+    today = timezone.localdate()
+    user_books = [
+        create_user_book(user, 'Premier', status='en_cours'),
+        create_user_book(user, 'Deuxième', status='en_cours'),
+        create_user_book(user, 'Troisième', status='non_lu'),
+    ]
+    for offset, user_book in enumerate(user_books[:2]):
+        for days in (offset, offset + 3):
+            ReadingSession.objects.create(
+                user_book=user_book, date=today - timedelta(days=days), pages_read=20,
+            )
+    for goal_type in ('pages', 'books'):
+        ReadingGoal.objects.create(
+            user=user, goal_type=goal_type, period='monthly', target=10,
+            start_date=today - timedelta(days=10), end_date=today + timedelta(days=20),
+        )
+    for name in ('À lire', 'Favoris'):
+        reading_list = ReadingList.objects.create(user=user, name=name)
+        reading_list.books.add(*user_books[:2])
+    return user_books
+
+
+# =============================================================================
+# RÉSUMÉ PAR PÉRIODE
+# =============================================================================
+
+class SummaryBucketTests(APITestCase):
+    url = '/api/reading-sessions/summary/'
+
+    def test_bucket_count_matches_iteration(self):
+        start, end = date(2023, 12, 30), date(2026, 3, 2)
+        for granularity in ('day', 'week', 'month', 'year'):
+            with self.subTest(granularity=granularity):
+                self.assertEqual(
+                    bucket_count(start, end, granularity),
+                    len(list(iter_buckets(start, end, granularity))),
+                )
+
+    def test_dates_near_calendar_limits_are_rejected(self):
+        for params in (
+            {'to': '9999-12-31'},
+            {'granularity': 'year', 'from': '9999-01-01', 'to': '9999-12-31'},
+            {'from': '0001-01-01', 'to': '0001-01-05'},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_long_range_is_rejected_before_iterating(self):
+        response = self.client.get(self.url, {'from': '0002-01-01', 'to': '9998-12-31'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(SUMMARY_MAX_BUCKETS), response.data['error'])
+
+    def test_year_range_at_upper_limit(self):
+        response = self.client.get(
+            self.url, {'granularity': 'year', 'from': '9990-01-01', 'to': '9998-12-31'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 9)
+
+
+class SummaryCacheTests(APITestCase):
+    """Périodes terminées en cache et invalidation par génération"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.today = timezone.localdate()
+        self.user_book = self.create_user_book(status='en_cours')
+
+    def summary(self):
+        start = self.today - timedelta(days=6)
+        return reading_summary(self.user, 'day', start, self.today, self.today)
+
+    def log_session(self, day, pages):
+        with self.captureOnCommitCallbacks(execute=True):
+            ReadingSession.objects.create(user_book=self.user_book, date=day, pages_read=pages)
+
+    def test_backdated_session_invalidates_closed_periods(self):
+        yesterday = self.today - timedelta(days=1)
+        self.assertEqual(self.summary()[-2]['pages'], 0)
+        self.log_session(yesterday, 25)
+        self.assertEqual(self.summary()[-2]['pages'], 25)
+
+    def test_stale_values_are_not_cached_after_concurrent_write(self):
+        yesterday = self.today - timedelta(days=1)
+        compute = summary.compute_buckets
+
+        def compute_then_write(*args):
+            # Écriture validée entre le calcul et la mise en cache
+            computed = compute(*args)
+            self.log_session(yesterday, 40)
+            return computed
+
+        with mock.patch.object(summary, 'compute_buckets', compute_then_write):
+            self.assertEqual(self.summary()[-2]['pages'], 0)
+        self.assertEqual(self.summary()[-2]['pages'], 40)
+
+
+class ReadingAnalyticsTests(APITestCase):
+    """Valeurs calculées en base comparées aux sessions du jeu d'essai"""
+
+    # Jours avant aujourd'hui : [(pages, minutes)] ; deux séries, 3 jours
+    # (en cours) et 5 jours (la plus longue), plus un jour hors période
+    SESSIONS = {
+        0: [(10, 20), (6, None)],
+        1: [(20, None)],
+        2: [(30, None)],
+        10: [(40, 70)],
+        11: [(40, None)], 12: [(40, None)], 13: [(40, None)], 14: [(40, None)],
+        40: [(100, 30)],
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.localdate()
+        recent = self.create_user_book(title='Récent', status='en_cours')
+        older = self.create_user_book(title='Ancien', status='en_cours')
+        for offset, sessions in self.SESSIONS.items():
+            for pages, minutes in sessions:
+                ReadingSession.objects.create(
+                    user_book=older if offset == 40 else recent,
+                    date=self.today - timedelta(days=offset), pages_read=pages, duration_minutes=minutes,
+                )
+        # Données d'un autre utilisateur : sans effet
+        other = User.objects.create_user('autre', password='motdepasse-de-test')
+        ReadingSession.objects.create(
+            user_book=create_user_book(other, 'Autre', status='en_cours'), date=self.today, pages_read=200,
+        )
+
+    def analytics(self):
+        response = self.client.get('/api/reading-sessions/analytics/', {'days': 30})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_totals_and_averages(self):
+        data = self.analytics()
+        self.assertEqual(data['from'], self.today - timedelta(days=29))
+        self.assertEqual(data['total_pages'], 266)
+        self.assertEqual(data['active_days'], 8)
+        self.assertEqual(data['pages_per_day'], 8.87)
+        self.assertEqual(data['pages_per_active_day'], 33.25)
+        # Sessions avec une durée : 50 pages en 90 minutes (hors période exclue)
+        self.assertEqual(data['pages_per_minute'], 0.56)
+
+    def test_streaks(self):
+        data = self.analytics()
+        self.assertEqual(data['current_streak'], 3)
+        self.assertEqual(data['current_streak_start'], self.today - timedelta(days=2))
+        self.assertEqual(data['longest_streak'], 5)
+        self.assertEqual(data['longest_streak_start'], self.today - timedelta(days=14))
+        self.assertEqual(data['longest_streak_end'], self.today - timedelta(days=10))
+
+    def test_current_streak_broken(self):
+        ReadingSession.objects.filter(user=self.user, date__gte=self.today - timedelta(days=1)).delete()
+        data = self.analytics()
+        self.assertEqual(data['current_streak'], 0)
+        self.assertIsNone(data['current_streak_start'])
+        self.assertEqual(data['longest_streak'], 5)
+
+    def test_weekday_breakdown_and_heatmap(self):
+        expected = {name: {'pages': 0, 'days': 0} for name in WEEKDAYS}
+        for offset, sessions in self.SESSIONS.items():
+            if offset < 30:
+                row = expected[WEEKDAYS[(self.today - timedelta(days=offset)).weekday()]]
+                row['pages'] += sum(pages for pages, _ in sessions)
+                row['days'] += 1
+
+        data = self.analytics()
+        self.assertEqual(
+            data['by_weekday'],
+            [{'weekday': name, **values} for name, values in expected.items()],
+        )
+        self.assertEqual(data['busiest_weekday'], max(expected, key=lambda name: expected[name]['pages']))
+
+        heatmap = data['heatmap']
+        self.assertEqual([row['date'] for row in heatmap], sorted(
+            self.today - timedelta(days=offset) for offset in self.SESSIONS if offset < 30
+        ))
+        self.assertEqual(heatmap[-1]['pages'], 16)
+        # NTILE(4) sur 8 jours : deux jours par niveau, les moins lus en 1
+        self.assertEqual(sorted(row['level'] for row in heatmap), [1, 1, 2, 2, 3, 3, 4, 4])
+        self.assertEqual({row['pages'] for row in heatmap if row['level'] == 1}, {16, 20})
+
+
+# =============================================================================
+# CACHE DU CATALOGUE
+# =============================================================================
+
+class CatalogCacheTests(APITestCase):
+    """Durée de vie des réponses du catalogue selon le cache"""
+
+    def setUp(self):
+        super().setUp()
+        self.create_user_book()
+
+    def x_cache(self):
+        return [self.client.get('/api/books/')['X-Cache'] for _ in range(2)]
+
+    @override_settings(CACHES=SHARED_CACHES, LOCAL_CACHE_TIMEOUT=0)
+    def test_shared_cache_keeps_catalog_timeout(self):
+        cache.clear()
+        self.assertEqual(self.x_cache(), ['MISS', 'HIT'])
+
+    @override_settings(LOCAL_CACHE_TIMEOUT=0)
+    def test_local_cache_bounded_by_local_timeout(self):
+        cache.clear()
+        self.assertEqual(self.x_cache(), ['MISS', 'MISS'])
+
+
+# =============================================================================
+# RECHERCHE
+# =============================================================================
+
+@skipUnless(connection.vendor == 'postgresql', "Recherche plein texte et trigrammes : PostgreSQL uniquement")
+class SearchTests(APITestCase):
+    """Recherche sans accents et tolérante aux fautes de frappe (unaccent, pg_trgm)"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        for title, author in (
+            ('Les Miserables', 'Victor Hugo'),
+            ('Le Père Goriot', 'Honoré de Balzac'),
+            ('Madame Bovary', 'Gustave Flaubert'),
+            ('Madame Chrysanthème', 'Pierre Loti'),
+            ('Bouvard et Pécuchet', 'Gustave Flaubert'),
+        ):
+            author, _ = Author.objects.get_or_create(name=author)
+            Book.objects.create(title=title, author=author, total_pages=300)
+
+    def titles(self, url, term):
+        response = self.client.get(url, {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [row['book']['title'] if 'book' in row else row['title'] for row in response.data['results']]
+
+    def test_accents_are_ignored(self):
+        for term, title in (
+            ('Misérables', 'Les Miserables'), ('pere goriot', 'Le Père Goriot'), ('PÉCUCHET', 'Bouvard et Pécuchet'),
+        ):
+            with self.subTest(term=term):
+                self.assertEqual(self.titles('/api/books/', term), [title])
+
+    def test_typo_ranks_closest_title_first(self):
+        titles = self.titles('/api/books/', 'madame bovarry')
+        self.assertEqual(titles[0], 'Madame Bovary')
+        self.assertNotIn('Bouvard et Pécuchet', titles)
+
+    def test_user_books_search(self):
+        user_book = UserBook.objects.create(user=self.user, book=Book.objects.get(title='Les Miserables'))
+        other = User.objects.create_user('autre', password='motdepasse-de-test')
+        UserBook.objects.create(user=other, book=Book.objects.get(title='Le Père Goriot'))
+        self.assertEqual(self.titles('/api/my-books/', 'misérable'), [user_book.book.title])
+        self.assertEqual(self.titles('/api/my-books/', 'goriot'), [])
+
+
+# =============================================================================
+# RÉPLICAS
+# =============================================================================
+
+class ReplicaSettingsTests(TestCase):
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'])
+    def test_replicas_require_shared_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ReplicaRoutingMiddleware(lambda request: None)
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'], CACHES=SHARED_CACHES)
+    def test_replicas_with_shared_cache(self):
+        ReplicaRoutingMiddleware(lambda request: None)
+
+
+REPLICA = 'replica_test'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], CACHES=SHARED_CACHES)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Routage des lectures, avec un second alias miroir de default (comme
+    replica_1 en test) : les requêtes SQL sont capturées par alias.
+
+    TransactionTestCase : le réplica est une autre connexion, qui ne voit
+    que les données validées, et le routeur garde sur le primaire les
+    lectures faites dans une transaction ouverte (celle de TestCase).
+    """
+
+    # Résolu dans setUpClass, une fois l'alias ajouté (le lanceur de tests
+    # prépare les bases avant : l'alias n'existe pas encore pour lui)
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        connections.settings[REPLICA] = {
+            **connections['default'].settings_dict,
+            'TEST': {**connections['default'].settings_dict['TEST'], 'MIRROR': 'default'},
+        }
+        cls.addClassCleanup(cls._remove_replica)
+        super().setUpClass()
+
+    @classmethod
+    def _remove_replica(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('lecteur', password='motdepasse-de-test')
+        author = Author.objects.create(name='Auteur')
+        self.book = Book.objects.create(title='Livre', author=author, total_pages=300)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def request(self, method, url, data=None):
+        """(réponse, tables lues sur le primaire, tables lues sur le réplica)"""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = getattr(self.client, method)(url, data, format='json')
+        return response, self._tables(primary), self._tables(replica)
+
+    @staticmethod
+    def _tables(captured):
+        return {
+            table
+            for query in captured.captured_queries
+            for table in ('api_userbook', 'api_book', 'auth_user')
+            if f'"{table}"' in query['sql']
+        }
+
+    def test_get_reads_replica(self):
+        UserBook.objects.create(user=self.user, book=self.book)
+        response, primary, replica = self.request('get', '/api/my-books/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('api_userbook', replica)
+        self.assertNotIn('api_userbook', primary)
+
+    def test_post_stays_on_primary(self):
+        response, primary, replica = self.request('post', '/api/my-books/', {'book_id': self.book.pk})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(replica, set())
+        self.assertIn('api_userbook', primary)
+
+    def test_primary_db_views_and_actions(self):
+        # Catalogue : primary_db = True
+        response, primary, replica = self.request('get', '/api/books/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('api_book', primary)
+        self.assertEqual(replica, set())
+
+        # Ensemble d'actions
+        with mock.patch.object(UserBookViewSet, 'primary_db', {'list'}):
+            response, primary, replica = self.request('get', '/api/my-books/')
+        self.assertIn('api_userbook', primary)
+        self.assertEqual(replica, set())
+
+    def test_reads_stick_to_primary_after_write(self):
+        self.request('post', '/api/my-books/', {'book_id': self.book.pk})
+        response, primary, replica = self.request('get', '/api/my-books/')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIn('api_userbook', primary)
+        self.assertEqual(replica, set())
+
+        # Marque expirée : retour sur le réplica
+        cache.delete(_sticky_key(self.user.pk))
+        response, primary, replica = self.request('get', '/api/my-books/')
+        self.assertIn('api_userbook', replica)
+
+    def test_auth_tables_stay_on_primary(self):
+        response, primary, replica = self.request('get', '/api/my-books/')
+        self.assertIn('auth_user', primary)
+        self.assertNotIn('auth_user', replica)
+
+        token = _current_routing.set(RequestRouting(RequestFactory().get('/api/my-books/')))
+        try:
+            router = ReplicaRouter()
+            self.assertEqual(router.db_for_read(User), 'default')
+            self.assertEqual(router.db_for_read(OutstandingToken), 'default')
+            self.assertEqual(router.db_for_read(BlacklistedToken), 'default')
+            self.assertEqual(router.db_for_read(UserBook), REPLICA)
+        finally:
+            _current_routing.reset(token)
+
+    def test_outside_requests_use_primary(self):
+        self.assertEqual(ReplicaRouter().db_for_read(UserBook), 'default')
+
+
+# =============================================================================
+# IMPORT DE SESSIONS
+# =============================================================================
+
+class SessionImportTests(APITestCase):
+    url = '/api/reading-sessions/import/'
+
+    def setUp(self):
+        super().setUp()
+        self.user_book = self.create_user_book(status='en_cours')
+
+    def test_csv_with_invalid_encoding_is_rejected(self):
+        body = 'user_book,date,pages_read\n'.encode('utf-16')
+        response = self.client.post(self.url, body, content_type='text/csv')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual(response.data['errors'][0]['row'], 1)
+
+    def test_csv_stops_at_invalid_encoding(self):
+        body = (
+            f'user_book,date,pages_read\n{self.user_book.pk},2026-01-02,10\n'.encode()
+            + f'{self.user_book.pk},2026-01-03,10,\xff\n'.encode('latin-1')
+        )
+        response = self.client.post(self.url, body, content_type='text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+
+    def test_ndjson_invalid_line_is_reported(self):
+        line = f'{{"user_book": {self.user_book.pk}, "date": "2026-01-02", "pages_read": 10}}\n'
+        body = line.encode() + b'\xff\xfe{}\n' + line.encode()
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['error_count'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+
+    def test_out_of_range_values_are_reported(self):
+        rows = [
+            {'user_book': self.user_book.pk, 'date': '2026-01-02', 'pages_read': 10},
+            {'user_book': self.user_book.pk, 'date': '2026-01-03', 'pages_read': 99999999999},
+            {'user_book': self.user_book.pk, 'date': '2026-01-04', 'pages_read': 5,
+             'duration_minutes': 99999999999},
+            {'user_book': self.user_book.pk, 'date': '2026-01-05', 'pages_read': 20},
+        ]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(
+            [(error['row'], list(error['errors'])) for error in response.data['errors']],
+            [(2, ['pages_read']), (3, ['duration_minutes'])],
+        )
+        self.assertEqual(ReadingSession.objects.filter(user_book=self.user_book).count(), 2)
+
+
+# =============================================================================
+# IMPORT DU CATALOGUE
+# =============================================================================
+
+class CatalogImportTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write_file(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as stream:
+            stream.write(content.encode() if isinstance(content, str) else content)
+        return path
+
+    def import_catalog(self, *paths):
+        stderr = io.StringIO()
+        call_command('import_catalog', *paths, stdout=io.StringIO(), stderr=stderr)
+        return stderr.getvalue().splitlines()
+
+    def test_authors_and_books_are_deduplicated(self):
+        Author.objects.create(name='Victor Hugo')
+        path = self.write_file('livres.csv', (
+            'title,author,total_pages\n'
+            'Les Misérables,Victor Hugo,1500\n'
+            'les  miserables,VICTOR HUGO,1400\n'
+            'Notre-Dame de Paris,victor hugo,600\n'
+            'Germinal,Émile Zola,500\n'
+            'Germinal,Emile Zola,500\n'
+        ))
+        self.assertEqual(self.import_catalog(path), [])
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertEqual(
+            sorted(Book.objects.values_list('title', 'author__name', 'total_pages')),
+            [('Germinal', 'Émile Zola', 500), ('Les Misérables', 'Victor Hugo', 1500),
+             ('Notre-Dame de Paris', 'Victor Hugo', 600)],
+        )
+
+    def test_rerun_creates_nothing(self):
+        path = self.write_file('livres.jsonl', (
+            '{"title": "Germinal", "author": "Émile Zola", "total_pages": 500}\n'
+            '{"title": "Nana", "author": "Émile Zola", "total_pages": 450}\n'
+        ))
+        self.import_catalog(path)
+        books = list(Book.objects.order_by('pk').values_list('pk', 'title'))
+        self.assertEqual(len(books), 2)
+
+        self.import_catalog(path)
+        self.assertEqual(list(Book.objects.order_by('pk').values_list('pk', 'title')), books)
+        self.assertEqual(Author.objects.count(), 1)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        path = self.write_file('livres.csv', (
+            'title,author,total_pages\n'
+            'Germinal,Émile Zola,500\n'
+            ',Émile Zola,300\n'
+            'Nana,Émile Zola,beaucoup\n'
+            'Thérèse Raquin,Émile Zola,0\n'
+            'La Bête humaine,Émile Zola,99999999999\n'
+            'Nana,Émile Zola,450\n'
+        ))
+        errors = self.import_catalog(path)
+        self.assertEqual(len(errors), 4)
+        self.assertTrue(errors[0].startswith(f'{path}, ligne 2 : '))
+        self.assertIn('total_pages trop grand', errors[3])
+        self.assertEqual(sorted(Book.objects.values_list('title', flat=True)), ['Germinal', 'Nana'])
+
+    def test_non_utf8_file_raises_command_error(self):
+        path = self.write_file('livres.csv', (
+            'title,author,total_pages\nGerminal,Émile Zola,500\n'.encode()
+            + 'Nana,Émile Zola,450\n'.encode('latin-1')
+        ))
+        with self.assertRaisesMessage(CommandError, f'{path}, ligne 3 : fichier non encodé en UTF-8'):
+            self.import_catalog(path)
+
+    def test_malformed_csv_raises_command_error(self):
+        path = self.write_file('livres.csv', (
+            'title,author,total_pages\n'
+            'Germinal,Émile Zola,500\n'
+            f'"{"x" * 200000}",Émile Zola,300\n'
+        ))
+        with self.assertRaisesMessage(CommandError, f'{path}, ligne 3 : CSV mal formé'):
+            self.import_catalog(path)
+
+
+# =============================================================================
+# EXPORTS
+# =============================================================================
+
+class ExportTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user_book = self.create_user_book(title='Germinal', status='en_cours', comment='Relu, « vraiment »')
+        self.sessions = [
+            ReadingSession.objects.create(
+                user_book=self.user_book, date=date(2026, 1, day), pages_read=10 * day, duration_minutes=day,
+            )
+            for day in (3, 1, 2)
+        ]
+        # Données d'un autre utilisateur : jamais exportées
+        other = User.objects.create_user('autre', password='motdepasse-de-test')
+        ReadingSession.objects.create(
+            user_book=create_user_book(other, 'Nana', status='en_cours'), date=date(2026, 1, 1), pages_read=5,
+        )
+
+    def export(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_my_books_csv(self):
+        response, content = self.export('/api/my-books/export/', output='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(rows[0], list(USER_BOOK_EXPORT_FIELDS))
+        self.assertEqual(len(rows), 2)
+        row = dict(zip(rows[0], rows[1]))
+        self.user_book.refresh_from_db()
+        self.assertEqual(row['id'], str(self.user_book.pk))
+        self.assertEqual(row['title'], 'Germinal')
+        self.assertEqual(row['pages_read'], '60')
+        self.assertEqual(row['comment'], 'Relu, « vraiment »')
+        self.assertEqual(row['rating'], '')
+        self.assertEqual(row['date_added'], self.user_book.date_added.isoformat())
+
+    def test_sessions_ndjson(self):
+        response, content = self.export('/api/reading-sessions/export/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(
+            [(line['date'], line['pages_read'], line['title']) for line in lines],
+            [('2026-01-01', 10, 'Germinal'), ('2026-01-02', 20, 'Germinal'), ('2026-01-03', 30, 'Germinal')],
+        )
+        self.assertEqual(set(lines[0]), set(SESSION_EXPORT_FIELDS))
+
+    def test_gzip_matches_plain_output(self):
+        _, plain = self.export('/api/reading-sessions/export/', output='csv')
+        # Petits morceaux : plusieurs vidages du compresseur
+        with mock.patch('api.exports.EXPORT_BUFFER_SIZE', 64):
+            response, compressed = self.export('/api/reading-sessions/export/', output='csv', gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertRegex(response['Content-Disposition'], r'reading-sessions-\d{8}\.csv\.gz"$')
+        self.assertEqual(gzip.decompress(compressed), plain)
+
+    def test_unknown_output_is_rejected(self):
+        response = self.client.get('/api/my-books/export/', {'output': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+# =============================================================================
+# REQUÊTES GROUPÉES
+# =============================================================================
+
+class BatchTests(TestCase):
+    url = '/api/batch/'
+
+    def setUp(self):
+        self.user = User.objects.create_user('lecteur', password='motdepasse-de-test')
+        self.user_book = create_user_book(self.user, status='en_cours')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def batch(self, requests, atomic=False):
+        response = self.client.post(self.url, {'requests': requests, 'atomic': atomic}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def progress(self, pages_read):
+        return {
+            'method': 'POST', 'path': f'/api/my-books/{self.user_book.pk}/update_progress/',
+            'body': {'pages_read': pages_read},
+        }
+
+    def statuses(self, data):
+        return [entry['status'] for entry in data['responses']]
+
+    def test_mixed_results_without_atomic(self):
+        with mock.patch.object(ReadingGoalViewSet, 'list', side_effect=RuntimeError), \
+                self.assertLogs('api.batch', 'ERROR'):
+            data = self.batch([
+                self.progress(120),
+                self.progress(-1),
+                {'method': 'GET', 'path': '/api/goals/'},
+                {'method': 'GET', 'path': '/api/inconnu/'},
+                {'method': 'GET', 'path': '/api/my-books/'},
+            ])
+        self.assertEqual(self.statuses(data), [200, 400, 500, 404, 200])
+        self.assertNotIn('committed', data)
+        self.user_book.refresh_from_db()
+        self.assertEqual(self.user_book.pages_read, 120)
+
+    def test_atomic_rollback(self):
+        with mock.patch.object(ReadingGoalViewSet, 'list', side_effect=RuntimeError), \
+                self.assertLogs('api.batch', 'ERROR'):
+            data = self.batch([
+                self.progress(120),
+                {'method': 'GET', 'path': '/api/goals/'},
+                {'method': 'GET', 'path': '/api/my-books/'},
+            ], atomic=True)
+        self.assertEqual(self.statuses(data), [200, 500, 200])
+        self.assertIs(data['committed'], False)
+        self.user_book.refresh_from_db()
+        self.assertEqual(self.user_book.pages_read, 0)
+
+        data = self.batch([self.progress(120)], atomic=True)
+        self.assertIs(data['committed'], True)
+        self.user_book.refresh_from_db()
+        self.assertEqual(self.user_book.pages_read, 120)
+
+    def test_streaming_and_nested_batch_rejected(self):
+        data = self.batch([
+            {'method': 'GET', 'path': '/api/my-books/export/?output=csv'},
+            {'method': 'POST', 'path': '/api/batch/', 'body': {'requests': []}},
+        ])
+        self.assertEqual(self.statuses(data), [400, 400])
+
+    def test_subrequests_run_as_caller(self):
+        other = User.objects.create_user('autre', password='motdepasse-de-test')
+        other_book = create_user_book(other, 'Autre')
+        data = self.batch([
+            {'method': 'GET', 'path': '/api/my-books/'},
+            {'method': 'GET', 'path': f'/api/my-books/{other_book.pk}/'},
+        ])
+        self.assertEqual(self.statuses(data), [200, 404])
+        self.assertEqual(
+            [book['id'] for book in data['responses'][0]['body']['results']], [self.user_book.pk],
+        )
+
+
+# =============================================================================
+# PAGINATION PAR CURSEUR
+# =============================================================================
+
+class KeysetPaginationTests(APITestCase):
+
+    def cursor(self, values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def test_pages_follow_each_other(self):
+        for index in range(3):
+            self.create_user_book(title=f'Livre {index}')
+        with mock.patch.object(KeysetPagination, 'page_size', 2):
+            first = self.client.get('/api/my-books/', {'pagination': 'cursor'})
+            second = self.client.get(first.data['next'])
+        self.assertEqual(len(first.data['results']), 2)
+        self.assertEqual(len(second.data['results']), 1)
+        self.assertIsNone(second.data['next'])
+
+    def test_invalid_cursors_are_not_found(self):
+        for cursor in ('pas-du-base64', self.cursor([None, None]), self.cursor([None, 1]), self.cursor(['x'])):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/my-books/', {'pagination': 'cursor', 'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+# =============================================================================
+# GET CONDITIONNELS
+# =============================================================================
+
+class ConditionalGetTests(APITestCase):
+    url = '/api/my-books/'
+
+    def setUp(self):
+        super().setUp()
+        self.user_book = self.create_user_book(status='en_cours')
+
+    def etag(self, url=None):
+        response = self.client.get(url or self.url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def assert_not_modified(self, etag, url=None):
+        response = self.client.get(url or self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def assert_modified(self, etag):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_matching_etag_is_not_modified(self):
+        for url in (self.url, f'{self.url}{self.user_book.pk}/', '/api/reading-sessions/'):
+            with self.subTest(url=url):
+                self.assert_not_modified(self.etag(url), url)
+
+    def test_write_changes_etag(self):
+        etag = self.etag()
+        self.client.post(f'{self.url}{self.user_book.pk}/update_progress/', {'pages_read': 50})
+        self.assert_modified(etag)
+
+    def test_bulk_progress_changes_etag(self):
+        etag = self.etag()
+        response = self.client.post(
+            f'{self.url}bulk_update_progress/', [{'id': self.user_book.pk, 'pages_read': 60}], format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_modified(etag)
+
+    def test_session_import_changes_etag(self):
+        # Import : pages lues recalculées en masse (repair_pages_read)
+        etag = self.etag()
+        response = self.client.post('/api/reading-sessions/import/', [
+            {'user_book': self.user_book.pk, 'date': '2026-01-02', 'pages_read': 10},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assert_modified(etag)
+
+    def test_catalog_version_changes_etag(self):
+        etag = self.etag()
+        bump_catalog_version()
+        self.assert_modified(etag)
+
+    def test_if_modified_since_alone_is_ignored(self):
+        response = self.client.get(self.url)
+        last_modified = response['Last-Modified']
+        # Deux écritures dans la même seconde : même Last-Modified
+        self.client.post(f'{self.url}{self.user_book.pk}/update_progress/', {'pages_read': 50})
+        self.client.post(f'{self.url}{self.user_book.pk}/update_progress/', {'pages_read': 70})
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['pages_read'], 70)
+
+
+# =============================================================================
+# AUTHENTIFICATION
+# =============================================================================
+
+class UserCacheTests(TestCase):
+    """Cache des utilisateurs JWT : seulement avec un cache partagé"""
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user('lecteur', password='motdepasse-de-test')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def get(self):
+        return self.client.get('/api/my-books/')
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_shared_cache_hit_and_invalidation(self):
+        cache.clear()
+        self.get()
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('auth;desc="hit"', response['Server-Timing'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_local_cache_reads_user_every_request(self):
+        self.assertEqual(self.get().status_code, 200)
+        response = self.get()
+        self.assertNotIn('auth;desc=', response.get('Server-Timing', ''))
+
+        # Désactivation vue par un autre processus (aucune invalidation ici)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.get().status_code, 401)
+
+
+# =============================================================================
+# LISTE NOIRE DES JETONS
+# =============================================================================
+
+class BloomFilterTests(TestCase):
+
+    def test_no_false_negative(self):
+        bloom = BloomFilter(5000, 0.001)
+        members = [f'jti-{index}' for index in range(5000)]
+        for value in members:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in members))
+        false_positives = sum(f'autre-{index}' in bloom for index in range(5000))
+        self.assertLess(false_positives, 50)
+
+
+class BlacklistTests(TestCase):
+    """Refresh, logout et filtre de Bloom de la liste noire"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('lecteur', password='motdepasse-de-test')
+        self.client = APIClient()
+        self.filter = BlacklistFilter()
+        patcher = mock.patch('api.blacklist.blacklist_filter', self.filter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def refresh_token(self):
+        return str(FilteredRefreshToken.for_user(self.user))
+
+    def refresh(self, token):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/token/refresh/', {'refresh': token}, format='json')
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_rotated_token_rejected_through_filter(self):
+        cache.clear()
+        token = self.refresh_token()
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh'], token)
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.filter.stats()['positives'], 1)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+
+    def test_local_cache_checks_database(self):
+        token = self.refresh_token()
+        self.assertEqual(self.refresh(token).status_code, 200)
+        # Filtre d'un autre processus, sans l'ajout : la base décide
+        with mock.patch.object(self.filter, 'might_contain', return_value=False) as might_contain:
+            self.assertEqual(self.refresh(token).status_code, 401)
+        might_contain.assert_not_called()
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_sync_on_version_change_and_rebuild(self):
+        cache.clear()
+        token = FilteredRefreshToken.for_user(self.user)
+        jti = token[api_settings.JTI_CLAIM]
+        self.assertFalse(self.filter.might_contain(jti))
+
+        # Ajout par un autre processus : ligne validée puis version changée
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=jti))
+        self.assertFalse(self.filter.might_contain(jti))
+        cache.set(VERSION_KEY, 42, timeout=None)
+        self.assertTrue(self.filter.might_contain(jti))
+
+        # Reconstruction : jetons expirés retirés
+        OutstandingToken.objects.filter(jti=jti).update(expires_at=timezone.now() - timedelta(days=1))
+        self.filter.rebuild()
+        self.assertEqual(self.filter.stats()['entries'], 0)
+
+    def test_logout_blacklists_token(self):
+        token = self.refresh_token()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/logout/', {'refresh': token}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(BlacklistedToken.objects.filter(token__token=token).exists())
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+
+class PruneTokensTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user('lecteur', password='motdepasse-de-test')
+        now = timezone.now()
+
+        def outstanding(name, expires_at, blacklisted):
+            token = OutstandingToken.objects.create(
+                user=user, jti=name, token=name, created_at=now - timedelta(days=8), expires_at=expires_at,
+            )
+            if blacklisted:
+                BlacklistedToken.objects.create(token=token)
+
+        for index in range(5):
+            outstanding(f'expire-{index}', now - timedelta(days=1), blacklisted=index < 3)
+        outstanding('valide-0', now + timedelta(days=1), blacklisted=True)
+        outstanding('valide-1', now + timedelta(days=1), blacklisted=False)
+
+    def test_dry_run(self):
+        stdout = io.StringIO()
+        call_command('prune_tokens', '--dry-run', stdout=stdout)
+        self.assertIn('5 jeton(s) expiré(s), dont 3 en liste noire', stdout.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 7)
+
+    def test_deletes_only_expired_in_batches(self):
+        stderr = io.StringIO()
+        call_command('prune_tokens', '--batch-size', '2', stdout=io.StringIO(), stderr=stderr)
+        self.assertEqual(len(stderr.getvalue().splitlines()), 3)
+        self.assertEqual(
+            sorted(OutstandingToken.objects.values_list('jti', flat=True)), ['valide-0', 'valide-1'],
+        )
+        self.assertEqual(
+            list(BlacklistedToken.objects.values_list('token__jti', flat=True)), ['valide-0'],
+        )
+
+
+# =============================================================================
+# BUDGETS DE REQUÊTES
+# =============================================================================
+
+def assert_within_budget(test, client, method, url, data=None):
+    """Appel d'un endpoint budgété ; en mode strict, un dépassement lève QueryBudgetExceeded"""
+    with test.assertLogs('api.requests', level='INFO') as logs:
+        response = getattr(client, method)(url, data, format='json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+    test.assertLess(response.status_code, 300)
+    record = json.loads(logs.records[-1].getMessage())
+    test.assertIn('query_budget', record)
+    test.assertLessEqual(record['queries'], record['query_budget'])
+    return response
+
+
+@override_settings(REQUEST_METRICS_STRICT=True)
+class QueryBudgetTests(TestCase):
+    """
+    Chaque action qui déclare un query_budget, authentification JWT
+    comprise (cache utilisateur vide) et plusieurs lignes par relation :
+    un N+1 ou un dépassement de budget fait échouer le test.
+    """
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user('lecteur', password='motdepasse-de-test')
+        self.user_books = create_library(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_catalog(self):
+        book = self.user_books[0].book
+        for url in (
+            '/api/books/', '/api/books/?pagination=cursor', f'/api/books/{book.pk}/',
+            '/api/authors/', f'/api/authors/{book.author_id}/',
+        ):
+            with self.subTest(url=url):
+                assert_within_budget(self, self.client, 'get', url)
+
+    def test_my_books(self):
+        user_book = self.user_books[0]
+        for url in (
+            '/api/my-books/', '/api/my-books/?pagination=cursor', f'/api/my-books/{user_book.pk}/',
+            '/api/my-books/stats/', '/api/my-books/export/?output=csv',
+        ):
+            with self.subTest(url=url):
+                assert_within_budget(self, self.client, 'get', url)
+        assert_within_budget(
+            self, self.client, 'post', f'/api/my-books/{user_book.pk}/update_progress/', {'pages_read': 80},
+        )
+        assert_within_budget(
+            self, self.client, 'post', '/api/my-books/bulk_update_progress/',
+            [{'id': user_book.pk, 'pages_read': 90} for user_book in self.user_books],
+        )
+
+    def test_goals_and_lists(self):
+        goal = ReadingGoal.objects.filter(user=self.user).first()
+        reading_list = ReadingList.objects.filter(user=self.user).first()
+        for url in (
+            '/api/goals/', f'/api/goals/{goal.pk}/', f'/api/goals/{goal.pk}/progress/',
+            '/api/lists/', f'/api/lists/{reading_list.pk}/', f'/api/lists/{reading_list.pk}/books/',
+        ):
+            with self.subTest(url=url):
+                assert_within_budget(self, self.client, 'get', url)
+
+    def test_reading_sessions(self):
+        reading_session = ReadingSession.objects.filter(user=self.user).first()
+        for url in (
+            '/api/reading-sessions/', '/api/reading-sessions/?pagination=cursor',
+            f'/api/reading-sessions/?user_book={reading_session.user_book_id}',
+            f'/api/reading-sessions/{reading_session.pk}/',
+            '/api/reading-sessions/summary/?granularity=week&days=60',
+            '/api/reading-sessions/analytics/', '/api/reading-sessions/export/?output=csv',
+        ):
+            with self.subTest(url=url):
+                assert_within_budget(self, self.client, 'get', url)
+
+    def test_first_progress_of_the_day(self):
+        # Ligne du jour absente : créée par la première écriture
+        first, second, third = UserBook.objects.filter(user=self.user).order_by('pk')
+        DailyReadingStat.objects.filter(user=self.user).delete()
+        assert_within_budget(
+            self, self.client, 'post', f'/api/my-books/{first.pk}/update_progress/',
+            {'pages_read': first.book.total_pages},
+        )
+
+        DailyReadingStat.objects.filter(user=self.user).delete()
+        assert_within_budget(
+            self, self.client, 'post', '/api/my-books/bulk_update_progress/',
+            [{'id': second.pk, 'pages_read': 100}, {'id': third.pk, 'pages_read': third.book.total_pages}],
+        )
+        self.assertEqual(
+            DailyReadingStat.objects.values_list('manual_pages', 'books_finished').get(user=self.user),
+            (100 - second.pages_read + third.book.total_pages, 1),
+        )
+
+    def test_streamed_queries_are_counted_at_end_of_stream(self):
+        url = '/api/reading-sessions/export/?output=csv'
+        response = assert_within_budget(self, self.client, 'get', url)
+        self.assertIn('Server-Timing', response)
+
+        with mock.patch.object(ReadingSessionViewSet, 'query_budget', {'export': 1}):
+            # Requêtes du flux exécutées après le retour de la vue
+            with self.assertNoLogs('api.requests', level='INFO'):
+                response = self.client.get(url)
+            with self.assertLogs('api.requests', level='WARNING') as logs, \
+                    self.assertRaises(QueryBudgetExceeded):
+                b''.join(response.streaming_content)
+            self.assertTrue(json.loads(logs.records[0].getMessage())['streaming'])
+
+
+@override_settings(REQUEST_METRICS_STRICT=True)
+class DashboardBudgetTests(TransactionTestCase):
+    """
+    Tableau de bord : blocs lus en séquence ou dans les threads du pool
+    (données validées, visibles de leurs connexions)
+    """
+
+    def test_dashboard(self):
+        user = User.objects.create_user('lecteur', password='motdepasse-de-test')
+        create_library(user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        for parallel in (False, True):
+            cache.clear()
+            user_cache.clear()
+            with self.subTest(parallel=parallel), \
+                    mock.patch('api.dashboard._parallel_blocks', return_value=parallel):
+                response = assert_within_budget(self, client, 'get', '/api/dashboard/')
+                data = response.json()
+                self.assertEqual(len(data['in_progress']), 2)
+                self.assertEqual(len(data['goals']), 2)
+                self.assertEqual(len(data['recent_sessions']), 4)
+
+    def test_dashboard_new_user(self):
+        user = User.objects.create_user('nouveau', password='motdepasse-de-test')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        for parallel in (False, True):
+            with self.subTest(parallel=parallel), \
+                    mock.patch('api.dashboard._parallel_blocks', return_value=parallel):
+                response = assert_within_budget(self, client, 'get', '/api/dashboard/')
+                self.assertEqual(response.json()['stats']['total'], 0)
+
+
+class OneRequestThrottle(UserRateThrottle):
+    rate = '1/min'
+
+
+class DashboardAccessTests(TransactionTestCase):
+    """Tableau de bord : contrôles d'accès de DRF"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('lecteur', password='motdepasse-de-test')
+        self.client = APIClient()
+
+    def test_unauthenticated(self):
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+
+    def test_permission_classes(self):
+        self.client.force_authenticate(self.user)
+        with mock.patch.object(DashboardAccess, 'permission_classes', [IsAdminUser]):
+            self.assertEqual(self.client.get('/api/dashboard/').status_code, 403)
+
+    def test_throttle_classes(self):
+        self.client.force_authenticate(self.user)
+        with mock.patch.object(DashboardAccess, 'throttle_classes', [OneRequestThrottle]):
+            self.assertEqual(self.client.get('/api/dashboard/').status_code, 200)
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+# =============================================================================
+# PLANS D'EXÉCUTION
+# =============================================================================
+
+class ExplainHotPathsTests(TestCase):
+
+    def test_seq_scans_filter(self):
+        nodes = [
+            {'Node Type': 'Seq Scan', 'Relation Name': 'api_book', 'Actual Rows': 10,
+             'Actual Loops': 2, 'Rows Removed by Filter': 600, 'Filter': '(title ~~ ...)'},
+            {'Node Type': 'Seq Scan', 'Relation Name': 'api_author', 'Actual Rows': 900},
+            {'Node Type': 'Index Scan', 'Relation Name': 'api_userbook', 'Index Name': 'api_userbook_pkey'},
+        ]
+        self.assertEqual(seq_scans(nodes, min_rows=1000), [
+            {'table': 'api_book', 'rows': 1220, 'removed': 1200, 'filter': '(title ~~ ...)'},
+        ])
+        self.assertEqual(seq_scans(nodes, min_rows=2000), [])
+
+    @skipIf(connection.vendor == 'postgresql', "Refus propre hors PostgreSQL")
+    def test_command_requires_postgresql(self):
+        with self.assertRaisesMessage(CommandError, 'PostgreSQL uniquement'):
+            call_command('explain_hot_paths', stdout=io.StringIO(), stderr=io.StringIO())
+
+    @skipUnless(connection.vendor == 'postgresql', "EXPLAIN ANALYZE : PostgreSQL uniquement")
+    def test_hot_paths_are_explained(self):
+        # Petit jeu de données dans la base de test (la commande crée la sienne)
+        seed_dataset(users=3, books=30, sessions=200, books_per_user=10)
+        results = explain_hot_paths()
+        self.assertEqual(
+            set(results),
+            {name for name, _ in HOT_PATHS} | {f'dashboard.{name}' for name in DASHBOARD_BLOCKS},
+        )
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertTrue(result['queries'])
+                for query in result['queries']:
+                    self.assertGreaterEqual(query['execution_ms'], 0)
+                    self.assertIsInstance(query['seq_scans'], list)
+
+
+# =============================================================================
+# COMPTEURS DÉNORMALISÉS
+# =============================================================================
+
+class LibraryStatsTests(TestCase):
+    """LibraryStats tenu par différence, comparé à chaque étape à un recomptage complet"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('lecteur', password='motdepasse-de-test')
+        get_library_stats(self.user)
+
+    def assert_consistent(self):
+        self.assertEqual(find_inconsistent_stats([self.user.pk]), [])
+        stored = {
+            (row.pop('user_id'), row.pop('date')): row
+            for row in DailyReadingStat.objects.filter(user=self.user)
+            .values('user_id', 'date', *DAILY_FIELDS)
+            if any(row[field] for field in DAILY_FIELDS)
+        }
+        self.assertEqual(stored, dict(compute_daily_stats([self.user.pk])))
+
+    def stats(self):
+        return get_library_stats(self.user).as_dict()
+
+    def test_create_status_change_and_delete(self):
+        first = create_user_book(self.user, 'Premier')
+        second = create_user_book(self.user, 'Deuxième', pages_read=40)
+        self.assert_consistent()
+        self.assertEqual(self.stats()['total'], 2)
+
+        first.pages_read = 300
+        first.save()
+        second.status = UserBook.Status.NON_LU
+        second.pages_read = 0
+        second.save()
+        self.assert_consistent()
+
+        first.delete()
+        self.assert_consistent()
+        self.assertEqual(self.stats()['total'], 1)
+
+    def test_sessions_update_pages_read(self):
+        user_book = create_user_book(self.user)
+        session = ReadingSession.objects.create(
+            user_book=user_book, date=timezone.localdate(), pages_read=120,
+        )
+        self.assert_consistent()
+        session.pages_read = 300
+        session.save()
+        self.assert_consistent()
+        session.delete()
+        self.assert_consistent()
+
+    def test_apply_user_book_changes_after_bulk_update(self):
+        create_user_book(self.user, 'Premier')
+        create_user_book(self.user, 'Deuxième', pages_read=300)
+        create_user_book(self.user, 'Troisième', pages_read=10)
+
+        changed = list(UserBook.objects.filter(user=self.user).select_related('book'))
+        for user_book, pages_read in zip(changed, (300, 50, 0)):
+            user_book.pages_read = pages_read
+            if pages_read == 0:
+                user_book.status = UserBook.Status.NON_LU
+            user_book.refresh_status()
+        UserBook.objects.bulk_update(changed, ['pages_read', 'status', 'finished_on'])
+        apply_user_book_changes(self.user.pk, changed)
+        self.assert_consistent()
+
+        # État mémorisé : un second passage sans changement ne modifie rien
+        apply_user_book_changes(self.user.pk, changed)
+        self.assert_consistent()
+
+    def test_missing_row_is_rebuilt(self):
+        LibraryStats.objects.filter(user=self.user).delete()
+        create_user_book(self.user, pages_read=30)
+        self.assert_consistent()
+
+    def test_row_created_with_user(self):
+        user = User.objects.create_user('nouveau', password='motdepasse-de-test')
+        self.assertEqual(LibraryStats.objects.get(user=user).total, 0)
+
+    def test_missing_row_is_rebuilt_on_read(self):
+        create_user_book(self.user, pages_read=30)
+        LibraryStats.objects.filter(user=self.user).delete()
+        self.assertEqual(self.stats()['pages_lues'], 30)
+        self.assert_consistent()
+
+
+class PagesGoalTests(APITestCase):
+    """Objectif de pages : sessions et progression saisie hors sessions"""
+
+    def setUp(self):
+        super().setUp()
+        today = timezone.localdate()
+        self.goal = ReadingGoal.objects.create(
+            user=self.user, goal_type='pages', period='monthly', target=500,
+            start_date=today - timedelta(days=10), end_date=today + timedelta(days=20),
+        )
+
+    def current_value(self):
+        return ReadingGoal.objects.get(pk=self.goal.pk).current_value
+
+    def test_update_progress_counts(self):
+        user_book = self.create_user_book()
+        url = f'/api/my-books/{user_book.pk}/update_progress/'
+        self.assertEqual(self.client.post(url, {'pages_read': 120}).status_code, 200)
+        self.assertEqual(self.current_value(), 120)
+
+        # Correction à la baisse : retirée de l'objectif
+        self.client.post(url, {'pages_read': 80})
+        self.assertEqual(self.current_value(), 80)
+
+    def test_bulk_update_progress_counts(self):
+        first = self.create_user_book(title='Premier')
+        second = self.create_user_book(title='Deuxième', pages_read=10)
+        response = self.client.post('/api/my-books/bulk_update_progress/', [
+            {'id': first.pk, 'pages_read': 50},
+            {'id': second.pk, 'pages_read': 40},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.current_value(), 90)
+
+    def test_sessions_count_once(self):
+        user_book = self.create_user_book()
+        ReadingSession.objects.create(
+            user_book=user_book, date=timezone.localdate() - timedelta(days=2), pages_read=30,
+        )
+        self.assertEqual(self.current_value(), 30)
+        self.assertFalse(DailyReadingStat.objects.exclude(manual_pages=0).exists())
+
+    def test_rebuild_keeps_manual_pages(self):
+        user_book = self.create_user_book()
+        user_book.pages_read = 70
+        user_book.save()
+        rebuild_daily_stats([self.user.pk])
+        self.assertEqual(self.current_value(), 70)
+
+    def test_outside_period_ignored(self):
+        user_book = self.create_user_book()
+        user_book.pages_read = 70
+        user_book.save()
+        self.goal.start_date = self.goal.end_date = timezone.localdate() + timedelta(days=1)
+        self.goal.save()
+        self.assertEqual(self.current_value(), 0)
+
+
+# =============================================================================
+# AVATARS
+# =============================================================================
+
+class InlineExecutor:
+    """Pool de threads exécuté dans le thread du test (dont la connexion reste ouverte)"""
+
+    def submit(self, function, *args):
+        with mock.patch('api.avatars.close_old_connections'):
+            function(*args)
+
+
+def image_upload(color, name='avatar.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (500, 400), color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class AvatarTests(APITestCase):
+    """Miniatures replanifiées à la lecture, fichiers orphelins"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        for patcher in (
+            override_settings(MEDIA_ROOT=media_root.name),
+            mock.patch('api.avatars._get_executor', return_value=InlineExecutor()),
+        ):
+            patcher.__enter__()
+            self.addCleanup(patcher.__exit__, None, None, None)
+        avatars._failed.clear()
+
+    def upload(self, color):
+        # Sans commit (TestCase) : la génération planifiée après le commit
+        # est perdue, comme lors d'un redémarrage
+        response = self.client.patch('/api/profile/', {'avatar': image_upload(color)}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        return Profile.objects.get(user=self.user)
+
+    def test_lost_generation_rescheduled_on_read(self):
+        profile = self.upload('red')
+        self.assertFalse(profile.avatar_ready)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get('/api/profile/')
+        profile.refresh_from_db()
+        self.assertTrue(profile.avatar_ready)
+        for size in AVATAR_SIZES.values():
+            self.assertTrue(default_storage.exists(thumbnail_name(profile.avatar_hash, size)))
+
+    def test_failed_generation_not_retried_on_read(self):
+        profile = self.upload('red')
+        with default_storage.open(profile.avatar.name, 'wb') as file:
+            file.write(b'pas une image')
+
+        with self.assertLogs('api.avatars', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            self.client.get('/api/profile/')
+        with mock.patch('api.avatars.generate_thumbnails') as generate, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.client.get('/api/profile/')
+        generate.assert_not_called()
+
+    def test_orphan_files(self):
+        first = self.upload('red')
+        generate_thumbnails(first.avatar_hash)
+        second = self.upload('blue')
+        generate_thumbnails(second.avatar_hash)
+
+        expected = {first.avatar.name} | {
+            thumbnail_name(first.avatar_hash, size) for size in AVATAR_SIZES.values()
+        }
+        self.assertEqual(set(orphan_files(grace=timedelta(0))), expected)
+        # Fichiers récents : envoi peut-être en cours
+        self.assertEqual(orphan_files(), [])
+
+        with mock.patch('api.management.commands.generate_avatars.orphan_files',
+                        return_value=sorted(expected)):
+            call_command('generate_avatars', stdout=io.StringIO())
+        self.assertFalse(any(default_storage.exists(name) for name in expected))
+        self.assertTrue(default_storage.exists(second.avatar.name))
+        self.assertEqual(orphan_files(grace=timedelta(0)), [])
+
+
+# =============================================================================
+# PROPRIÉTAIRE DES SESSIONS (ReadingSession.user)
+# =============================================================================
+
+class SessionOwnerTests(APITestCase):
+
+    def test_user_follows_user_book(self):
+        other = User.objects.create_user('autre', password='motdepasse-de-test')
+        session = ReadingSession.objects.create(
+            user_book=self.create_user_book(), date=timezone.localdate(), pages_read=10,
+        )
+        self.assertEqual(session.user_id, self.user.pk)
+
+        session.user_book = create_user_book(other, 'Autre livre')
+        session.save(update_fields=['user_book'])
+        session.refresh_from_db()
+        self.assertEqual(session.user_id, other.pk)
+
+    def test_import_sets_user(self):
+        user_book = self.create_user_book()
+        response = self.client.post(
+            '/api/reading-sessions/import/',
+            [{'user_book': user_book.pk, 'date': '2026-01-02', 'pages_read': 10},
+             {'user_book': user_book.pk, 'date': '2026-01-03', 'pages_read': 15}],
+            format='json',
+        )
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(
+            set(ReadingSession.objects.values_list('user_id', flat=True)), {self.user.pk},
+        )
+
+
+class SessionOwnerBackfillTests(TransactionTestCase):
+    """Migration 0015 : sessions existantes rattachées au propriétaire de leur livre"""
+
+    before = [('api', '0014_readingsession_user')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_backfill(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        Author = apps.get_model('api', 'Author')
+        Book = apps.get_model('api', 'Book')
+        UserBook = apps.get_model('api', 'UserBook')
+        ReadingSession = apps.get_model('api', 'ReadingSession')
+        User = apps.get_model('auth', 'User')
+
+        author = Author.objects.create(name='Auteur')
+        book = Book.objects.create(title='Livre', author=author, total_pages=300)
+        expected = {}
+        for username in ('premier', 'second'):
+            user = User.objects.create(username=username)
+            user_book = UserBook.objects.create(user=user, book=book)
+            for day in range(1, 4):
+                session = ReadingSession.objects.create(
+                    user_book=user_book, date=date(2026, 1, day), pages_read=10,
+                )
+                expected[session.pk] = user.pk
+
+        # Plusieurs tranches
+        backfill = importlib.import_module('api.migrations.0015_backfill_readingsession_user')
+        with mock.patch.object(backfill, 'BACKFILL_BATCH_SIZE', 2):
+            executor = MigrationExecutor(connection)
+            executor.migrate(executor.loader.graph.leaf_nodes())
+
+        self.assertEqual(
+            dict(ReadingSession.objects.values_list('pk', 'user_id')), expected,
+        )
@@ -1,14 +1,16 @@
 # backend/api/urls.py
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenBlacklistView, TokenObtainPairView, TokenRefreshView
 from django.conf import settings
 from django.conf.urls.static import static
 from .views import (
     RegisterView, AuthorViewSet, BookViewSet,
     UserBookViewSet, ReadingGoalViewSet, ReadingListViewSet,
-    ProfileView, ReadingSessionViewSet
+    ProfileView, ReadingSessionViewSet, BatchView
 )
+from .dashboard import dashboard
+from .avatars import avatar_file
 
 router = DefaultRouter()
 router.register('authors', AuthorViewSet)
@@ -22,7 +24,14 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', TokenObtainPairView.as_view(), name='login'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('logout/', TokenBlacklistView.as_view(), name='logout'),
     path('profile/', ProfileView.as_view(), name='profile'),
+    path('dashboard/', dashboard, name='dashboard'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    re_path(
+        r'^avatars/(?P<digest>[0-9a-f]{64})-(?P<size>[0-9]+)\.jpg$',
+        avatar_file, name='avatar',
+    ),
     path('', include(router.urls)),
 ]
 
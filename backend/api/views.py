@@ -9,11 +9,17 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.contrib.auth.models import User
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Case, Count, F, Prefetch, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import timedelta
 
-from .models import Author, Book, UserBook, ReadingGoal, ReadingList, Profile, ReadingSession
+from .models import (
+    Author, Book, UserBook, ReadingGoal, ReadingList,
+    Profile, ReadingSession
+)
 from .serializers import (
     UserSerializer,
     AuthorSerializer,
@@ -21,9 +27,25 @@ from .serializers import (
     UserBookSerializer,
     ReadingGoalSerializer,
     ReadingListSerializer,
+    ReadingListSummarySerializer,
     ProfileSerializer,
     ReadingSessionSerializer,
+    ProgressUpdateSerializer,
+    BatchSerializer,
+)
+from .stats import apply_user_book_changes, get_library_stats
+from .imports import iter_import_rows, import_reading_sessions
+from .search import BookSearchFilter
+from .catalog_cache import CatalogCacheMixin
+from .conditional import ConditionalGetMixin, bump_user_data_version
+from .analytics import ANALYTICS_DEFAULT_DAYS, ANALYTICS_MAX_DAYS, reading_analytics
+from .summary import (
+    GRANULARITIES as SUMMARY_GRANULARITIES, SUMMARY_MAX_BUCKETS, SUMMARY_MAX_DATE, SUMMARY_MIN_DATE,
+    bucket_count, reading_summary,
 )
+from .exports import SESSION_EXPORT_FIELDS, USER_BOOK_EXPORT_FIELDS, export_response
+from .batch import run_batch
+from .avatars import set_avatar
 
 
 # =============================================================================
@@ -46,7 +68,7 @@ class RegisterView(generics.CreateAPIView):
 # 4.2 AUTHOR VIEWSET
 # =============================================================================
 
-class AuthorViewSet(viewsets.ModelViewSet):
+class AuthorViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     """
     CRUD pour les auteurs
     
@@ -55,16 +77,21 @@ class AuthorViewSet(viewsets.ModelViewSet):
     GET    /api/authors/{id}/ → Détail d'un auteur
     PUT    /api/authors/{id}/ → Modifier un auteur
     DELETE /api/authors/{id}/ → Supprimer un auteur
+
+    Les lectures (liste / détail) sont servies depuis le cache du catalogue.
     """
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
 
+    # Requêtes SQL par action, authentification comprise (api.middleware)
+    query_budget = {'list': 3, 'retrieve': 2}
+
 
 # =============================================================================
 # 4.3 BOOK VIEWSET (Catalogue)
 # =============================================================================
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     """
     CRUD pour les livres (catalogue)
     
@@ -73,20 +100,26 @@ class BookViewSet(viewsets.ModelViewSet):
     GET    /api/books/{id}/ → Détail d'un livre
     PUT    /api/books/{id}/ → Modifier un livre
     DELETE /api/books/{id}/ → Supprimer un livre
+
+    GET    /api/books/?pagination=cursor → pagination par curseur (titre, id)
+
+    Les lectures (liste / détail) sont servies depuis le cache du catalogue.
     """
     queryset = Book.objects.select_related('author').all()
     serializer_class = BookSerializer
+    keyset_ordering = ('title', 'id')
+    query_budget = {'list': 3, 'retrieve': 2}
 
-    # Filtres et recherche
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    # Filtres et recherche (plein texte + trigrammes, triée par pertinence)
+    filter_backends = [DjangoFilterBackend, BookSearchFilter]
     filterset_fields = ['author']        # ?author=1
-    search_fields = ['title']            # ?search=titre
+    search_book_path = ''                # ?search=titre ou auteur
 
 # =============================================================================
 # 4.4 USERBOOK VIEWSET (Bibliothèque personnelle)
 # =============================================================================
 
-class UserBookViewSet(viewsets.ModelViewSet):
+class UserBookViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Gestion de la bibliothèque personnelle de l'utilisateur
     
@@ -98,15 +131,33 @@ class UserBookViewSet(viewsets.ModelViewSet):
     
     Actions personnalisées :
     POST   /api/my-books/{id}/update_progress/ → Mettre à jour les pages lues
+    POST   /api/my-books/bulk_update_progress/ → Idem pour plusieurs livres
     GET    /api/my-books/stats/                → Statistiques de lecture
+    GET    /api/my-books/export/               → Export NDJSON / CSV (en flux)
+
+    GET    /api/my-books/?pagination=cursor → pagination par curseur (ajout le plus récent d'abord)
+
+    Liste et détail : ETag / Last-Modified, 304 si rien n'a changé.
     """
     serializer_class = UserBookSerializer
+    keyset_ordering = ('-date_added', '-id')
+    # update_progress / bulk_update_progress : pire cas, première progression
+    # du jour (ligne DailyReadingStat créée : point de sauvegarde + INSERT)
+    query_budget = {
+        'list': 4, 'retrieve': 3, 'stats': 2,
+        'update_progress': 9, 'bulk_update_progress': 11, 'export': 3,
+    }
+    # Lectures sur le primaire même avec des réplicas (api/replicas.py)
+    primary_db = {'update_progress', 'bulk_update_progress'}
 
     # Filtres et recherche
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, BookSearchFilter]
     filterset_fields = ['status', 'is_favorite', 'rating'] # ?status=lu&is_favorite=True&rating=5
     filterset_fields = ['status']  # ?status=lu
-    search_fields = ['book__title', 'book__author__name']  # ?search=mot
+    search_book_path = 'book__'    # ?search=mot (titre ou auteur)
+
+    # Nombre maximal de livres par appel à bulk_update_progress
+    bulk_progress_max_items = 500
     
     def get_queryset(self):
         """Retourne uniquement les livres de l'utilisateur connecté"""
@@ -162,6 +213,87 @@ class UserBookViewSet(viewsets.ModelViewSet):
         
         return Response(UserBookSerializer(user_book).data)
     
+    @action(detail=False, methods=['post'])
+    def bulk_update_progress(self, request):
+        """
+        Mettre à jour les pages lues de plusieurs livres en une requête
+
+        POST /api/my-books/bulk_update_progress/
+        Body: [ { "id": 12, "pages_read": 150 }, { "id": 15, "pages_read": 30 } ]
+
+        Chaque élément est validé séparément : la réponse contient un
+        résultat par élément, dans l'ordre reçu. Les livres sont lus en une
+        requête et écrits en un seul bulk_update.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {"error": "Le corps doit être une liste de { id, pages_read }."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.bulk_progress_max_items:
+            return Response(
+                {"error": f"{self.bulk_progress_max_items} livres au maximum par requête."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = [None] * len(items)
+        updates = {}
+        for index, item in enumerate(items):
+            serializer = ProgressUpdateSerializer(data=item)
+            if not serializer.is_valid():
+                item_id = item.get('id') if isinstance(item, dict) else None
+                results[index] = {'id': item_id, 'ok': False, 'errors': serializer.errors}
+                continue
+            data = serializer.validated_data
+            if data['id'] in updates:
+                results[index] = {'id': data['id'], 'ok': False,
+                                  'errors': {'id': ["Livre présent plusieurs fois dans la requête."]}}
+                continue
+            updates[data['id']] = (index, data['pages_read'])
+
+        with transaction.atomic():
+            user_books = {
+                user_book.pk: user_book
+                for user_book in UserBook.objects
+                .filter(user=request.user, pk__in=updates)
+                .select_related('book')
+                .select_for_update(of=('self',))
+            }
+
+            changed = []
+            for user_book_id, (index, pages_read) in updates.items():
+                user_book = user_books.get(user_book_id)
+                if user_book is None:
+                    results[index] = {'id': user_book_id, 'ok': False,
+                                      'errors': {'id': ["Livre introuvable dans votre bibliothèque."]}}
+                    continue
+                if pages_read > user_book.book.total_pages:
+                    results[index] = {'id': user_book_id, 'ok': False, 'errors': {
+                        'pages_read': [f"'pages_read' ne peut pas dépasser {user_book.book.total_pages}."]
+                    }}
+                    continue
+
+                if pages_read != user_book.pages_read:
+                    user_book.pages_read = pages_read
+                    user_book.refresh_status()
+                    changed.append(user_book)
+                results[index] = {
+                    'id': user_book_id,
+                    'ok': True,
+                    'pages_read': user_book.pages_read,
+                    'status': user_book.status,
+                    'progress': user_book.progress,
+                }
+
+            if changed:
+                # bulk_update n'envoie pas de signaux : compteurs mis à jour ici
+                UserBook.objects.bulk_update(changed, ['pages_read', 'status', 'finished_on'])
+                apply_user_book_changes(request.user.pk, changed)
+                bump_user_data_version([request.user.pk])
+
+        return Response({'updated': len(changed), 'results': results})
+
      # toggle favori
     @action(detail=True, methods=['post'])
     def toggle_favorite(self, request, pk=None):
@@ -170,6 +302,16 @@ class UserBookViewSet(viewsets.ModelViewSet):
         user_book.save()
         return Response({'is_favorite': user_book.is_favorite})
     
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Export de la bibliothèque en flux (filtres de la liste appliqués)
+
+        GET /api/my-books/export/?output=csv&gzip=1
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        return export_response(request, queryset, USER_BOOK_EXPORT_FIELDS, 'my-books')
+
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """
@@ -177,18 +319,11 @@ class UserBookViewSet(viewsets.ModelViewSet):
         
         GET /api/my-books/stats/
         Retourne: { total, lu, en_cours, non_lu, pages_lues }
+
+        Les compteurs sont maintenus dans LibraryStats à chaque modification
+        de la bibliothèque : une seule lecture par clé primaire.
         """
-        queryset = self.get_queryset()
-        
-        stats = {
-            'total': queryset.count(),
-            'lu': queryset.filter(status='lu').count(),
-            'en_cours': queryset.filter(status='en_cours').count(),
-            'non_lu': queryset.filter(status='non_lu').count(),
-            'pages_lues': queryset.aggregate(
-                total=Sum('pages_read')
-            )['total'] or 0
-        }
+        stats = get_library_stats(request.user).as_dict()
         
         return Response(stats)
 
@@ -197,7 +332,7 @@ class UserBookViewSet(viewsets.ModelViewSet):
 # 4.5 READING GOAL VIEWSET (Objectifs)
 # =============================================================================
 
-class ReadingGoalViewSet(viewsets.ModelViewSet):
+class ReadingGoalViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Gestion des objectifs de lecture
     
@@ -208,8 +343,11 @@ class ReadingGoalViewSet(viewsets.ModelViewSet):
     DELETE /api/goals/{id}/ → Supprimer un objectif
 
     GET    /api/goals/{id}/progress/ → Progression d'un objectif
+
+    Liste et détail : ETag / Last-Modified, 304 si rien n'a changé.
     """
     serializer_class = ReadingGoalSerializer
+    query_budget = {'list': 5, 'retrieve': 4, 'progress': 3}
 
     # Filtres
     filter_backends = [DjangoFilterBackend]
@@ -217,7 +355,12 @@ class ReadingGoalViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Retourne uniquement les objectifs de l'utilisateur connecté"""
-        return ReadingGoal.objects.filter(user=self.request.user)
+        queryset = ReadingGoal.objects.filter(user=self.request.user)
+
+        # Lecture : progression de tous les objectifs en une seule requête
+        if self.action in ('list', 'retrieve', 'progress'):
+            queryset = queryset.with_progress()
+        return queryset
     
     def perform_create(self, serializer):
         """Assigne automatiquement l'utilisateur connecté"""
@@ -248,7 +391,7 @@ class ReadingGoalViewSet(viewsets.ModelViewSet):
 # 4.6 READING LIST VIEWSET (Listes de lecture)
 # =============================================================================
 
-class ReadingListViewSet(viewsets.ModelViewSet):
+class ReadingListViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Gestion des listes de lecture personnalisées
     
@@ -261,14 +404,51 @@ class ReadingListViewSet(viewsets.ModelViewSet):
     Actions personnalisées :
     POST   /api/lists/{id}/add_book/    → Ajouter un livre
     POST   /api/lists/{id}/remove_book/ → Retirer un livre
+    GET    /api/lists/{id}/books/       → Livres de la liste (paginés)
+
+    La liste des listes renvoie un résumé (nombre de livres, pages,
+    progression, aperçu de 3 livres) plutôt que tous les livres.
+
+    Liste et détail : ETag / Last-Modified, 304 si rien n'a changé.
     """
     serializer_class = ReadingListSerializer
+
+    # Nombre de livres présentés dans l'aperçu d'une liste
+    preview_size = 3
+
+    query_budget = {'list': 5, 'retrieve': 4, 'books': 4}
     
     def get_queryset(self):
         """Retourne uniquement les listes de l'utilisateur connecté"""
-        return ReadingList.objects.filter(
-            user=self.request.user
-        ).prefetch_related('books', 'books__book', 'books__book__author')
+        queryset = ReadingList.objects.filter(user=self.request.user)
+
+        if self.action == 'list':
+            # Résumé calculé en base + aperçu limité à quelques livres par liste
+            preview = UserBook.objects.select_related('book__author').order_by('id')
+            return queryset.annotate(
+                book_count=Count('books'),
+                total_pages=Coalesce(Sum('books__book__total_pages'), 0),
+                pages_read=Coalesce(Sum('books__pages_read'), 0),
+            ).annotate(
+                completion_percentage=Case(
+                    When(total_pages__gt=0, then=F('pages_read') * 100 / F('total_pages')),
+                    default=Value(0),
+                ),
+            ).prefetch_related(
+                Prefetch('books', queryset=preview[:self.preview_size], to_attr='preview_books')
+            ).order_by('-created_at', '-id')
+
+        if self.action in ('add_book', 'remove_book', 'books'):
+            return queryset
+        # Livres, catalogue et auteurs en une seule requête préchargée
+        return queryset.prefetch_related(
+            Prefetch('books', queryset=UserBook.objects.select_related('book__author'))
+        )
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ReadingListSummarySerializer
+        return ReadingListSerializer
     
     def perform_create(self, serializer):
         """Assigne automatiquement l'utilisateur connecté"""
@@ -348,6 +528,24 @@ class ReadingListViewSet(viewsets.ModelViewSet):
         return Response({
             "message": f"Livre '{user_book.book.title}' retiré de la liste '{reading_list.name}'."
         })
+
+    @action(detail=True, methods=['get'])
+    def books(self, request, pk=None):
+        """
+        Livres d'une liste, paginés
+
+        GET /api/lists/{id}/books/?page=2
+        """
+        reading_list = self.get_object()
+        queryset = UserBook.objects.filter(
+            readinglist=reading_list
+        ).select_related('book', 'book__author').order_by('id')
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = UserBookSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(UserBookSerializer(queryset, many=True).data)
     
 # =============================================================================
 # 4.7 PROFILE VIEWSET (Profil utilisateur)
@@ -363,11 +561,19 @@ class ProfileView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         profile, created = Profile.objects.get_or_create(user=self.request.user)
         return profile
+
+    def perform_update(self, serializer):
+        """L'avatar est stocké par contenu, miniatures en arrière-plan (api/avatars.py)"""
+        has_avatar = 'avatar' in serializer.validated_data
+        avatar = serializer.validated_data.pop('avatar', None)
+        profile = serializer.save()
+        if has_avatar:
+            set_avatar(profile, avatar)
     
 # =============================================================================
 # 4.8 READING SESSION VIEWSET (Sessions de lecture)
 # =============================================================================
-class ReadingSessionViewSet(viewsets.ModelViewSet):
+class ReadingSessionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Sessions de lecture détaillées
 
@@ -379,8 +585,23 @@ class ReadingSessionViewSet(viewsets.ModelViewSet):
 
     GET    /api/reading-sessions/summary/?days=30
            → résumé des pages lues par jour sur N jours
+             (granularity=day|week|month|year, from / to)
+    GET    /api/reading-sessions/analytics/?days=365
+           → séries, moyennes, jour le plus chargé, calendrier
+    POST   /api/reading-sessions/import/
+           → import en masse (JSON, NDJSON ou CSV)
+    GET    /api/reading-sessions/export/?output=csv
+           → export en flux (NDJSON ou CSV, gzip=1 pour compresser)
+
+    GET    /api/reading-sessions/?pagination=cursor
+           → pagination par curseur (date, created_at, id décroissants)
+
+    Liste et détail : ETag / Last-Modified, 304 si rien n'a changé.
     """
     serializer_class = ReadingSessionSerializer
+    keyset_ordering = ('-date', '-created_at', '-id')
+    # list : ?user_book= valide le livre demandé (une requête de plus)
+    query_budget = {'list': 5, 'retrieve': 3, 'summary': 2, 'analytics': 6, 'export': 3}
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['user_book', 'date']
@@ -389,32 +610,158 @@ class ReadingSessionViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         return ReadingSession.objects.filter(
-            user_book__user=self.request.user
+            user=self.request.user
         ).select_related('user_book__book')
 
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """
-        Résumé des pages lues par jour.
+        Résumé des pages lues par période, périodes vides comprises.
 
         GET /api/reading-sessions/summary/?days=30
+        GET /api/reading-sessions/summary/?granularity=month&from=2026-01-01&to=2026-12-31
 
-        Retourne une liste de { "date": "YYYY-MM-DD", "pages": total_pages_lues_ce_jour }
+        Retourne une liste de { "date": début de la période, "pages", "minutes",
+        "sessions" } (lue dans l'agrégat quotidien DailyReadingStat ; les
+        périodes terminées sont servies depuis le cache)
         """
+        granularity = request.query_params.get('granularity', 'day')
+        if granularity not in SUMMARY_GRANULARITIES:
+            return Response(
+                {"error": "granularity doit valoir day, week, month ou year."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        today = timezone.localdate()
         try:
             days = int(request.query_params.get('days', 30))
         except ValueError:
             days = 30
+        days = min(max(days, 1), SUMMARY_MAX_BUCKETS)
+
+        try:
+            end = start = None
+            if request.query_params.get('to'):
+                end = parse_date(request.query_params['to'])
+                if end is None:
+                    raise ValueError
+            if request.query_params.get('from'):
+                start = parse_date(request.query_params['from'])
+                if start is None:
+                    raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "from / to doivent être des dates AAAA-MM-JJ."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        for value in (start, end):
+            if value is not None and not SUMMARY_MIN_DATE <= value <= SUMMARY_MAX_DATE:
+                return Response(
+                    {"error": f"from / to doivent être compris entre {SUMMARY_MIN_DATE} et {SUMMARY_MAX_DATE}."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        end = end or today
+        start = start or end - timedelta(days=days - 1)
+        if start > end:
+            return Response(
+                {"error": "from doit précéder to."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        today = timezone.now().date()
-        start_date = today - timedelta(days=days - 1)
+        if bucket_count(start, end, granularity) > SUMMARY_MAX_BUCKETS:
+            return Response(
+                {"error": f"Période trop longue : {SUMMARY_MAX_BUCKETS} périodes au maximum."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        qs = self.get_queryset().filter(date__gte=start_date)
+        return Response(reading_summary(request.user, granularity, start, end, today))
 
-        data = (
-            qs.values('date')
-            .annotate(pages=Sum('pages_read'))
-            .order_by('date')
-        )
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """
+        Séries, moyennes, jour le plus chargé et calendrier de lecture
+
+        GET /api/reading-sessions/analytics/?days=365
+        """
+        try:
+            days = int(request.query_params.get('days', ANALYTICS_DEFAULT_DAYS))
+        except ValueError:
+            days = ANALYTICS_DEFAULT_DAYS
+        days = min(max(days, 1), ANALYTICS_MAX_DAYS)
+
+        return Response(reading_analytics(request.user, days))
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Export des sessions en flux, de la plus ancienne à la plus récente
+
+        GET /api/reading-sessions/export/?output=ndjson
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by('date', 'id')
+        return export_response(request, queryset, SESSION_EXPORT_FIELDS, 'reading-sessions')
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_sessions(self, request):
+        """
+        Import en masse de sessions de lecture.
+
+        POST /api/reading-sessions/import/
+        Content-Type: application/json (tableau), application/x-ndjson ou text/csv
+        Champs : user_book, date, pages_read, duration_minutes, notes
+
+        Les lignes invalides sont rapportées sans interrompre l'import :
+        { "created": 950, "error_count": 50, "errors": [{ "row": 3, "errors": {...} }] }
+        """
+        rows = iter_import_rows(request)
+        result = import_reading_sessions(request.user, rows)
+
+        if result['created']:
+            status_code = status.HTTP_201_CREATED
+        elif result['error_count']:
+            status_code = status.HTTP_400_BAD_REQUEST
+        else:
+            status_code = status.HTTP_200_OK
+        return Response(result, status=status_code)
+
+
+# =============================================================================
+# 4.9 BATCH (Requêtes groupées)
+# =============================================================================
+
+class BatchView(generics.GenericAPIView):
+    """
+    Plusieurs appels à l'API en un seul échange HTTP
+
+    POST /api/batch/
+    Body: { "requests": [{ "method": "GET", "path": "/api/goals/" }, ...],
+            "atomic": false }
+    Retourne: { "responses": [{ status, headers, body }, ...] }
+
+    Une seule authentification pour tout le lot ; avec "atomic": true, tout
+    est annulé si une sous-requête échoue (voir api/batch.py).
+    """
+    serializer_class = BatchSerializer
+
+    # Nombre maximal de sous-requêtes par lot
+    max_requests = 20
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['max_requests'] = self.max_requests
+        return context
 
-        return Response(list(data))
\ No newline at end of file
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        entries, committed = run_batch(
+            request,
+            serializer.validated_data['requests'],
+            atomic=serializer.validated_data['atomic'],
+            exclude=(BatchView,),
+        )
+        data = {'responses': entries}
+        if committed is not None:
+            data['committed'] = committed
+        return Response(data)
@@ -3,9 +3,10 @@
 Configuration Django pour le projet Library Tracker
 """
 
+import sys
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import Csv, config
 
 # =============================================================================
 # CHEMINS
@@ -32,10 +33,12 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',           # Recherche plein texte / trigrammes
     
     # Applications tierces
     'rest_framework',                    # Django REST Framework
     'rest_framework_simplejwt',          # Authentification JWT
+    'rest_framework_simplejwt.token_blacklist',  # Liste noire des refresh tokens
     'corsheaders',                       # Gestion CORS pour React
     'django_filters',                    # Filtres pour DRF
     
@@ -48,6 +51,8 @@ INSTALLED_APPS = [
 # =============================================================================
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',           # CORS - doit être en premier
+    'api.middleware.RequestMetricsMiddleware',         # Requêtes SQL / temps (Server-Timing)
+    'api.replicas.ReplicaRoutingMiddleware',           # Lectures sur réplicas (si configurés)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,6 +62,12 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Mesures par requête (api.middleware) : en mode strict, un budget de
+# requêtes dépassé ou un N+1 fait échouer la requête (à activer en test)
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=True, cast=bool)
+REQUEST_METRICS_STRICT = config('REQUEST_METRICS_STRICT', default=False, cast=bool)
+REQUEST_METRICS_REPEAT_THRESHOLD = 5
+
 # =============================================================================
 # URLS & WSGI
 # =============================================================================
@@ -93,9 +104,54 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        # Durée de vie des connexions (secondes ; 0 : une par requête). Avec 0
+        # (défaut), les blocs du tableau de bord sont lus l'un après l'autre
+        # (api.dashboard) ; en parallèle seulement au-delà
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0, cast=int),
+    }
+}
+
+# Réplicas en lecture (optionnel) : DB_REPLICA_HOSTS=hote1,hote2:5433
+# Mêmes nom de base et identifiants que le primaire ; alias replica_1, replica_2…
+# Pour essayer en local : DB_REPLICA_HOSTS=localhost (second alias, même base)
+DATABASE_REPLICAS = []
+for _index, _host in enumerate(config('DB_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+    _host, _, _port = _host.partition(':')
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{_index}')
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+# Après une écriture, les lectures de l'utilisateur restent sur le primaire
+# pendant ce délai (secondes) : à régler au-dessus du retard des réplicas
+DB_REPLICA_STICKY_SECONDS = config('DB_REPLICA_STICKY_SECONDS', default=10, cast=int)
+
+# =============================================================================
+# CACHE
+# =============================================================================
+# Mémoire locale par défaut ; pour partager le cache entre processus :
+# CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# CACHE_LOCATION=/var/tmp/library_tracker_cache
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='library-tracker'),
     }
 }
 
+# Avec le cache mémoire (propre au processus), une invalidation n'atteint
+# pas les autres processus : les entrées invalidées par version (catalogue,
+# résumés) vivent alors au plus ce délai (secondes)
+LOCAL_CACHE_TIMEOUT = config('LOCAL_CACHE_TIMEOUT', default=30, cast=int)
+
+# Durée de vie des réponses du catalogue en cache (secondes)
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=600, cast=int)
+
 # =============================================================================
 # VALIDATION DES MOTS DE PASSE
 # =============================================================================
@@ -119,8 +175,9 @@ AUTH_PASSWORD_VALIDATORS = [
 # =============================================================================
 REST_FRAMEWORK = {
     # Authentification par JWT
+    # (utilisateur lu dans un cache court plutôt qu'en base : api.authentication)
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     
     # Par défaut, les endpoints nécessitent une authentification
@@ -128,8 +185,8 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     
-    # Pagination
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Pagination (numéro de page, ou curseur avec ?pagination=cursor)
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.OptionalCursorPagination',
     'PAGE_SIZE': 20,
     
     # Format des dates
@@ -155,8 +212,28 @@ SIMPLE_JWT = {
     # Headers
     'AUTH_HEADER_TYPES': ('Bearer',),                # Format: "Bearer <token>"
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
+
+    # Empreinte du mot de passe dans les jetons : un changement de mot de
+    # passe révoque les jetons existants (et change la clé du cache utilisateur)
+    'CHECK_REVOKE_TOKEN': True,
+
+    # Vérification de la liste noire via un filtre de Bloom (api.blacklist)
+    'TOKEN_REFRESH_SERIALIZER': 'api.blacklist.FilteredTokenRefreshSerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'api.blacklist.FilteredTokenBlacklistSerializer',
 }
 
+# Filtre de Bloom de la liste noire (par processus ; seulement avec un cache
+# partagé) : reconstruction complète, relecture des ajouts des autres
+# processus, taux de faux positifs
+BLACKLIST_FILTER_REBUILD_SECONDS = config('BLACKLIST_FILTER_REBUILD_SECONDS', default=300, cast=int)
+BLACKLIST_FILTER_SYNC_SECONDS = config('BLACKLIST_FILTER_SYNC_SECONDS', default=5, cast=int)
+BLACKLIST_FILTER_ERROR_RATE = config('BLACKLIST_FILTER_ERROR_RATE', default=0.001, cast=float)
+
+# Cache des utilisateurs authentifiés par JWT (api.authentication) :
+# nombre d'entrées par processus et durée de vie en secondes
+JWT_USER_CACHE_SIZE = config('JWT_USER_CACHE_SIZE', default=1024, cast=int)
+JWT_USER_CACHE_TTL = config('JWT_USER_CACHE_TTL', default=60, cast=int)
+
 # =============================================================================
 # CORS (Cross-Origin Resource Sharing)
 # =============================================================================
@@ -209,6 +286,36 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Threads qui génèrent les miniatures d'avatar (api.avatars)
+AVATAR_THUMBNAIL_WORKERS = config('AVATAR_THUMBNAIL_WORKERS', default=2, cast=int)
+
+# Threads qui lisent en parallèle les blocs du tableau de bord (api.dashboard),
+# partagés par toutes les requêtes : cinq blocs par tableau de bord.
+# Seulement avec des connexions persistantes (DB_CONN_MAX_AGE > 0)
+DASHBOARD_WORKERS = config('DASHBOARD_WORKERS', default=10, cast=int)
+
+# =============================================================================
+# LOGS
+# =============================================================================
+# api.requests : une ligne JSON par requête (voir api.middleware) ; pendant
+# les tests (manage.py test), seuls les problèmes (WARNING) par défaut
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.requests': {
+            'handlers': ['console'],
+            'level': config('REQUEST_LOG_LEVEL', default='WARNING' if TESTING else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # =============================================================================
 # CONFIGURATION PAR DÉFAUT
 # =============================================================================
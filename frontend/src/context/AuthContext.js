@@ -48,6 +48,12 @@ export function AuthProvider({ children }) {
 
   // Fonction de logout
   const logout = () => {
+    // Mettre le refresh token en liste noire côté serveur (sans attendre)
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (refreshToken) {
+      api.post('/logout/', { refresh: refreshToken }).catch(() => {});
+    }
+
     // Supprimer les tokens
     localStorage.removeItem('accessToken');
     localStorage.removeItem('refreshToken');
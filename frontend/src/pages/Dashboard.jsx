@@ -12,12 +12,6 @@ import PageHeader from '../components/ui/PageHeader';
 import LoadingSpinner from '../components/ui/LoadingSpinner';
 import Alert from '../components/ui/Alert';
 
-const extractResults = (data) => {
-  if (Array.isArray(data)) return data;
-  if (data && Array.isArray(data.results)) return data.results;
-  return [];
-};
-
 function Dashboard() {
   const [stats, setStats] = useState(null);
   const [booksInProgress, setBooksInProgress] = useState([]);
@@ -29,14 +23,11 @@ function Dashboard() {
     setLoading(true);
     setError('');
     try {
-      const [statsRes, booksRes, goalsRes] = await Promise.all([
-        api.get('/my-books/stats/'),
-        api.get('/my-books/', { params: { status: 'en_cours' } }),
-        api.get('/goals/'),
-      ]);
-      setStats(statsRes.data);
-      setBooksInProgress(extractResults(booksRes.data));
-      setGoals(extractResults(goalsRes.data));
+      // Un seul appel : les blocs sont lus en parallèle côté serveur
+      const { data } = await api.get('/dashboard/');
+      setStats(data.stats);
+      setBooksInProgress(data.in_progress);
+      setGoals(data.goals);
     } catch (err) {
       console.error(err);
       setError("Erreur lors du chargement du tableau de bord.");
@@ -11,8 +11,6 @@ import api from '../services/api';
 import { useToast } from '../context/ToastContext';
 import { useAuth } from '../context/AuthContext';
 
-const BACKEND_BASE_URL = 'http://127.0.0.1:8000'; // à adapter si besoin
-
 function Profile() {
   const { user } = useAuth();
   const toast = useToast();
@@ -35,9 +33,9 @@ function Profile() {
         const data = res.data;
         setBio(data.bio || '');
         setFavoriteGenre(data.favorite_genre || '');
-        if (data.avatar) {
-          // data.avatar est un chemin comme "/media/avatars/xxx.jpg"
-          setAvatarPreview(`${BACKEND_BASE_URL}${data.avatar}`);
+        if (data.avatar_urls) {
+          // Miniatures pré-calculées (URL absolues) : small, medium, large
+          setAvatarPreview(data.avatar_urls.large);
         }
       } catch (err) {
         console.error(err);
@@ -7,7 +7,7 @@ import PageHeader from '../components/ui/PageHeader';
 import Card from '../components/ui/Card';
 import LoadingSpinner from '../components/ui/LoadingSpinner';
 import Alert from '../components/ui/Alert';
-import api from '../services/api';
+import { batch } from '../services/api';
 
 const extractResults = (data) => {
   if (Array.isArray(data)) return data;
@@ -26,13 +26,16 @@ function ReadingHistory() {
     setLoading(true);
     setError('');
     try {
-      const [sessionsRes, summaryRes] = await Promise.all([
-        api.get('/reading-sessions/', { params: { ordering: '-date' } }),
-        api.get('/reading-sessions/summary/', { params: { days } }),
+      const [sessionsRes, summaryRes] = await batch([
+        { path: '/reading-sessions/?ordering=-date' },
+        { path: `/reading-sessions/summary/?days=${days}` },
       ]);
+      if (sessionsRes.status !== 200 || summaryRes.status !== 200) {
+        throw new Error('batch');
+      }
 
-      setSessions(extractResults(sessionsRes.data));
-      setSummary(summaryRes.data);
+      setSessions(extractResults(sessionsRes.body));
+      setSummary(summaryRes.body);
     } catch (err) {
       console.error(err);
       setError("Erreur lors du chargement de l'historique de lecture.");
@@ -102,7 +105,7 @@ function ReadingHistory() {
                 <FiTrendingUp className="text-primary-400" />
                 Pages lues cumulées ({days} derniers jours)
               </h2>
-              {cumulativeData.length === 0 ? (
+              {cumulativeData.every((item) => item.pages === 0) ? (
                 <p className="text-gray-400 text-center py-8">
                   Pas encore de sessions enregistrées sur cette période.
                 </p>
@@ -87,9 +87,9 @@ function ReadingLists() {
         ) : (
           <div style={{ display: 'flex', flexDirection: 'column', gap: '10px' }}>
             {lists.map((list) => {
-              const books = list.books || [];
-              const booksCount = books.length;
-              const preview = books.slice(0, 3);
+              // Résumé renvoyé par GET /lists/ (les livres complets sont sur /lists/{id}/books/)
+              const booksCount = list.book_count || 0;
+              const preview = list.preview || [];
 
               return (
                 <div
@@ -113,6 +113,7 @@ function ReadingLists() {
                     </div>
                     <div style={{ fontSize: '14px', color: '#555' }}>
                       {booksCount} livre{booksCount > 1 ? 's' : ''}
+                      {list.total_pages > 0 && ` · ${list.completion_percentage}% lu`}
                     </div>
 
                     {/* Aperçu des livres */}
@@ -124,7 +125,7 @@ function ReadingLists() {
                         <ul style={{ margin: 0, paddingLeft: 18 }}>
                           {preview.map((ub) => (
                             <li key={ub.id} style={{ fontSize: '14px' }}>
-                              {ub.book?.title} — {ub.book?.author?.name}
+                              {ub.title} — {ub.author}
                             </li>
                           ))}
                         </ul>
@@ -91,9 +91,36 @@ api.interceptors.response.use(
       }
     }
 
+    // 401 malgré un token tout juste rafraîchi (mot de passe changé,
+    // compte désactivé...) : la session n'est plus valide
+    if (error.response && error.response.status === 401 && originalRequest._retry) {
+      localStorage.removeItem('accessToken');
+      localStorage.removeItem('refreshToken');
+      window.location.href = '/login';
+      return Promise.reject(error);
+    }
+
     // Pour les autres erreurs, on les propage
     return Promise.reject(error);
   }
 );
 
+/**
+ * Plusieurs appels en un seul échange HTTP (POST /api/batch/)
+ * - requests : [{ method, path, body }], path relatif à /api (ex. '/goals/')
+ * - options.atomic : tout annuler si une sous-requête échoue
+ * Retourne les réponses dans l'ordre : [{ status, headers, body }]
+ */
+export const batch = async (requests, { atomic = false } = {}) => {
+  const { data } = await api.post('/batch/', {
+    atomic,
+    requests: requests.map(({ method = 'GET', path, body }) => ({
+      method,
+      path: `/api${path}`,
+      body,
+    })),
+  });
+  return data.responses;
+};
+
 export default api;
\ No newline at end of file